@@ -0,0 +1,123 @@
+"""Admin logic
+"""
+import os
+import secrets
+from typing import Optional
+
+import joblib
+from core.config import SECRET_KEY, SHADOW_MODEL
+from core.errors import ModelLoadException, PredictException
+from core.executor import recycle_executor
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from loguru import logger
+from ml.model.encoder import FeatureEncoder
+from api.routes.predictor import registry, shadow
+from models.prediction import (ModelInfo, ModelsResponse, ModelVersionResponse,
+                               ShadowMetricsResponse)
+from services.predict import MachineLearningModelHandlerScore as model
+from services.predict import reload_artifacts
+from starlette.concurrency import run_in_threadpool
+
+router = APIRouter()
+
+bearer = HTTPBearer(auto_error=False)
+
+
+def require_admin(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> None:
+    """Allow the request only with an ``Authorization: Bearer <SECRET_KEY>`` header.
+
+    Admin actions are disabled while SECRET_KEY is empty.
+
+    Args:
+        credentials (Optional[HTTPAuthorizationCredentials]): _description_
+
+    Raises:
+        HTTPException: _description_
+    """
+    key = str(SECRET_KEY)
+    if not key:
+        raise HTTPException(status_code=403, detail="Admin actions are disabled, SECRET_KEY is not set")
+    if credentials is None or not secrets.compare_digest(credentials.credentials.encode(), key.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.get(
+    "/model",
+    response_model=ModelVersionResponse,
+    name="admin:get-model",
+)
+async def get_model():
+    """Active model version.
+
+    Returns:
+        _type_: _description_
+    """
+    return ModelVersionResponse(version=model.version, loaded_at=model.loaded_at)
+
+
+@router.post(
+    "/reload",
+    response_model=ModelVersionResponse,
+    name="admin:reload-model",
+    dependencies=[Depends(require_admin)],
+)
+async def reload_model():
+    """Load, warm up and swap in the models and feature encoder currently on disk.
+
+    Named models are reloaded once they have been loaded, the default one
+    always. Nothing is swapped in unless the encoder and every model
+    loaded. Requires the SECRET_KEY as a bearer token.
+
+    Raises:
+        HTTPException: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    handlers = [handler for handler in registry.handlers.values()
+                if handler is model or handler.model is not None]
+    try:
+        await run_in_threadpool(reload_artifacts, handlers, joblib.load, FeatureEncoder.load)
+    except (Exception, PredictException, ModelLoadException) as err:
+        logger.error(f"Exception: {err}")
+        raise HTTPException(status_code=500, detail=f"Exception: {err}")
+    recycle_executor()
+    return ModelVersionResponse(version=model.version, loaded_at=model.loaded_at)
+
+
+@router.get(
+    "/models",
+    response_model=ModelsResponse,
+    name="admin:get-models",
+)
+async def get_models():
+    """Registered models, select one with the X-Model header or /v1/models/{name}/ routes.
+
+    Each version is the one being served, empty until the model is loaded.
+
+    Returns:
+        _type_: _description_
+    """
+    return ModelsResponse(
+        shadow=SHADOW_MODEL or None,
+        models=[ModelInfo(name=name, file=os.path.basename(handler.get_path()),
+                          version=handler.version, loaded_at=handler.loaded_at)
+                for name, handler in registry.handlers.items()])
+
+
+@router.get(
+    "/shadow",
+    response_model=ShadowMetricsResponse,
+    name="admin:get-shadow",
+)
+async def get_shadow():
+    """Disagreement and latency of the shadow model against the served ones.
+
+    Returns:
+        _type_: _description_
+    """
+    if shadow is None:
+        return ShadowMetricsResponse(enabled=False)
+    return ShadowMetricsResponse(enabled=True, model=SHADOW_MODEL, pending=shadow.pending, **shadow.summary())
@@ -2,7 +2,9 @@
 """
 from fastapi import APIRouter
 
-from api.routes import predictor
+from api.routes import admin, jobs, predictor
 
 router = APIRouter()
 router.include_router(predictor.router, tags=["predictor"], prefix="/v1")
+router.include_router(admin.router, tags=["admin"], prefix="/v1/admin")
+router.include_router(jobs.router, tags=["jobs"], prefix="/v1/jobs")
@@ -0,0 +1,146 @@
+"""Batch job logic
+"""
+from typing import Any, Optional, Sequence
+
+from api.routes.predictor import (PREDICT_REQUEST_BODY, get_encoder,
+                                  get_passenger_store, predict_matrix_async,
+                                  read_columns)
+from core.config import (JOB_CHUNK_SIZE, JOB_HEARTBEAT_INTERVAL, JOB_PAGE_SIZE,
+                         JOB_RETENTION, JOBS_DATABASE)
+from core.executor import run_io
+from core.paginator import decode_cursor, keyset_page
+from fastapi import APIRouter, HTTPException, Query, Request
+from models.prediction import (JobResponse, JobResult, JobResultsResponse,
+                               MachineLearningDataInputList)
+from services.jobs import BatchJobRunner, JobStore
+
+router = APIRouter()
+
+
+def get_job_store() -> JobStore:
+    """Get the job store, creating its database on first use.
+
+    Returns:
+        JobStore: _description_
+    """
+    return JobStore.get_store(JOBS_DATABASE)
+
+
+async def score_chunk(kind: str, chunk: Any) -> Sequence[int]:
+    """Predict one chunk of a job, passenger ids or feature columns.
+
+    Args:
+        kind (str): _description_
+        chunk (Any): _description_
+
+    Returns:
+        Sequence[int]: _description_
+    """
+    if kind == "predict_id_list":
+        store = await run_io(get_passenger_store)
+        chunk = await store.fetch(chunk)
+    return await predict_matrix_async(get_encoder().transform(chunk))
+
+
+runner = BatchJobRunner(get_job_store, score_chunk, chunk_size=JOB_CHUNK_SIZE,
+                        heartbeat=JOB_HEARTBEAT_INTERVAL, retention=JOB_RETENTION)
+
+
+async def get_job_or_404(job_id: str) -> dict:
+    job = await get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.post(
+    "/predict",
+    response_model=JobResponse,
+    status_code=202,
+    name="jobs:predict",
+    openapi_extra=PREDICT_REQUEST_BODY,
+)
+async def submit_predict(request: Request):
+    """Queue a prediction job for a feature batch.
+
+    The body is the same as for /v1/predict.
+
+    Args:
+        request (Request): _description_
+
+    Returns:
+        _type_: _description_
+    """
+    columns, _ = await read_columns(request)
+    return JobResponse(**await runner.submit("predict", columns))
+
+
+@router.post(
+    "/predict_id_list",
+    response_model=JobResponse,
+    status_code=202,
+    name="jobs:predict-id-list",
+)
+async def submit_predict_id_list(data_input: MachineLearningDataInputList):
+    """Queue a prediction job for an id list of passengers.
+
+    Args:
+        data_input (MachineLearningDataInputList): _description_
+
+    Returns:
+        _type_: _description_
+    """
+    return JobResponse(**await runner.submit("predict_id_list", data_input.get_data()))
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobResponse,
+    name="jobs:get-job",
+)
+async def get_job(job_id: str):
+    """Job status and progress.
+
+    Args:
+        job_id (str): _description_
+
+    Returns:
+        _type_: _description_
+    """
+    return JobResponse(**await get_job_or_404(job_id))
+
+
+@router.get(
+    "/{job_id}/results",
+    response_model=JobResultsResponse,
+    name="jobs:get-results",
+)
+async def get_results(job_id: str, cursor: Optional[str] = None,
+                      limit: int = Query(default=JOB_PAGE_SIZE, gt=0, le=10000)):
+    """One page of a job's predictions, in row order.
+
+    Rows are available as soon as their chunk is scored. Pass the returned
+    next_cursor to get the following page, it is null on the last page
+    scored so far.
+
+    Args:
+        job_id (str): _description_
+        cursor (Optional[str]): _description_
+        limit (int): _description_
+
+    Raises:
+        HTTPException: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    job = await get_job_or_404(job_id)
+    try:
+        after = decode_cursor(cursor, default=-1)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=f"{err}")
+    page = keyset_page(await get_job_store().page(job_id, after, limit + 1), limit)
+    return JobResultsResponse(
+        job_id=job_id, status=job["status"], next_cursor=page["nextCursor"],
+        results=[JobResult(row=row, passenger_id=passenger_id, prediction=prediction)
+                 for row, passenger_id, prediction in page["listings"]])
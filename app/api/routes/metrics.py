@@ -0,0 +1,23 @@
+"""Metrics logic
+"""
+from core.metrics import REGISTRY
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    name="metrics:get-data",
+)
+async def get_metrics():
+    """Metrics of this worker in Prometheus text format.
+
+    Returns:
+        _type_: _description_
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,22 +1,60 @@
 """Api logic
 """
 import json
-from typing import Any
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Optional, Tuple, Union
 
 import joblib
-import pandas as pd
-from core.config import INPUT_EXAMPLE
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from core.admission import AdmissionController
+from core.config import (ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT,
+                         BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, BATCHING_ENABLED,
+                         COLUMNAR_VALIDATION, INPUT_EXAMPLE, PREDICT_ID_LIST_MAX_REQUESTS,
+                         PREDICT_ID_LIST_MAX_ROWS, PREDICT_MAX_REQUESTS, PREDICT_MAX_ROWS,
+                         PREDICT_STREAM_MAX_REQUESTS,
+                         MODELS, PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, SHADOW_MAX_PENDING,
+                         SHADOW_MODEL, SHADOW_SAMPLE_RATE, STREAM_CHUNK_SIZE,
+                         STREAM_MAX_LINE_BYTES)
+from core import metrics
+from core.errors import (ColumnValidationException, OverloadedException,
+                         UnknownModelException, UnsupportedMediaTypeException)
+from core.executor import run_inference, run_inference_sync, run_io, uses_processes
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
 from loguru import logger
-from models.prediction import (HealthResponse, MachineLearningDataInput,
+from ml.model.encoder import FeatureEncoder
+from models.prediction import (BatchingMetricsResponse, CacheMetricsResponse,
+                               HealthResponse, MachineLearningDataInput,
                                MachineLearningDataInputList,
-                               MachineLearningResponse)
+                               MachineLearningResponse, ReadinessResponse)
+from pydantic import ValidationError
+from services import codecs
+from services.encoder import FeatureEncoderHandler
+from services.health import ModelSelfTest
+from services.passengers import PassengerStore, SqlitePassengerStore, get_roster
 from services.predict import MachineLearningModelHandlerScore as model
+from services.predict import MicroBatchDispatcher, PredictionCache
+from services.registry import DEFAULT_MODEL, ModelRegistry, parse_models
+from services.shadow import ShadowEvaluator
+from services.stream import DuplexStreamingResponse, predict_ndjson
+from services.validation import validate_columns
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
-router = APIRouter()
+router = APIRouter(route_class=metrics.TimedRoute)
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def get_prediction(data_point: pd.DataFrame) -> Any:
+MODEL_VERSION_HEADER = "X-Model-Version"
+MODEL_HEADER = "X-Model"
+
+registry = ModelRegistry(model, parse_models(MODELS))
+
+
+def get_prediction(data_point: "pd.DataFrame") -> Any:
     """Get prediction.
 
     Args:
@@ -28,46 +66,599 @@ def get_prediction(data_point: pd.DataFrame) -> Any:
     return model.predict(data_point, load_wrapper=joblib.load, method="predict")
 
 
-def get_test_data() -> pd.DataFrame:
-    """Load test data.
+def get_model_prediction(matrix: np.ndarray, name: str = DEFAULT_MODEL) -> Any:
+    """Get prediction from a named model for a matrix laid out as the encoder columns.
+
+    Args:
+        matrix (np.ndarray): _description_
+        name (str): registered model name.
+
+    Returns:
+        Any: _description_
+    """
+    return registry.get(name).predict_matrix(
+        matrix, get_encoder().columns, load_wrapper=joblib.load, method="predict")
+
+
+prediction_cache = PredictionCache(
+    max_size=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+
+
+def get_versioned_prediction(matrix: np.ndarray, name: str = DEFAULT_MODEL) -> Tuple[Any, Optional[str]]:
+    """Get prediction from a feature matrix laid out as the encoder columns,
+    with the version of the model that made it.
+
+    Rows already seen by the active default model are answered from the
+    cache, other models are always called.
+
+    Args:
+        matrix (np.ndarray): _description_
+        name (str): registered model name.
+
+    Returns:
+        Tuple[Any, Optional[str]]: prediction and model version.
+    """
+    handler = registry.get(name)
+    clf, version = handler.get_active(joblib.load)
+    predict = partial(handler.call_matrix, clf, features=get_encoder().columns)
+    if name != DEFAULT_MODEL or PREDICTION_CACHE_SIZE <= 0:
+        return predict(matrix), version
+    return prediction_cache.predict(matrix, predict, version=version), version
+
+
+def get_matrix_prediction(matrix: np.ndarray, name: str = DEFAULT_MODEL) -> Any:
+    """Get prediction from a feature matrix laid out as the encoder columns.
+
+    Args:
+        matrix (np.ndarray): _description_
+        name (str): registered model name.
+
+    Returns:
+        Any: _description_
+    """
+    return get_versioned_prediction(matrix, name)[0]
+
+
+def get_pooled_prediction(matrix: np.ndarray, name: str = DEFAULT_MODEL) -> Tuple[Any, Optional[str]]:
+    """Get prediction like get_versioned_prediction, the model running in the process pool.
+
+    The default model is also loaded here and its cache stays here, shared
+    by the pool's processes, so only the misses are sent to the pool.
+
+    Args:
+        matrix (np.ndarray): _description_
+        name (str): registered model name.
 
     Returns:
-        pd.DataFrame: _description_
+        Tuple[Any, Optional[str]]: prediction and model version.
     """
-    return pd.read_csv("data/test.csv")
+    if name != DEFAULT_MODEL or PREDICTION_CACHE_SIZE <= 0:
+        return run_inference_sync(get_versioned_prediction, matrix, name)
+    _, version = registry.get(name).get_active(joblib.load)
+    return prediction_cache.predict(
+        matrix, partial(run_inference_sync, get_model_prediction), version=version), version
+
+
+async def predict_versioned(matrix: np.ndarray, name: str = DEFAULT_MODEL) -> Tuple[Any, Optional[str]]:
+    """Get prediction and model version on the inference executor.
+
+    Args:
+        matrix (np.ndarray): _description_
+        name (str): registered model name.
+
+    Returns:
+        Tuple[Any, Optional[str]]: prediction and model version.
+    """
+    if uses_processes():
+        return await run_in_threadpool(get_pooled_prediction, matrix, name)
+    return await run_inference(get_versioned_prediction, matrix, name)
+
+
+dispatcher = MicroBatchDispatcher(
+    predict_versioned, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+    versioned=True, timed=True)
+
+
+def get_shadow_prediction(matrix: np.ndarray) -> Any:
+    """Get prediction from the shadow model, on the shadow evaluator's own thread.
+
+    It never takes an inference worker, so replays cannot delay live requests.
+
+    Args:
+        matrix (np.ndarray): _description_
+
+    Returns:
+        Any: _description_
+    """
+    return get_model_prediction(matrix, SHADOW_MODEL)
+
+
+shadow = None
+if SHADOW_MODEL:
+    registry.get(SHADOW_MODEL)  # an unknown name fails at startup, not in the background
+    shadow = ShadowEvaluator(
+        get_shadow_prediction, sample_rate=SHADOW_SAMPLE_RATE, max_pending=SHADOW_MAX_PENDING)
+
+
+admission = {
+    name: AdmissionController(name, max_requests, max_rows,
+                              ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT)
+    for name, max_requests, max_rows in [
+        ("predict", PREDICT_MAX_REQUESTS, PREDICT_MAX_ROWS),
+        ("predict_id_list", PREDICT_ID_LIST_MAX_REQUESTS, PREDICT_ID_LIST_MAX_ROWS),
+        ("predict_stream", PREDICT_STREAM_MAX_REQUESTS, 0),
+    ]
+}
+
+# rough body bytes per row of each format, to admit a body before parsing it
+ROW_BYTES = {codecs.JSON: 20, codecs.MSGPACK: 10, codecs.ARROW: 30}
+
+
+def register_metrics() -> None:
+    """Expose the cache, micro-batching, shadow and admission counters on /metrics.
+    """
+    for metric_name, help_text, source, key in [
+        ("titanic_prediction_cache_hits_total", "Prediction cache hits.", prediction_cache.metrics, "hits"),
+        ("titanic_prediction_cache_misses_total", "Prediction cache misses.", prediction_cache.metrics, "misses"),
+        ("titanic_prediction_cache_evictions_total", "Prediction cache evictions.", prediction_cache.metrics, "evictions"),
+        ("titanic_batches_total", "Micro-batches sent to the model.", dispatcher.metrics, "batches"),
+        ("titanic_batched_rows_total", "Rows sent to the model in micro-batches.", dispatcher.metrics, "rows"),
+        ("titanic_batch_queue_delay_seconds_total", "Time requests waited for their micro-batch.",
+         dispatcher.metrics, "queue_delay_seconds_total"),
+    ]:
+        metrics.REGISTRY.register(metrics.Counter(
+            metric_name, help_text, callback=lambda source=source, key=key: source[key]))
+
+    for metric_name, help_text, key in [
+        ("titanic_shadow_requests_total", "Requests replayed on the shadow model.", "requests"),
+        ("titanic_shadow_rows_total", "Rows replayed on the shadow model.", "rows"),
+        ("titanic_shadow_disagreements_total", "Rows the shadow model predicted differently.", "disagreements"),
+        ("titanic_shadow_errors_total", "Failed shadow predictions.", "errors"),
+        ("titanic_shadow_dropped_total", "Requests not replayed because the shadow model was behind.", "dropped"),
+        ("titanic_shadow_primary_seconds_total", "Primary inference time of the replayed requests.",
+         "primary_seconds_total"),
+        ("titanic_shadow_seconds_total", "Shadow inference time of the replayed requests.", "shadow_seconds_total"),
+    ] if shadow is not None else []:
+        metrics.REGISTRY.register(metrics.Counter(
+            metric_name, help_text, callback=lambda key=key: shadow.metrics[key]))
+
+    for metric_name, help_text, read in [
+        ("titanic_admission_queue_depth", "Requests waiting for admission.",
+         lambda controller: len(controller.waiters)),
+        ("titanic_admission_requests_in_flight", "Admitted requests in flight.",
+         lambda controller: controller.requests),
+        ("titanic_admission_rows_in_flight", "Rows of the admitted requests in flight.",
+         lambda controller: controller.rows),
+    ]:
+        metrics.REGISTRY.register(metrics.Gauge(
+            metric_name, help_text, labels=("route",),
+            callback=lambda read=read: {(route,): read(controller) for route, controller in admission.items()}))
+    metrics.REGISTRY.register(metrics.Counter(
+        "titanic_admission_rejected_total", "Requests shed by admission control.", labels=("route", "reason"),
+        callback=lambda: {(route, reason): controller.metrics[reason]
+                          for route, controller in admission.items() for reason in ("queue_full", "timeout")}))
+
+
+register_metrics()
+
+
+async def admit(route: str, rows: int) -> None:
+    """Take admission for ``rows`` rows on ``route``, shedding with a 503.
+
+    Args:
+        route (str): _description_
+        rows (int): _description_
+
+    Raises:
+        HTTPException: _description_
+    """
+    try:
+        await admission[route].acquire(rows)
+    except OverloadedException as err:
+        raise HTTPException(status_code=503, detail=f"{err}",
+                            headers={"Retry-After": str(err.retry_after)})
+
+
+@asynccontextmanager
+async def admitted(route: str, rows: int) -> AsyncIterator[Callable[[int], None]]:
+    """Hold admission for ``rows`` rows on ``route``, shedding with a 503.
+
+    Yields a function that charges the exact row count once it is known,
+    for requests admitted on an estimate.
+
+    Args:
+        route (str): _description_
+        rows (int): _description_
+    """
+    controller = admission[route]
+    await admit(route, rows)
+    held = rows
+
+    def charge(exact: int) -> None:
+        nonlocal held
+        controller.resize(held, exact)
+        held = exact
+
+    try:
+        yield charge
+    finally:
+        controller.release(held)
+
+
+def estimate_rows(request: Request) -> int:
+    """Estimate the rows of a body from its Content-Length, 0 when it has none.
+
+    Args:
+        request (Request): _description_
+
+    Returns:
+        int: _description_
+    """
+    length = request.headers.get("content-length", "")
+    if not length.isdigit():
+        return 0
+    content_type = codecs.media_type(request.headers.get("content-type"))
+    return int(length) // ROW_BYTES.get(content_type, ROW_BYTES[codecs.JSON])
+
+
+def get_passenger_store() -> Union[PassengerStore, SqlitePassengerStore]:
+    """Get the passenger roster, loading it on first use.
+
+    Returns:
+        Union[PassengerStore, SqlitePassengerStore]: _description_
+    """
+    import pandas as pd
+
+    return get_roster(load_wrapper=pd.read_csv)
+
+
+def get_encoder() -> FeatureEncoder:
+    """Get the feature encoder saved with the model, loading it on first use.
+
+    Returns:
+        FeatureEncoder: _description_
+    """
+    return FeatureEncoderHandler.get_encoder(load_wrapper=FeatureEncoder.load)
+
+
+def records_to_matrix(records: list) -> np.ndarray:
+    """Validate row records and lay them out as the encoder columns.
+
+    Args:
+        records (list): _description_
+
+    Returns:
+        np.ndarray: _description_
+    """
+    columns = {
+        name: [record.get(name) for record in records]
+        for name in MachineLearningDataInput.model_fields
+    }
+    if not COLUMNAR_VALIDATION:
+        columns = MachineLearningDataInput(**columns).model_dump()
+    encoder = get_encoder()
+    return encoder.transform(validate_columns(columns, encoder.categorical))
+
+
+PREDICT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            codecs.JSON: {"schema": MachineLearningDataInput.model_json_schema()},
+            codecs.ARROW: {"schema": {"type": "string", "format": "binary"}},
+            codecs.MSGPACK: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+MODEL_NAME_PARAMETER = {
+    "parameters": [{"name": "model_name", "in": "path", "required": True, "schema": {"type": "string"}}]
+}
+
+
+def check_columns(columns: Any) -> Dict[str, np.ndarray]:
+    """Validate whole columns against the encoder's categories.
+
+    Args:
+        columns (Any): _description_
+
+    Raises:
+        RequestValidationError: _description_
+
+    Returns:
+        Dict[str, np.ndarray]: _description_
+    """
+    try:
+        return validate_columns(columns, get_encoder().categorical)
+    except ColumnValidationException as err:
+        raise RequestValidationError(err.errors)
+
+
+async def read_columns(request: Request) -> Tuple[Dict[str, Any], str]:
+    """Read the feature columns of a JSON, Arrow IPC or MessagePack body.
+
+    Binary bodies are decoded straight into NumPy columns and validated
+    column by column, as are JSON bodies with COLUMNAR_VALIDATION. Otherwise
+    JSON goes through MachineLearningDataInput first. Every body gets the
+    same value range and category checks.
+
+    Args:
+        request (Request): _description_
+
+    Raises:
+        HTTPException: _description_
+        RequestValidationError: _description_
+
+    Returns:
+        Tuple[Dict[str, Any], str]: columns and the body's media type.
+    """
+    content_type = codecs.media_type(request.headers.get("content-type"))
+    body = await request.body()
+    if content_type in codecs.BINARY:
+        try:
+            columns = codecs.decode_columns(body, content_type)
+        except UnsupportedMediaTypeException as err:
+            raise HTTPException(status_code=415, detail=f"{err}")
+        except Exception as err:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid {content_type} body: {err}")
+        return check_columns(columns), content_type
+    if content_type not in ("", codecs.JSON):
+        raise HTTPException(
+            status_code=415, detail=f"{UnsupportedMediaTypeException(content_type)}")
+    if COLUMNAR_VALIDATION:
+        try:
+            columns = json.loads(body)
+        except ValueError as err:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid {content_type} body: {err}")
+        return check_columns(columns), codecs.JSON
+    try:
+        data_input = MachineLearningDataInput.model_validate_json(body)
+    except ValidationError as err:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])}
+            for error in err.errors(include_url=False, include_context=False)])
+    return check_columns(data_input.model_dump()), codecs.JSON
+
+
+def prediction_response(request: Request, response: Response, prediction: Any, content_type: str = codecs.JSON,
+                        name: str = DEFAULT_MODEL, version: Optional[str] = None) -> Any:
+    """Answer in the media type negotiated from the Accept header.
+
+    Args:
+        request (Request): _description_
+        response (Response): _description_
+        prediction (Any): _description_
+        content_type (str): media type of the request body.
+        name (str): model that made the prediction.
+        version (Optional[str]): version of that model.
+
+    Raises:
+        HTTPException: _description_
+
+    Returns:
+        Any: _description_
+    """
+    accept = codecs.negotiate(request.headers.get("accept"), content_type)
+    if accept == codecs.JSON:
+        set_model_version(response, name, version)
+        return MachineLearningResponse(prediction=prediction)
+    try:
+        response = Response(codecs.encode_prediction(
+            prediction, accept), media_type=accept)
+    except UnsupportedMediaTypeException as err:
+        raise HTTPException(status_code=406, detail=f"{err}")
+    set_model_version(response, name, version)
+    return response
+
+
+def select_model(request: Request) -> str:
+    """Model named by the route, else by the X-Model header, else the default one.
+
+    Args:
+        request (Request): _description_
+
+    Raises:
+        HTTPException: _description_
+
+    Returns:
+        str: registered model name.
+    """
+    name = request.path_params.get("model_name") or request.headers.get(MODEL_HEADER) or DEFAULT_MODEL
+    try:
+        registry.get(name)
+    except UnknownModelException as err:
+        raise HTTPException(status_code=404, detail=f"{err}")
+    return name
+
+
+def shadow_copy(name: str, matrix: np.ndarray, prediction: Any, seconds: float) -> None:
+    """Hand a request served by ``name`` to the shadow model, if there is one.
+
+    Args:
+        name (str): model that served the request.
+        matrix (np.ndarray): _description_
+        prediction (Any): _description_
+        seconds (float): inference time of the served model, from the
+            executor call to its result.
+    """
+    if shadow is not None and name != SHADOW_MODEL:
+        shadow.submit(matrix, prediction, seconds)
+
+
+async def predict_matrix_async(matrix: np.ndarray, name: str = DEFAULT_MODEL) -> Any:
+    """Get prediction on the inference executor.
+
+    Args:
+        matrix (np.ndarray): _description_
+        name (str): registered model name.
+
+    Returns:
+        Any: _description_
+    """
+    prediction, _ = await predict_versioned(matrix, name)
+    return prediction
+
+
+def set_model_version(response: Response, name: str = DEFAULT_MODEL, version: Optional[str] = None) -> None:
+    """Report the model and the version that made the prediction in the response headers.
+
+    Args:
+        response (Response): _description_
+        name (str): registered model name.
+        version (Optional[str]): model version captured with the prediction.
+    """
+    response.headers[MODEL_HEADER] = name
+    if version is not None:
+        response.headers[MODEL_VERSION_HEADER] = version
+
+
+def read_input_example() -> dict:
+    """Read the example input used by the health check.
+
+    Returns:
+        dict: _description_
+    """
+    with open(INPUT_EXAMPLE, "r") as file:
+        return json.loads(file.read())
 
 
+@router.post(
+    "/models/{model_name}/predict",
+    response_model=MachineLearningResponse,
+    name="predict:get-data-by-model",
+    openapi_extra={**PREDICT_REQUEST_BODY, **MODEL_NAME_PARAMETER},
+)
 @router.post(
     "/predict",
     response_model=MachineLearningResponse,
     name="predict:get-data",
+    openapi_extra=PREDICT_REQUEST_BODY,
 )
-async def predict(data_input: MachineLearningDataInput):
+async def predict(request: Request, response: Response):
     """Predict responses.
 
+    The body is JSON shaped as MachineLearningDataInput, an Arrow IPC stream
+    or a MessagePack map with the same columns. The answer follows Accept,
+    defaulting to the body's format. The default model answers unless the
+    route or the X-Model header names another one.
+
     Args:
-        data_input (MachineLearningDataInput): _description_
+        request (Request): _description_
+        response (Response): _description_
 
     Raises:
         HTTPException: _description_
+
+    Returns:
+        _type_: _description_
+    """
+
+    name = select_model(request)
+    async with admitted("predict", estimate_rows(request)) as charge:
+        metrics.mark("admission")
+        columns, content_type = await read_columns(request)
+        charge(max((len(column) for column in columns.values()), default=0))
+        metrics.mark("validation")
+        try:
+            data_point = get_encoder().transform(columns)
+            metrics.observe_rows(len(data_point))
+            metrics.mark("features")
+            if BATCHING_ENABLED and name == DEFAULT_MODEL:
+                # charged its share of the batch's call, not its wait for the batch
+                prediction, version, seconds = await dispatcher.submit(data_point)
+            else:
+                start = time.perf_counter()
+                prediction, version = await predict_versioned(data_point, name)
+                seconds = time.perf_counter() - start
+            metrics.mark("inference")
+            shadow_copy(name, data_point, prediction, seconds)
+
+        except Exception as err:
+            logger.error(f"Exception: {err}")
+            raise HTTPException(status_code=500, detail=f"Exception: {err}")
+
+    return prediction_response(request, response, prediction, content_type, name, version)
+
+
+@router.post(
+    "/models/{model_name}/predict_stream",
+    name="predict_stream:get-data-by-model",
+    openapi_extra=MODEL_NAME_PARAMETER,
+)
+@router.post(
+    "/predict_stream",
+    name="predict_stream:get-data",
+)
+async def predict_stream(request: Request):
+    """Predict an NDJSON body, one passenger record per line.
+
+    Each record looks like {"Pclass": 3, "SibSp": 0, "Parch": 0, "Sex": "male"}
+    and gets one {"prediction": 0} line back, in order. The model is picked
+    like for /predict. There is no X-Model-Version header: it is sent before
+    the first chunk is predicted, and a reload may swap the model mid-stream.
+    Admission counts the stream as one request until it ends.
+
+    Args:
+        request (Request): _description_
+
+    Raises:
         HTTPException: _description_
 
     Returns:
         _type_: _description_
     """
+    name = select_model(request)
+    await admit("predict_stream", 0)
+    return DuplexStreamingResponse(
+        predict_ndjson(request.stream(), records_to_matrix,
+                       partial(predict_matrix_async, name=name), chunk_size=STREAM_CHUNK_SIZE,
+                       max_line_bytes=STREAM_MAX_LINE_BYTES),
+        media_type="application/x-ndjson",
+        headers={MODEL_HEADER: name},
+        background=BackgroundTask(admission["predict_stream"].release, 0),
+    )
 
-    if not data_input:
-        raise HTTPException(
-            status_code=404, detail="'data_input' argument invalid!")
-    try:
-        data_point = data_input.get_dataframe()
-        prediction = get_prediction(data_point)
 
-    except Exception as err:
-        logger.error(f"Exception: {err}")
-        raise HTTPException(status_code=500, detail=f"Exception: {err}")
+@router.get(
+    "/batching",
+    response_model=BatchingMetricsResponse,
+    name="batching:get-metrics",
+)
+async def batching():
+    """Micro-batching metrics of the prediction dispatcher.
+
+    Returns:
+        _type_: _description_
+    """
+    return BatchingMetricsResponse(enabled=BATCHING_ENABLED, **dispatcher.metrics)
+
+
+async def run_self_test() -> None:
+    """Predict the example input through the serving path.
+    """
+    test_input = MachineLearningDataInput(**await run_io(read_input_example))
+    await predict_matrix_async(test_input.get_array(get_encoder()))
+
+
+self_test = ModelSelfTest(run_self_test, version=lambda: model.version)
+
+
+@router.get(
+    "/cache",
+    response_model=CacheMetricsResponse,
+    name="cache:get-metrics",
+)
+async def cache():
+    """Prediction cache counters.
 
-    return MachineLearningResponse(prediction=prediction)
+    Returns:
+        _type_: _description_
+    """
+    return CacheMetricsResponse(
+        enabled=PREDICTION_CACHE_SIZE > 0, **prediction_cache.metrics)
 
 
 @router.get(
@@ -84,29 +675,67 @@ async def health():
     Returns:
         _type_: _description_
     """
-    is_health = False
-    try:
-        test_input = MachineLearningDataInput(
-            **json.loads(open(INPUT_EXAMPLE, "r").read())
-        )
-        test_point = test_input.get_dataframe()
-        get_prediction(test_point)
-        is_health = True
-        return HealthResponse(status=is_health)
-    except Exception:
+    result = await self_test.get()
+    if not result["status"]:
         raise HTTPException(status_code=404, detail="Unhealthy")
+    return HealthResponse(status=True)
+
+
+@router.get(
+    "/live",
+    response_model=HealthResponse,
+    name="health:get-liveness",
+)
+async def live():
+    """Liveness probe, the worker is able to answer.
+
+    Returns:
+        _type_: _description_
+    """
+    return HealthResponse(status=True)
 
 
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    name="health:get-readiness",
+)
+async def ready(response: Response):
+    """Readiness probe from the cached model self-test.
+
+    Not ready (503) until the model is loaded and a self-test passed.
+
+    Args:
+        response (Response): _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if not self_test.ready:
+        response.status_code = 503
+    result = self_test.result or {"status": False}
+    return ReadinessResponse(
+        **{**result, "ready": self_test.ready, "loaded_at": model.loaded_at})
+
+
+@router.post(
+    "/models/{model_name}/predict_id_list",
+    response_model=MachineLearningResponse,
+    name="predict_id_list:get-data-by-model",
+    openapi_extra=MODEL_NAME_PARAMETER,
+)
 @router.post(
     "/predict_id_list",
     response_model=MachineLearningResponse,
     name="predict_id_list:get-data",
 )
-async def predict(data_input: MachineLearningDataInputList):
+async def predict(data_input: MachineLearningDataInputList, request: Request, response: Response):
     """Predict by id list of passengers.
 
     Args:
         data_input (MachineLearningDataInputList): _description_
+        request (Request): _description_
+        response (Response): _description_
 
     Raises:
         HTTPException: _description_
@@ -120,17 +749,25 @@ async def predict(data_input: MachineLearningDataInputList):
     if not data_input:
         raise HTTPException(
             status_code=404, detail="'data_input' argument invalid!")
-    try:
-        id_data = data_input.get_data()
-        raw_data = get_test_data()
-        if any(id not in raw_data["PassengerId"].to_list() for id in id_data):
-            raise ValueError('Check IDs')
-        data_point = MachineLearningDataInput(**raw_data[raw_data["PassengerId"].isin(
-            id_data)][["Pclass", "Sex", "SibSp", "Parch"]].to_dict(orient="list")).get_dataframe()
-        prediction = get_prediction(data_point)
-
-    except Exception as err:
-        logger.error(f"Exception: {err}")
-        raise HTTPException(status_code=500, detail=f"Exception: {err}")
-
-    return MachineLearningResponse(prediction=prediction)
+    name = select_model(request)
+    metrics.mark("validation")
+    id_data = data_input.get_data()
+    async with admitted("predict_id_list", len(id_data)):
+        metrics.mark("admission")
+        try:
+            store = await run_io(get_passenger_store)
+            raw_data = await store.fetch(id_data)
+            metrics.observe_rows(len(raw_data))
+            metrics.mark("lookup")
+            data_point = get_encoder().transform(raw_data)
+            metrics.mark("features")
+            start = time.perf_counter()
+            prediction, version = await predict_versioned(data_point, name)
+            metrics.mark("inference")
+            shadow_copy(name, data_point, prediction, time.perf_counter() - start)
+
+        except Exception as err:
+            logger.error(f"Exception: {err}")
+            raise HTTPException(status_code=500, detail=f"Exception: {err}")
+
+    return prediction_response(request, response, prediction, name=name, version=version)
@@ -0,0 +1,105 @@
+"""Admission control for the prediction routes.
+
+Each route caps the requests and the rows it works on at once. Requests over
+the caps wait in a short FIFO queue and are shed with a 503 when the queue
+is full or their wait runs out, so overload turns into fast rejections
+instead of every request slowing down together.
+"""
+import asyncio
+import math
+from collections import deque
+from typing import Deque, Tuple
+
+from core.errors import OverloadedException
+
+
+class AdmissionController(object):
+    """Admits work while a route has request and row capacity left.
+
+    A limit of 0 disables it. A request with more rows than ``max_rows`` is
+    admitted once nothing else is in flight, so it is slow but not refused.
+    """
+
+    def __init__(self, name: str, max_requests: int, max_rows: int, max_queue: int, timeout: float) -> None:
+        self.name = name
+        self.max_requests = max_requests
+        self.max_rows = max_rows
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.requests = 0
+        self.rows = 0
+        self.waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self.metrics = {"admitted": 0, "queued": 0,
+                        "queue_full": 0, "timeout": 0}
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.timeout))
+
+    def fits(self, rows: int) -> bool:
+        return ((not self.max_requests or self.requests < self.max_requests)
+                and (not self.max_rows or self.rows == 0 or self.rows + rows <= self.max_rows))
+
+    def _enter(self, rows: int) -> None:
+        self.requests += 1
+        self.rows += rows
+        self.metrics["admitted"] += 1
+
+    def _wake(self) -> None:
+        while self.waiters and self.fits(self.waiters[0][0]):
+            rows, future = self.waiters.popleft()
+            if not future.done():
+                self._enter(rows)
+                future.set_result(None)
+
+    def _reject(self, reason: str) -> OverloadedException:
+        self.metrics[reason] += 1
+        return OverloadedException(self.name, self.retry_after)
+
+    async def acquire(self, rows: int) -> None:
+        """Wait for capacity for ``rows`` rows.
+
+        Raises:
+            OverloadedException: if the queue is full or the wait times out.
+        """
+        if not self.waiters and self.fits(rows):
+            self._enter(rows)
+            return
+        if len(self.waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+
+        waiter = (rows, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        self.metrics["queued"] += 1
+        try:
+            await asyncio.wait({waiter[1]}, timeout=self.timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter[1].done():
+            self._abandon(waiter)
+            raise self._reject("timeout")
+
+    def _abandon(self, waiter: Tuple[int, asyncio.Future]) -> None:
+        rows, future = waiter
+        if future.done():
+            self.release(rows)
+            return
+        future.cancel()
+        self.waiters.remove(waiter)
+        self._wake()
+
+    def resize(self, held: int, rows: int) -> None:
+        """Charge ``rows`` instead of the ``held`` rows a request was admitted with.
+
+        Requests are admitted on an estimate before their body is parsed. The
+        exact count is charged even past ``max_rows`` since the request is
+        already in; a smaller one frees the difference for the queue.
+        """
+        self.rows += rows - held
+        self._wake()
+
+    def release(self, rows: int) -> None:
+        self.requests -= 1
+        self.rows -= rows
+        self._wake()
@@ -5,7 +5,7 @@ import logging
 
 from loguru import logger
 from starlette.config import Config
-from starlette.datastructures import Secret
+from starlette.datastructures import CommaSeparatedStrings, Secret
 
 from core.logging import InterceptHandler
 
@@ -29,4 +29,40 @@ logger.configure(handlers=[{"sink": sys.stderr, "level": LOGGING_LEVEL}])
 
 MODEL_PATH = config("MODEL_PATH", default="./ml/model/")
 MODEL_NAME = config("MODEL_NAME", default="model.pkl")
+MODELS: CommaSeparatedStrings = config("MODELS", cast=CommaSeparatedStrings, default="")
+SHADOW_MODEL: str = config("SHADOW_MODEL", default="")
+SHADOW_SAMPLE_RATE: float = config("SHADOW_SAMPLE_RATE", cast=float, default=1.0)
+SHADOW_MAX_PENDING: int = config("SHADOW_MAX_PENDING", cast=int, default=64)
+MODEL_COMPILED: bool = config("MODEL_COMPILED", cast=bool, default=False)
+MODEL_PRELOAD: bool = config("MODEL_PRELOAD", cast=bool, default=False)
+MODEL_MMAP: bool = config("MODEL_MMAP", cast=bool, default=False)
+WEB_CONCURRENCY: int = config("WEB_CONCURRENCY", cast=int, default=2)
+MODEL_WATCH_INTERVAL: float = config("MODEL_WATCH_INTERVAL", cast=float, default=0)
+BATCHING_ENABLED: bool = config("BATCHING_ENABLED", cast=bool, default=False)
+BATCH_MAX_SIZE: int = config("BATCH_MAX_SIZE", cast=int, default=256)
+BATCH_MAX_WAIT_MS: float = config("BATCH_MAX_WAIT_MS", cast=float, default=2.0)
+PREDICTION_CACHE_SIZE: int = config("PREDICTION_CACHE_SIZE", cast=int, default=1024)
+PREDICTION_CACHE_TTL: float = config("PREDICTION_CACHE_TTL", cast=float, default=300)
+INFERENCE_EXECUTOR: str = config("INFERENCE_EXECUTOR", default="inline")
+INFERENCE_WORKERS: int = config("INFERENCE_WORKERS", cast=int, default=4)
+STREAM_CHUNK_SIZE: int = config("STREAM_CHUNK_SIZE", cast=int, default=1024)
+STREAM_MAX_LINE_BYTES: int = config("STREAM_MAX_LINE_BYTES", cast=int, default=65536)
+ADMISSION_QUEUE_SIZE: int = config("ADMISSION_QUEUE_SIZE", cast=int, default=16)
+ADMISSION_QUEUE_TIMEOUT: float = config("ADMISSION_QUEUE_TIMEOUT", cast=float, default=1.0)
+PREDICT_MAX_REQUESTS: int = config("PREDICT_MAX_REQUESTS", cast=int, default=64)
+PREDICT_MAX_ROWS: int = config("PREDICT_MAX_ROWS", cast=int, default=100000)
+PREDICT_ID_LIST_MAX_REQUESTS: int = config("PREDICT_ID_LIST_MAX_REQUESTS", cast=int, default=64)
+PREDICT_ID_LIST_MAX_ROWS: int = config("PREDICT_ID_LIST_MAX_ROWS", cast=int, default=100000)
+PREDICT_STREAM_MAX_REQUESTS: int = config("PREDICT_STREAM_MAX_REQUESTS", cast=int, default=16)
+HEALTH_CHECK_INTERVAL: float = config("HEALTH_CHECK_INTERVAL", cast=float, default=30)
 INPUT_EXAMPLE = config("INPUT_EXAMPLE", default="./ml/model/examples/example.json")
+TEST_DATA = config("TEST_DATA", default="data/test.csv")
+ROSTER_BACKEND: str = config("ROSTER_BACKEND", default="memory")
+ROSTER_DATABASE: str = config("ROSTER_DATABASE", default="data/passengers.sqlite")
+JOBS_DATABASE: str = config("JOBS_DATABASE", default="data/jobs.sqlite")
+JOB_CHUNK_SIZE: int = config("JOB_CHUNK_SIZE", cast=int, default=1024)
+JOB_PAGE_SIZE: int = config("JOB_PAGE_SIZE", cast=int, default=100)
+JOB_HEARTBEAT_INTERVAL: float = config("JOB_HEARTBEAT_INTERVAL", cast=float, default=10)
+JOB_RETENTION: float = config("JOB_RETENTION", cast=float, default=604800)
+COLUMNAR_VALIDATION: bool = config("COLUMNAR_VALIDATION", cast=bool, default=False)
+COLD_START_BUDGET: float = config("COLD_START_BUDGET", cast=float, default=5)
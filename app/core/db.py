@@ -0,0 +1,101 @@
+"""Bounded connection pool used from async code.
+"""
+import asyncio
+import os
+import threading
+from typing import Any, Callable, List
+
+from starlette.concurrency import run_in_threadpool
+
+
+class ConnectionPool(object):
+    """At most ``max_size`` connections, ``min_size`` of them opened up front.
+
+    Queries run on worker threads with a connection of their own, callers
+    wait for one when all are busy and a released connection is reused.
+    Connections are opened in the process that uses them, never inherited
+    across a fork.
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int, max_size: int) -> None:
+        if not 0 < max_size or min_size > max_size:
+            raise ValueError(
+                f"Pool needs 0 <= min_size <= max_size and max_size > 0, got {min_size} and {max_size}")
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pid = None
+        self._idle: List[Any] = []
+        # every connection opened in this process, idle or checked out
+        self._connections: List[Any] = []
+        self._lock = threading.Lock()
+        self._semaphore = None
+        self._closed = False
+
+    def _open(self) -> Any:
+        connection = self.connect()
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def _ensure_open(self) -> None:
+        if self._pid != os.getpid():
+            # connections of a parent process are left to it
+            self._pid = os.getpid()
+            self._connections, self._idle, self._closed = [], [], False
+            self._idle = [self._open() for _ in range(self.min_size)]
+            self._semaphore = asyncio.Semaphore(self.max_size)
+
+    def _acquire(self) -> Any:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._open()
+
+    def _release(self, connection: Any) -> None:
+        with self._lock:
+            if connection in self._connections:
+                if not self._closed:
+                    self._idle.append(connection)
+                    return
+                self._connections.remove(connection)
+        # the pool was closed while it was checked out
+        connection.close()
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Call ``func(connection, *args)`` on a worker thread.
+        """
+        self._ensure_open()
+        async with self._semaphore:
+            connection = self._acquire()
+            try:
+                return await run_in_threadpool(func, connection, *args)
+            finally:
+                self._release(connection)
+
+    def run_sync(self, func: Callable, *args: Any) -> Any:
+        """Call ``func(connection, *args)`` on the calling thread.
+
+        For occasional synchronous callers, it does not wait for the bound
+        ``run`` callers are held to.
+        """
+        self._ensure_open()
+        connection = self._acquire()
+        try:
+            return func(connection, *args)
+        finally:
+            self._release(connection)
+
+    @property
+    def size(self) -> int:
+        return len(self._connections)
+
+    def close(self) -> None:
+        """Close the idle connections now and the checked out ones once released."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._connections = [connection for connection in self._connections if connection not in idle]
+            self._closed = True
+        for connection in idle:
+            connection.close()
+        self._pid = None
@@ -6,3 +6,36 @@ class PredictException(BaseException):
 
 class ModelLoadException(BaseException):
     ...
+
+
+class PassengerNotFoundException(ValueError):
+    def __init__(self, missing_ids) -> None:
+        self.missing_ids = list(missing_ids)
+        super().__init__(f"Check IDs: {self.missing_ids}")
+
+
+class UnsupportedMediaTypeException(ValueError):
+    def __init__(self, media_type) -> None:
+        self.media_type = media_type
+        super().__init__(f"Unsupported media type: {media_type}")
+
+
+class ColumnValidationException(ValueError):
+    def __init__(self, errors) -> None:
+        self.errors = list(errors)
+        super().__init__("; ".join(
+            f"{error['loc'][-1]}: {error['msg']}" + (f" (rows {error['rows']})" if error["rows"] else "")
+            for error in self.errors))
+
+
+class OverloadedException(RuntimeError):
+    def __init__(self, route, retry_after) -> None:
+        self.route = route
+        self.retry_after = retry_after
+        super().__init__(f"Too much work in flight on {route}, retry after {retry_after}s")
+
+
+class UnknownModelException(ValueError):
+    def __init__(self, name, names) -> None:
+        self.name = name
+        super().__init__(f"Unknown model '{name}', serving {list(names)}")
@@ -6,14 +6,32 @@ Returns:
 from typing import Callable
 
 from fastapi import FastAPI
+from loguru import logger
 
 
 def preload_model():
     """In order to load model on memory to each worker
     """
+    from functools import partial
+
+    import joblib
+    from core.config import MODEL_MMAP
     from services.predict import MachineLearningModelHandlerScore
 
-    MachineLearningModelHandlerScore.get_model()
+    load_wrapper = partial(joblib.load, mmap_mode="r") if MODEL_MMAP else joblib.load
+    MachineLearningModelHandlerScore.get_model(load_wrapper)
+
+
+def preload_passenger_store():
+    """In order to index the passenger roster once per worker
+    """
+    import pandas as pd
+    from services.passengers import get_roster
+
+    try:
+        get_roster(load_wrapper=pd.read_csv)
+    except FileNotFoundError:
+        logger.warning("Passenger store not preloaded, it will load on first use.")
 
 
 def create_start_app_handler(app: FastAPI) -> Callable:
@@ -21,3 +39,77 @@ def create_start_app_handler(app: FastAPI) -> Callable:
         preload_model()
 
     return start_app
+
+
+def create_passenger_store_handler(app: FastAPI) -> Callable:
+    def start_app() -> None:
+        preload_passenger_store()
+
+    return start_app
+
+
+def create_model_watch_handler(app: FastAPI) -> Callable:
+    async def start_app() -> None:
+        import asyncio
+
+        import joblib
+        from core.config import MODEL_WATCH_INTERVAL
+        from core.executor import recycle_executor
+        from services.predict import watch_model
+
+        if MODEL_WATCH_INTERVAL > 0:
+            app.state.model_watcher = asyncio.create_task(
+                watch_model(MODEL_WATCH_INTERVAL, joblib.load, recycle_executor))
+
+    return start_app
+
+
+def create_job_runner_handler(app: FastAPI) -> Callable:
+    async def start_app() -> None:
+        import os
+
+        from api.routes.jobs import runner
+        from core.config import JOBS_DATABASE
+        from services.jobs import JobStore
+
+        # the runner's keeper fails the jobs of workers that stopped
+        if JobStore.store is not None or os.path.exists(JOBS_DATABASE):
+            runner.start()
+
+    return start_app
+
+
+def create_health_check_handler(app: FastAPI) -> Callable:
+    async def start_app() -> None:
+        import asyncio
+
+        from api.routes.predictor import self_test
+        from core.config import HEALTH_CHECK_INTERVAL
+
+        app.state.health_checker = asyncio.create_task(
+            self_test.run_forever(HEALTH_CHECK_INTERVAL))
+
+    return start_app
+
+
+def create_stop_app_handler(app: FastAPI) -> Callable:
+    def stop_app() -> None:
+        from api.routes.jobs import runner
+        from api.routes.predictor import shadow
+        from core.executor import shutdown_executor
+        from services.jobs import JobStore
+        from services.passengers import SqlitePassengerStore
+
+        for name in ("model_watcher", "health_checker"):
+            task = getattr(app.state, name, None)
+            if task is not None:
+                task.cancel()
+        runner.stop()
+        shutdown_executor()
+        if shadow is not None:
+            shadow.shutdown(wait=False)
+        for store in (SqlitePassengerStore.store, JobStore.store):
+            if store is not None:
+                store.close()
+
+    return stop_app
@@ -0,0 +1,81 @@
+"""Executors used to keep blocking work off the event loop.
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from core.config import INFERENCE_EXECUTOR, INFERENCE_WORKERS
+
+EXECUTORS = ("inline", "thread", "process")
+
+_executor: Optional[Executor] = None
+
+
+def get_executor() -> Optional[Executor]:
+    """Return the inference executor, creating it on first use.
+    """
+    global _executor
+    if INFERENCE_EXECUTOR not in EXECUTORS:
+        raise ValueError(
+            f"INFERENCE_EXECUTOR must be one of {EXECUTORS}, got '{INFERENCE_EXECUTOR}'")
+    if _executor is None and INFERENCE_EXECUTOR == "thread":
+        _executor = ThreadPoolExecutor(
+            max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+    elif _executor is None and INFERENCE_EXECUTOR == "process":
+        _executor = ProcessPoolExecutor(max_workers=INFERENCE_WORKERS)
+    return _executor
+
+
+async def run_inference(func: Callable, *args: Any) -> Any:
+    """Run a model call on the configured inference executor.
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args))
+
+
+def uses_processes() -> bool:
+    """Whether model calls run in child processes that share nothing with this one.
+    """
+    return INFERENCE_EXECUTOR == "process"
+
+
+def run_inference_sync(func: Callable, *args: Any) -> Any:
+    """Run a model call on the configured inference executor from a thread
+    that may block waiting for it, such as the shadow model's.
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    return executor.submit(func, *args).result()
+
+
+async def run_io(func: Callable, *args: Any) -> Any:
+    """Run blocking file I/O, on a worker thread unless the executor is inline.
+    """
+    if INFERENCE_EXECUTOR == "inline":
+        return func(*args)
+    return await run_in_threadpool(func, *args)
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def recycle_executor() -> None:
+    """Replace the process pool so new workers load the active model.
+
+    Work already submitted to the previous pool still runs to completion.
+    """
+    global _executor
+    if INFERENCE_EXECUTOR == "process" and _executor is not None:
+        previous, _executor = _executor, None
+        previous.shutdown(wait=False)
@@ -0,0 +1,180 @@
+"""Prometheus metrics.
+
+Metrics live in the memory of each worker process; every worker exposes
+its own values on /metrics. Histograms are only observed from the event
+loop. Worker threads do update some values: a gauge such as
+MODEL_LOAD_SECONDS is set with a single assignment, and callback metrics
+read counters, such as the prediction cache's, that their owners update
+under their own lock. So no locking is needed here.
+"""
+import bisect
+import contextvars
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (1, 2, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram(object):
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS) -> None:
+        self.name, self.help_text = name, help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket = _labels(self.label_names, labels, 'le="' + le + '"')
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class Gauge(object):
+    """Single value, or one per label values when ``labels`` are given.
+
+    With labels, ``callback`` returns a dict from label value tuples to values.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback: Optional[Callable[[], float]] = None,
+                 labels: Iterable[str] = ()) -> None:
+        self.name, self.help_text = name, help_text
+        self.callback = callback
+        self.label_names = tuple(labels)
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def samples(self) -> Iterable[str]:
+        value = self.callback() if self.callback else self.value
+        if not self.label_names:
+            yield f"{self.name} {_number(value)}"
+            return
+        for labels, sample in value.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(sample)}"
+
+
+class Counter(Gauge):
+    type = "counter"
+
+
+class Registry(object):
+    def __init__(self) -> None:
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+REQUEST_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "titanic_request_stage_seconds", "Time spent in each stage of a request.",
+    labels=("route", "stage")))
+REQUEST_ROWS = REGISTRY.register(Histogram(
+    "titanic_request_rows", "Rows scored per request.",
+    labels=("route",), buckets=ROWS_BUCKETS))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "titanic_requests_in_flight", "Requests being handled by this worker."))
+MODEL_LOAD_SECONDS = REGISTRY.register(Gauge(
+    "titanic_model_load_seconds", "Time spent loading the active model."))
+
+
+class StageTimer(object):
+    def __init__(self, route: str) -> None:
+        self.route = route
+        self.last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        REQUEST_STAGE_SECONDS.observe(now - self.last, self.route, stage)
+        self.last = now
+
+
+_timer: contextvars.ContextVar = contextvars.ContextVar("stage_timer", default=None)
+
+
+def mark(stage: str) -> None:
+    """Record the time since the previous mark of the current request as ``stage``.
+
+    The first mark of a request also covers what ran before the endpoint, such
+    as FastAPI parsing a declared body.
+    """
+    timer = _timer.get()
+    if timer is not None:
+        timer.mark(stage)
+
+
+def observe_rows(rows: int) -> None:
+    timer = _timer.get()
+    if timer is not None:
+        REQUEST_ROWS.observe(rows, timer.route)
+
+
+class TimedRoute(APIRoute):
+    """Route that times the stages marked by its endpoint.
+
+    Whatever follows the last mark, mostly response serialization, is
+    recorded as the "serialization" stage.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route = self.name
+
+        async def timed_handler(request):
+            token = _timer.set(StageTimer(route))
+            REQUESTS_IN_FLIGHT.inc()
+            try:
+                response = await handler(request)
+                mark("serialization")
+                return response
+            finally:
+                REQUESTS_IN_FLIGHT.dec()
+                _timer.reset(token)
+
+        return timed_handler
@@ -1,3 +1,7 @@
+import base64
+import json
+
+
 def pagenation(
     page_number=1, page_size=20, total_count=0, data=None, start_page_as_1=True
 ):
@@ -33,3 +37,32 @@ def pagenation(
         "totalCount": total_count,
         "listings": data[begin:end],
     }
+
+
+def encode_cursor(key):
+    """Opaque cursor pointing after the row with ``key``."""
+    return base64.urlsafe_b64encode(json.dumps({"after": key}).encode()).decode()
+
+
+def decode_cursor(cursor, default=0):
+    """Key a cursor points after, ``default`` when there is no cursor."""
+    if not cursor:
+        return default
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))["after"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def keyset_page(rows, page_size=20, key=lambda row: row[0]):
+    """Return payload of one page read by key instead of offset.
+    rows are the (at most page_size + 1) rows following the cursor,
+    the extra row only tells whether another page exists.
+    """
+    listings = list(rows[:page_size])
+    next_cursor = encode_cursor(key(listings[-1])) if len(rows) > page_size else None
+    return {
+        "pageSize": page_size,
+        "nextCursor": next_cursor,
+        "listings": listings,
+    }
@@ -0,0 +1,49 @@
+"""Startup profiling
+"""
+import importlib
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Dict, Iterator
+
+from loguru import logger
+
+
+class StartupProfile(object):
+    """Wall time of each import and load step of a process start.
+
+    Imports are timed in the order they are made, so a module's time only
+    covers what earlier steps did not import already.
+    """
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def import_module(self, name: str) -> ModuleType:
+        with self.measure(f"import {name}"):
+            return importlib.import_module(name)
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
+
+    def report(self, budget: float = 0) -> str:
+        width = max((len(name) for name in self.timings), default=0)
+        lines = [f"{name:<{width}} {seconds * 1e3:>8.1f} ms"
+                 for name, seconds in self.timings.items()]
+        lines.append(f"{'total':<{width}} {self.total * 1e3:>8.1f} ms")
+        report = "\n".join(lines)
+        if budget and self.total > budget:
+            logger.warning(
+                f"Startup took {self.total:.2f}s, over its {budget:.2f}s budget:\n{report}")
+        else:
+            logger.info(f"Startup took {self.total:.2f}s:\n{report}")
+        return report
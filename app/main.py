@@ -1,16 +1,30 @@
 from fastapi import FastAPI
 
 from api.routes.api import router as api_router
-from core.events import create_start_app_handler
-from core.config import API_PREFIX, DEBUG, PROJECT_NAME, VERSION
+from api.routes.metrics import router as metrics_router
+from core.events import (create_health_check_handler,
+                         create_job_runner_handler,
+                         create_model_watch_handler,
+                         create_passenger_store_handler,
+                         create_start_app_handler, create_stop_app_handler)
+from core.config import API_PREFIX, DEBUG, MODEL_PRELOAD, PROJECT_NAME, VERSION
+from core.executor import uses_processes
 
 
 def get_application() -> FastAPI:
     application = FastAPI(title=PROJECT_NAME, debug=DEBUG, version=VERSION)
     application.include_router(api_router, prefix=API_PREFIX)
-    pre_load = False
+    application.include_router(metrics_router, tags=["metrics"])
+    application.add_event_handler(
+        "startup", create_passenger_store_handler(application))
+    application.add_event_handler("startup", create_model_watch_handler(application))
+    application.add_event_handler("startup", create_job_runner_handler(application))
+    application.add_event_handler("shutdown", create_stop_app_handler(application))
+    # with a process pool the parent still serves the version and the cache
+    pre_load = MODEL_PRELOAD or uses_processes()
     if pre_load:
         application.add_event_handler("startup", create_start_app_handler(application))
+    application.add_event_handler("startup", create_health_check_handler(application))
     return application
 
 
@@ -0,0 +1,46 @@
+"""AWS Lambda entry point.
+
+Lambda runs module level code once per execution environment, during the
+init phase. Everything the first request needs is imported, loaded and
+warmed up here, and each step's time is logged, so the first invocation
+costs as much as any other. Needs the optional aws dependency group:
+
+    poetry install --with aws
+
+and `main_aws_lambda.handler` as the function handler.
+"""
+from core.config import MODEL_NAME
+from core.startup import StartupProfile
+from ml.model.forest import FOREST_SUFFIX
+
+startup = StartupProfile()
+
+# Hot path dependencies first, so each module is timed on its own
+startup.import_module("numpy")
+joblib = startup.import_module("joblib")
+startup.import_module("fastapi")
+# Without the aws group there is no handler to deploy, fail the init phase
+Mangum = startup.import_module("mangum").Mangum
+if not MODEL_NAME.endswith(FOREST_SUFFIX):
+    # What unpickling model.pkl imports, a compact forest needs only NumPy
+    startup.import_module("sklearn.ensemble")
+main = startup.import_module("main")
+
+from core.config import COLD_START_BUDGET  # noqa: E402
+from ml.model.encoder import FeatureEncoder  # noqa: E402
+from services.encoder import FeatureEncoderHandler  # noqa: E402
+from services.predict import MachineLearningModelHandlerScore  # noqa: E402
+
+with startup.measure("load model"):
+    model = MachineLearningModelHandlerScore.get_model(joblib.load)
+with startup.measure("load encoder"):
+    FeatureEncoderHandler.get_encoder(FeatureEncoder.load)
+with startup.measure("warm up"):
+    MachineLearningModelHandlerScore.warm_up(model)
+
+app = main.app
+# Startup events run above instead; the background tasks they start
+# would be frozen between invocations anyway.
+handler = Mangum(app, lifespan="off")
+
+startup.report(budget=COLD_START_BUDGET)
@@ -1,9 +1,12 @@
-from typing import List
+from typing import List, Optional
 
-import numpy as np
-import pandas as pd
 from pydantic import BaseModel
 
+from ml.model.encoder import FeatureEncoder
+
+# Column order of the training schema, see ml/features/build_features.py
+FEATURE_COLUMNS = ["Pclass", "SibSp", "Parch", "Sex_female", "Sex_male"]
+
 
 class MachineLearningResponse(BaseModel):
     prediction: List[int]
@@ -13,6 +16,89 @@ class HealthResponse(BaseModel):
     status: bool
 
 
+class ReadinessResponse(BaseModel):
+    ready: bool
+    model_version: Optional[str] = None
+    loaded_at: Optional[float] = None
+    checked_at: Optional[float] = None
+    latency_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ModelVersionResponse(BaseModel):
+    version: Optional[str]
+    loaded_at: Optional[float]
+
+
+class ModelInfo(BaseModel):
+    name: str
+    file: str
+    version: Optional[str]
+    loaded_at: Optional[float]
+
+
+class ModelsResponse(BaseModel):
+    models: List[ModelInfo]
+    shadow: Optional[str] = None
+
+
+class ShadowMetricsResponse(BaseModel):
+    enabled: bool
+    model: Optional[str] = None
+    pending: int = 0
+    requests: int = 0
+    rows: int = 0
+    disagreements: int = 0
+    disagreement_rate: float = 0.0
+    errors: int = 0
+    dropped: int = 0
+    primary_seconds_mean: float = 0.0
+    shadow_seconds_mean: float = 0.0
+
+
+class CacheMetricsResponse(BaseModel):
+    enabled: bool
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+class BatchingMetricsResponse(BaseModel):
+    enabled: bool
+    batches: int
+    requests: int
+    rows: int
+    last_batch_size: int
+    largest_batch_size: int
+    queue_delay_seconds_total: float
+    queue_delay_seconds_max: float
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    total: int
+    done: int
+    error: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+
+
+class JobResult(BaseModel):
+    row: int
+    passenger_id: Optional[int] = None
+    prediction: int
+
+
+class JobResultsResponse(BaseModel):
+    job_id: str
+    status: str
+    results: List[JobResult]
+    next_cursor: Optional[str] = None
+
+
 class MachineLearningDataInput(BaseModel):
     Pclass: List[int]
     SibSp: List[int]
@@ -20,16 +106,25 @@ class MachineLearningDataInput(BaseModel):
     Sex: List[str]
 
     def get_dataframe(self):
+        import numpy as np
+        import pandas as pd
+
+        sex = np.asarray(self.Sex)
         return pd.DataFrame(
             {
                 "Pclass": self.Pclass,
                 "SibSp": self.SibSp,
                 "Parch": self.Parch,
-                "Sex_female": np.array(self.Sex) == 'female',
-                "Sex_male": np.array(self.Sex) == 'male'
+                "Sex_female": sex == 'female',
+                "Sex_male": sex == 'male'
             }
         )
 
+    def get_array(self, encoder: FeatureEncoder):
+        """Contiguous float32 feature matrix laid out as ``encoder.columns``.
+        """
+        return encoder.transform(self.model_dump())
+
 
 class MachineLearningDataInputList(BaseModel):
     PassengerId: List[int]
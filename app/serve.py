@@ -0,0 +1,117 @@
+"""Preforked production server.
+
+The model and the passenger roster are loaded once in the master process,
+the heap is frozen so the garbage collector does not write to the shared
+pages, then the workers are forked with everything already resident.
+
+    PYTHONPATH=app/:. python app/serve.py --workers 4
+"""
+import gc
+import os
+import signal
+import socket
+
+import click
+import uvicorn
+from loguru import logger
+
+from core.config import WEB_CONCURRENCY
+from core.events import preload_model, preload_passenger_store
+
+
+def private_memory(pid="self") -> int:
+    """Private (not shared with other processes) memory of ``pid`` in bytes.
+    """
+    total = 0
+    with open(f"/proc/{pid}/smaps_rollup", "r") as file:
+        for line in file:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1]) * 1024
+    return total
+
+
+def preload() -> None:
+    """Load everything the workers should share, then freeze the heap.
+    """
+    preload_model()
+    preload_passenger_store()
+    import main  # noqa: F401, so that the application is imported before forking
+
+    gc.collect()
+    gc.freeze()
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket) -> None:
+    from main import app
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_config=None))
+    server.run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock)
+        except BaseException:
+            logger.exception("Worker crashed.")
+            code = 1
+        finally:
+            os._exit(code)
+    logger.info(f"Started worker {pid}.")
+    return pid
+
+
+def serve(host: str, port: int, workers: int) -> None:
+    preload()
+    sock = bind_socket(host, port)
+    children = {spawn_worker(sock) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"Serving on {host}:{port} with {workers} preforked workers.")
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning(f"Worker {pid} exited, starting a new one.")
+            children.add(spawn_worker(sock))
+    sock.close()
+
+
+@click.command()
+@click.option("--host", default="0.0.0.0", help="Bind address.")
+@click.option("--port", default=8080, help="Bind port.")
+@click.option("--workers", default=WEB_CONCURRENCY, help="Number of worker processes.")
+def main(host, port, workers):
+    """Runs the preforked server.
+    """
+    serve(host, port, workers)
+
+
+if __name__ == "__main__":
+
+    # pylint: disable = no-value-for-paramete
+    main()
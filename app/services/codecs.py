@@ -0,0 +1,101 @@
+from importlib import import_module
+from typing import Dict, Optional
+
+import numpy as np
+
+from core.errors import UnsupportedMediaTypeException
+
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+ALIASES = {"application/x-msgpack": MSGPACK}
+BINARY = (ARROW, MSGPACK)
+
+
+def media_type(header: Optional[str]) -> str:
+    """Media type of a Content-Type or Accept entry, without parameters."""
+    media = (header or "").split(";")[0].strip().lower()
+    return ALIASES.get(media, media)
+
+
+def _quality(entry: str) -> float:
+    for parameter in entry.split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate(accept: Optional[str], content_type: str) -> str:
+    """Response media type: the supported type with the highest ``q`` in Accept.
+
+    Ties go to the type listed first and ``q=0`` excludes a type. A wildcard
+    answers in the format the body came in, as does a missing Accept; JSON
+    is the fallback when nothing supported is accepted.
+    """
+    default = content_type if content_type in BINARY else JSON
+    entries = [(media_type(entry), _quality(entry)) for entry in (accept or "").split(",")]
+    excluded = {media for media, quality in entries if quality <= 0}
+    best, best_quality = None, 0.0
+    for media, quality in entries:
+        if media in ("", "*/*", "application/*"):
+            media = next((supported for supported in (default, JSON) + BINARY if supported not in excluded), None)
+        if media in (JSON,) + BINARY and media not in excluded and quality > best_quality:
+            best, best_quality = media, quality
+    return best or JSON
+
+
+def _import(name: str, media: str):
+    """Codec packages are optional, without one its media type is unsupported."""
+    try:
+        return import_module(name)
+    except ImportError:
+        raise UnsupportedMediaTypeException(f"{media} (needs {name.split('.')[0]})") from None
+
+
+def _arrow_to_numpy(column) -> np.ndarray:
+    # A single chunk of primitive values without nulls is viewed, not copied
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=False)
+    return column.to_numpy()
+
+
+def decode_columns(body: bytes, content_type: str) -> Dict[str, np.ndarray]:
+    """NumPy columns of an Arrow IPC stream or a MessagePack map of lists.
+
+    Raises:
+        UnsupportedMediaTypeException: for other media types or when the
+            optional codec package is not installed.
+    """
+    if content_type == ARROW:
+        pa = _import("pyarrow", content_type)
+        ipc = _import("pyarrow.ipc", content_type)
+        table = ipc.open_stream(pa.py_buffer(body)).read_all()
+        return {name: _arrow_to_numpy(table.column(name)) for name in table.column_names}
+    if content_type == MSGPACK:
+        msgpack = _import("msgpack", content_type)
+        return {name: np.asarray(values) for name, values in msgpack.unpackb(body).items()}
+    raise UnsupportedMediaTypeException(content_type)
+
+
+def encode_prediction(prediction: np.ndarray, accept: str) -> bytes:
+    """Predictions as an int64 buffer: an Arrow IPC stream with one
+    ``prediction`` column, or a MessagePack map holding the raw
+    little-endian bytes under ``prediction`` and their ``dtype``.
+    """
+    prediction = np.ascontiguousarray(prediction, dtype="<i8")
+    if accept == ARROW:
+        pa = _import("pyarrow", accept)
+        ipc = _import("pyarrow.ipc", accept)
+        table = pa.table({"prediction": pa.array(prediction)})
+        sink = pa.BufferOutputStream()
+        with ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if accept == MSGPACK:
+        msgpack = _import("msgpack", accept)
+        return msgpack.packb({"prediction": prediction.tobytes(), "dtype": prediction.dtype.str})
+    raise UnsupportedMediaTypeException(accept)
@@ -0,0 +1,81 @@
+import itertools
+import sys
+
+import numpy as np
+from loguru import logger
+
+from ml.model.forest import FEATURE_DOMAIN
+
+
+def is_dataframe(input) -> bool:
+    # Nothing can be a DataFrame before pandas is imported, so don't import it
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(input, pd.DataFrame)
+
+
+class CompiledModel(object):
+    """Model evaluated once over its whole input domain.
+
+    Predictions for in-domain rows are a single gather from a dense table,
+    rows outside of the domain fall back to the wrapped model.
+    """
+
+    def __init__(self, model, features, lows, table) -> None:
+        self.model = model
+        self.features = list(features)
+        self.lows = np.asarray(lows, dtype=np.int64)
+        self.table = table
+        self.shape = np.asarray(table.shape, dtype=np.int64)
+
+    @classmethod
+    def compile(cls, model, domain=FEATURE_DOMAIN):
+        features = list(getattr(model, "feature_names_in_", domain.keys()))
+        if set(features) != set(domain):
+            logger.warning(
+                f"Model features {features} do not match the declared domain, "
+                "serving without compilation.")
+            return model
+        ranges = [range(domain[f][0], domain[f][1] + 1) for f in features]
+        grid = np.array(list(itertools.product(*ranges)), dtype=np.int64)
+        table = model.predict(cls._as_model_input(model, grid, features))
+        table = np.asarray(table).reshape([len(r) for r in ranges])
+        logger.info(f"Compiled model over {table.size} input combinations.")
+        return cls(model, features, [r.start for r in ranges], table)
+
+    @staticmethod
+    def _as_model_input(model, values, features):
+        if hasattr(model, "feature_names_in_"):
+            import pandas as pd
+
+            return pd.DataFrame(values, columns=features)
+        return values
+
+    def _to_matrix(self, input):
+        if is_dataframe(input):
+            input = input[self.features].to_numpy()
+        return np.asarray(input)
+
+    def predict(self, input):
+        matrix = self._to_matrix(input)
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.features):
+            return self.model.predict(input)
+        codes = matrix.astype(np.int64) - self.lows
+        in_domain = ((codes >= 0) & (codes < self.shape)).all(axis=1)
+        in_domain &= (matrix == codes + self.lows).all(axis=1)
+        if in_domain.all():
+            return self.table[tuple(codes.T)]
+        prediction = np.empty(len(matrix), dtype=self.table.dtype)
+        prediction[in_domain] = self.table[tuple(codes[in_domain].T)]
+        fallback = ~in_domain
+        if is_dataframe(input):
+            rest = input[fallback]
+        else:
+            rest = self._as_model_input(
+                self.model, matrix[fallback], self.features)
+        prediction[fallback] = self.model.predict(rest)
+        return prediction
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
@@ -0,0 +1,37 @@
+import os
+
+from loguru import logger
+
+from core.config import MODEL_PATH
+from ml.model.encoder import ENCODER_NAME, FeatureEncoder
+
+
+class FeatureEncoderHandler(object):
+    """Feature encoder fitted in training and saved next to the model."""
+    encoder = None
+
+    @classmethod
+    def get_encoder(cls, load_wrapper=None):
+        if cls.encoder is None and load_wrapper:
+            cls.encoder = cls.load(load_wrapper)
+        return cls.encoder
+
+    @classmethod
+    def reload(cls, load_wrapper):
+        cls.encoder = cls.load(load_wrapper)
+        return cls.encoder
+
+    @staticmethod
+    def get_path():
+        return os.path.join(MODEL_PATH, ENCODER_NAME)
+
+    @classmethod
+    def load(cls, load_wrapper):
+        path = cls.get_path()
+        if not os.path.exists(path):
+            message = f"Feature encoder at {path} not exists!"
+            logger.error(message)
+            raise FileNotFoundError(message)
+        encoder = load_wrapper(path)
+        logger.info(f"Loaded feature encoder with columns {encoder.columns}.")
+        return encoder
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from loguru import logger
+
+from core.errors import ModelLoadException, PredictException
+
+
+class ModelSelfTest(object):
+    """Cached result of a model self-test refreshed in the background.
+
+    Probes read ``result`` instead of running a prediction, so their
+    frequency does not add load to the model.
+    """
+
+    def __init__(self, check, version=None) -> None:
+        self.check = check
+        self.version = version
+        self.result = None
+
+    @property
+    def ready(self) -> bool:
+        return self.result is not None and self.result["status"]
+
+    async def refresh(self) -> dict:
+        start = time.perf_counter()
+        error = None
+        try:
+            await self.check()
+        except (Exception, PredictException, ModelLoadException) as err:
+            error = f"{err}"
+            logger.error(f"Model self-test failed: {err}")
+        self.result = {
+            "status": error is None,
+            "model_version": self.version() if self.version else None,
+            "checked_at": time.time(),
+            "latency_seconds": time.perf_counter() - start,
+            "error": error,
+        }
+        return self.result
+
+    async def get(self) -> dict:
+        """Cached result, running the self-test only if there is none yet.
+        """
+        if self.result is None:
+            return await self.refresh()
+        return self.result
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(interval)
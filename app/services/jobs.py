@@ -0,0 +1,267 @@
+"""Batch prediction jobs scored in the background.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+from loguru import logger
+
+from core.config import MAX_CONNECTIONS_COUNT, MIN_CONNECTIONS_COUNT
+from core.db import ConnectionPool
+from core.errors import ModelLoadException, PredictException
+
+JOB_KINDS = ("predict", "predict_id_list")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,
+    total INTEGER NOT NULL, done INTEGER NOT NULL DEFAULT 0, error TEXT,
+    created_at REAL NOT NULL, finished_at REAL, owner TEXT, heartbeat REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT NOT NULL, row INTEGER NOT NULL, passenger_id INTEGER, prediction INTEGER NOT NULL,
+    PRIMARY KEY (job_id, row)
+) WITHOUT ROWID;
+"""
+JOB_COLUMNS = ["job_id", "kind", "status", "total",
+               "done", "error", "created_at", "finished_at"]
+
+
+class JobStore(object):
+    """Jobs and their predictions in a local SQLite database.
+
+    Results are keyed by ``(job_id, row)``, so a page is read with a keyset
+    query that seeks to the row after the cursor, however deep the page.
+    The database is shared by every worker, so any of them can answer for a
+    job another one is scoring. Each job is owned by the runner that queued
+    it, which renews its ``heartbeat``; unfinished jobs whose owner stopped
+    renewing are failed by the other runners.
+    """
+    store = None
+
+    def __init__(self, path: str, min_size: int = MIN_CONNECTIONS_COUNT,
+                 max_size: int = MAX_CONNECTIONS_COUNT) -> None:
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self.connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        self.pool = ConnectionPool(self.connect, min_size, max_size)
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+
+    @staticmethod
+    def _create(connection: sqlite3.Connection, job: dict) -> None:
+        with connection:
+            connection.execute(
+                f"INSERT INTO jobs ({', '.join(job)}) VALUES ({', '.join('?' * len(job))})", list(job.values()))
+
+    @staticmethod
+    def _update(connection: sqlite3.Connection, job_id: str, fields: dict) -> None:
+        with connection:
+            connection.execute(
+                f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE job_id = ?",
+                [*fields.values(), job_id])
+
+    @staticmethod
+    def _write(connection: sqlite3.Connection, job_id: str, start: int,
+               passenger_ids: Sequence[Optional[int]], predictions: Sequence[int]) -> None:
+        with connection:
+            connection.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?)",
+                ((job_id, start + offset, passenger_id, prediction)
+                 for offset, (passenger_id, prediction) in enumerate(zip(passenger_ids, predictions))))
+            connection.execute(
+                "UPDATE jobs SET done = done + ? WHERE job_id = ?", (len(predictions), job_id))
+
+    @staticmethod
+    def _renew(connection: sqlite3.Connection, owner: str) -> None:
+        with connection:
+            connection.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                (time.time(), owner))
+
+    @staticmethod
+    def _fail(connection: sqlite3.Connection, condition: str, args: Sequence[Any]) -> int:
+        with connection:
+            return connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Worker stopped', finished_at = ? "
+                f"WHERE status IN ('queued', 'running') AND {condition}", (time.time(), *args)).rowcount
+
+    @staticmethod
+    def _purge(connection: sqlite3.Connection, before: float) -> int:
+        with connection:
+            connection.execute(
+                "DELETE FROM results WHERE job_id IN (SELECT job_id FROM jobs WHERE finished_at < ?)", (before,))
+            return connection.execute("DELETE FROM jobs WHERE finished_at < ?", (before,)).rowcount
+
+    @staticmethod
+    def _get(connection: sqlite3.Connection, job_id: str) -> Optional[dict]:
+        row = connection.execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(zip(JOB_COLUMNS, row)) if row else None
+
+    @staticmethod
+    def _page(connection: sqlite3.Connection, job_id: str, after: int, limit: int) -> List[tuple]:
+        return connection.execute(
+            "SELECT row, passenger_id, prediction FROM results WHERE job_id = ? AND row > ? "
+            "ORDER BY row LIMIT ?", (job_id, after, limit)).fetchall()
+
+    async def create(self, kind: str, total: int, owner: Optional[str] = None) -> dict:
+        job = {"job_id": uuid.uuid4().hex, "kind": kind, "status": "queued",
+               "total": total, "done": 0, "created_at": time.time()}
+        await self.pool.run(self._create, {**job, "owner": owner, "heartbeat": job["created_at"]})
+        return {**job, "error": None, "finished_at": None}
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        await self.pool.run(self._update, job_id, fields)
+
+    async def write(self, job_id: str, start: int, passenger_ids: Sequence[Optional[int]],
+                    predictions: Sequence[int]) -> None:
+        await self.pool.run(self._write, job_id, start, passenger_ids, predictions)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.pool.run(self._get, job_id)
+
+    async def page(self, job_id: str, after: int, limit: int) -> List[tuple]:
+        """Up to ``limit`` result rows of a job after row ``after``, in row order.
+        """
+        return await self.pool.run(self._page, job_id, after, limit)
+
+    async def renew(self, owner: str) -> None:
+        """Mark the unfinished jobs of ``owner`` as still being worked on.
+        """
+        await self.pool.run(self._renew, owner)
+
+    async def expire(self, stale_before: float, finished_before: Optional[float] = None) -> None:
+        """Fail unfinished jobs last renewed before ``stale_before`` and delete
+        jobs, with their results, that finished before ``finished_before``.
+        """
+        failed = await self.pool.run(self._fail, "heartbeat < ?", (stale_before,))
+        if failed:
+            logger.warning(f"Failed {failed} jobs left unfinished by a stopped worker")
+        if finished_before is not None:
+            await self.pool.run(self._purge, finished_before)
+
+    def fail_owned(self, owner: str) -> int:
+        """Fail the queued and running jobs of ``owner``, from synchronous shutdown code.
+        """
+        return self.pool.run_sync(self._fail, "owner = ?", (owner,))
+
+    def close(self) -> None:
+        self.pool.close()
+
+    @classmethod
+    def get_store(cls, path: Optional[str] = None) -> "JobStore":
+        if cls.store is None and path:
+            cls.store = cls(path)
+        return cls.store
+
+
+def _rows(inputs: Any) -> int:
+    if isinstance(inputs, dict):
+        return max((len(column) for column in inputs.values()), default=0)
+    return len(inputs)
+
+
+def _slice(inputs: Any, start: int, stop: int) -> Any:
+    if isinstance(inputs, dict):
+        return {name: column[start:stop] for name, column in inputs.items()}
+    return inputs[start:stop]
+
+
+class BatchJobRunner(object):
+    """Scores queued jobs one after another, ``chunk_size`` rows at a time.
+
+    Every chunk's predictions are written to the store before the next is
+    scored, so neither the request nor the worker holds the whole result.
+    The worker task starts with ``start`` or the first job on the running
+    event loop, next to a keeper task that renews the runner's jobs every
+    ``heartbeat`` seconds. The keeper fails jobs that went unrenewed for
+    three heartbeats, queued inputs being lost with their worker, and
+    deletes jobs finished more than ``retention`` seconds ago (0 keeps them).
+    """
+
+    def __init__(self, get_store: Callable[[], JobStore],
+                 score: Callable[[str, Any], Awaitable[Sequence[int]]], chunk_size: int = 1024,
+                 heartbeat: float = 10, retention: float = 0) -> None:
+        self.get_store = get_store
+        self.score = score
+        self.chunk_size = chunk_size
+        self.heartbeat = heartbeat
+        self.retention = retention
+        self.owner = uuid.uuid4().hex
+        self.queue = None
+        self.task = None
+        self.keeper = None
+        self.loop = None
+
+    async def submit(self, kind: str, inputs: Any) -> dict:
+        """Record a job for ``inputs``, either passenger ids or feature columns, and queue it.
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Job kind must be one of {JOB_KINDS}, got '{kind}'")
+        job = await self.get_store().create(kind, _rows(inputs), self.owner)
+        self.start()
+        self.queue.put_nowait((job["job_id"], kind, inputs))
+        return job
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop, self.queue, self.task, self.keeper = loop, asyncio.Queue(), None, None
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.work())
+        if self.keeper is None or self.keeper.done():
+            self.keeper = loop.create_task(self.keep())
+
+    def stop(self) -> None:
+        """Cancel the tasks and fail the jobs they will not finish.
+        """
+        for task in (self.task, self.keeper):
+            if task is not None:
+                task.cancel()
+        self.task = self.keeper = None
+        if self.loop is not None:
+            self.get_store().fail_owned(self.owner)
+
+    async def keep(self) -> None:
+        while True:
+            store = self.get_store()
+            now = time.time()
+            try:
+                await store.renew(self.owner)
+                await store.expire(now - 3 * self.heartbeat,
+                                   now - self.retention if self.retention > 0 else None)
+            except sqlite3.Error as err:
+                logger.error(f"Job keeper failed: {err}")
+            await asyncio.sleep(self.heartbeat)
+
+    async def work(self) -> None:
+        while True:
+            job_id, kind, inputs = await self.queue.get()
+            await self.run(job_id, kind, inputs)
+
+    async def run(self, job_id: str, kind: str, inputs: Any) -> None:
+        store = self.get_store()
+        await store.update(job_id, status="running")
+        try:
+            for start in range(0, _rows(inputs), self.chunk_size):
+                chunk = _slice(inputs, start, start + self.chunk_size)
+                predictions = [int(prediction) for prediction in await self.score(kind, chunk)]
+                passenger_ids = chunk if kind == "predict_id_list" else [None] * len(predictions)
+                await store.write(job_id, start, passenger_ids, predictions)
+        except asyncio.CancelledError:
+            await store.update(job_id, status="failed", error="Worker stopped", finished_at=time.time())
+            raise
+        except (Exception, PredictException, ModelLoadException) as err:
+            logger.error(f"Job {job_id} failed: {err}")
+            await store.update(job_id, status="failed", error=f"{err}", finished_at=time.time())
+        else:
+            await store.update(job_id, status="succeeded", finished_at=time.time())
@@ -0,0 +1,173 @@
+import os
+import sqlite3
+from typing import TYPE_CHECKING, List
+
+from loguru import logger
+
+from core.config import (MAX_CONNECTIONS_COUNT, MIN_CONNECTIONS_COUNT, ROSTER_BACKEND,
+                         ROSTER_DATABASE, TEST_DATA)
+from core.db import ConnectionPool
+from core.errors import PassengerNotFoundException
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PASSENGER_ID = "PassengerId"
+PASSENGER_FEATURES = ["Pclass", "Sex", "SibSp", "Parch"]
+ROSTER_BACKENDS = ("memory", "sqlite")
+# stays below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+QUERY_BATCH_SIZE = 900
+
+
+def _missing(ids, positions) -> List[int]:
+    return [ids[i] for i in (positions < 0).nonzero()[0]]
+
+
+class PassengerStore(object):
+    """Passenger roster kept in memory and indexed by PassengerId.
+
+    The roster is read once and only the columns needed by the model are
+    kept, so a batch of ids is resolved with a single hash lookup.
+    """
+    store = None
+
+    def __init__(self, data: "pd.DataFrame") -> None:
+        import pandas as pd
+
+        data = data.drop_duplicates(subset=PASSENGER_ID, keep="first")
+        self.index = pd.Index(data[PASSENGER_ID].to_numpy())
+        self.features = data[PASSENGER_FEATURES].reset_index(drop=True)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def lookup(self, ids) -> "pd.DataFrame":
+        """Return the feature rows of ``ids`` in request order.
+
+        Raises:
+            PassengerNotFoundException: with every id that is not in the roster.
+        """
+        positions = self.index.get_indexer(ids)
+        if (positions < 0).any():
+            raise PassengerNotFoundException(_missing(ids, positions))
+        return self.features.take(positions).reset_index(drop=True)
+
+    async def fetch(self, ids) -> "pd.DataFrame":
+        return self.lookup(ids)
+
+    def close(self) -> None:
+        pass
+
+    @classmethod
+    def get_store(cls, load_wrapper=None):
+        if cls.store is None and load_wrapper:
+            cls.store = cls(cls.load(load_wrapper))
+        return cls.store
+
+    @staticmethod
+    def load(load_wrapper):
+        if not os.path.exists(TEST_DATA):
+            message = f"Passenger data at {TEST_DATA} not exists!"
+            logger.error(message)
+            raise FileNotFoundError(message)
+        data = load_wrapper(TEST_DATA)
+        logger.info(f"Loaded {len(data)} passengers from {TEST_DATA}.")
+        return data
+
+
+class SqlitePassengerStore(object):
+    """Passenger roster in a local SQLite database keyed by PassengerId.
+
+    Only the requested rows are read, with ``IN (...)`` queries of at most
+    ``QUERY_BATCH_SIZE`` ids, on connections from a bounded pool so a burst
+    of large id lists cannot open more than ``max_size`` connections.
+    """
+    store = None
+
+    def __init__(self, path: str, min_size: int = MIN_CONNECTIONS_COUNT,
+                 max_size: int = MAX_CONNECTIONS_COUNT) -> None:
+        self.path = path
+        self.pool = ConnectionPool(self.connect, min_size, max_size)
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+
+    def __len__(self) -> int:
+        return self.pool.run_sync(
+            lambda connection: connection.execute("SELECT COUNT(*) FROM passengers").fetchone()[0])
+
+    @staticmethod
+    def build(data: "pd.DataFrame", path: str) -> None:
+        """Write the roster to ``path``, replacing it atomically.
+        """
+        data = data.drop_duplicates(subset=PASSENGER_ID, keep="first")
+        columns = [PASSENGER_ID] + PASSENGER_FEATURES
+        temporary = f"{path}.{os.getpid()}.tmp"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with sqlite3.connect(temporary) as connection:
+            connection.execute(
+                "CREATE TABLE passengers (PassengerId INTEGER PRIMARY KEY, "
+                "Pclass INTEGER, Sex TEXT, SibSp INTEGER, Parch INTEGER)")
+            connection.executemany(
+                "INSERT INTO passengers VALUES (?, ?, ?, ?, ?)",
+                data[columns].astype(object).itertuples(index=False, name=None))
+        connection.close()
+        os.replace(temporary, path)
+        logger.info(f"Wrote {len(data)} passengers to {path}.")
+
+    @staticmethod
+    def query(connection: sqlite3.Connection, ids: List[int]) -> list:
+        unique = list(dict.fromkeys(ids))
+        rows = []
+        for start in range(0, len(unique), QUERY_BATCH_SIZE):
+            batch = unique[start:start + QUERY_BATCH_SIZE]
+            rows += connection.execute(
+                f"SELECT PassengerId, Pclass, Sex, SibSp, Parch FROM passengers "
+                f"WHERE PassengerId IN ({', '.join('?' * len(batch))})", batch).fetchall()
+        return rows
+
+    async def fetch(self, ids) -> "pd.DataFrame":
+        """Return the feature rows of ``ids`` in request order.
+
+        Raises:
+            PassengerNotFoundException: with every id that is not in the roster.
+        """
+        import pandas as pd
+
+        rows = await self.pool.run(self.query, [int(id) for id in ids])
+        data = pd.DataFrame.from_records(
+            rows, columns=[PASSENGER_ID] + PASSENGER_FEATURES)
+        positions = pd.Index(data[PASSENGER_ID]).get_indexer(ids)
+        if (positions < 0).any():
+            raise PassengerNotFoundException(_missing(ids, positions))
+        return data[PASSENGER_FEATURES].take(positions).reset_index(drop=True)
+
+    def close(self) -> None:
+        self.pool.close()
+
+    @staticmethod
+    def is_stale(path: str) -> bool:
+        """Whether the database at ``path`` is missing or older than TEST_DATA."""
+        if not os.path.exists(path):
+            return True
+        return os.path.exists(TEST_DATA) and os.path.getmtime(TEST_DATA) > os.path.getmtime(path)
+
+    @classmethod
+    def get_store(cls, load_wrapper=None):
+        if cls.store is None and load_wrapper:
+            if cls.is_stale(ROSTER_DATABASE):
+                cls.build(PassengerStore.load(load_wrapper), ROSTER_DATABASE)
+            cls.store = cls(ROSTER_DATABASE)
+        return cls.store
+
+
+def get_roster(load_wrapper=None):
+    """Get the passenger roster of the configured ``ROSTER_BACKEND``.
+    """
+    if ROSTER_BACKEND not in ROSTER_BACKENDS:
+        raise ValueError(
+            f"ROSTER_BACKEND must be one of {ROSTER_BACKENDS}, got '{ROSTER_BACKEND}'")
+    if ROSTER_BACKEND == "sqlite":
+        return SqlitePassengerStore.get_store(load_wrapper)
+    return PassengerStore.get_store(load_wrapper)
@@ -1,17 +1,86 @@
+import asyncio
+import hashlib
+import inspect
 import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
 
+import numpy as np
 from loguru import logger
+from starlette.concurrency import run_in_threadpool
 
 from core.errors import PredictException, ModelLoadException
-from core.config import MODEL_NAME, MODEL_PATH
+from core.config import MODEL_COMPILED, MODEL_NAME, MODEL_PATH
+from core.metrics import MODEL_LOAD_SECONDS
+from ml.model.encoder import FeatureEncoder
+from ml.model.forest import FOREST_SUFFIX, CompactForest
+from services.compiled import CompiledModel
+from services.encoder import FeatureEncoderHandler
+
+
+def ignore_feature_names_warning() -> None:
+    """Silence sklearn's warning about the unlabelled matrix ``call_matrix``
+    sends, which is already laid out as the training schema.
+
+    Installed once at import: ``catch_warnings`` around every call would swap
+    the process-wide filters, which is not thread-safe.
+    """
+    warnings.filterwarnings("ignore", message="X does not have valid feature names",
+                            category=UserWarning, module=r"sklearn\..*")
+
+
+ignore_feature_names_warning()
 
 
 class MachineLearningModelHandlerScore(object):
     model = None
+    version = None
+    loaded_at = None
+    model_name = None
+    _reload_lock = threading.Lock()
+    # held only while the model and its version are swapped or read together
+    _swap_lock = threading.Lock()
+
+    @classmethod
+    def named(cls, model_name):
+        """Handler with its own model, version and lock for ``model_name`` in MODEL_PATH.
+        """
+        return type(cls.__name__, (cls,), {
+            "model": None, "version": None, "loaded_at": None,
+            "model_name": model_name, "_reload_lock": threading.Lock(),
+            "_swap_lock": threading.Lock()})
 
     @classmethod
     def predict(cls, input, load_wrapper=None, method="predict"):
         clf = cls.get_model(load_wrapper)
+        return cls.call(clf, input, method)
+
+    @classmethod
+    def predict_matrix(cls, matrix, features, load_wrapper=None, method="predict"):
+        """Predict a feature matrix whose columns are laid out as ``features``.
+        """
+        clf = cls.get_model(load_wrapper)
+        return cls.call_matrix(clf, matrix, features, method)
+
+    @classmethod
+    def call_matrix(cls, clf, matrix, features, method="predict"):
+        """Call ``clf`` on a feature matrix whose columns are laid out as ``features``.
+
+        The matrix goes straight to the model when its columns match the
+        training schema, otherwise it is labelled and sent as a DataFrame.
+        """
+        names = getattr(clf, "feature_names_in_", None)
+        if names is not None and list(names) != list(features):
+            import pandas as pd
+
+            matrix = pd.DataFrame(matrix, columns=features)[list(names)]
+            return cls.call(clf, matrix, method)
+        return cls.call(clf, matrix, method)
+
+    @staticmethod
+    def call(clf, input, method="predict"):
         if hasattr(clf, method):
             return getattr(clf, method)(input)
         raise PredictException(f"'{method}' attribute is missing")
@@ -19,23 +88,330 @@ class MachineLearningModelHandlerScore(object):
     @classmethod
     def get_model(cls, load_wrapper):
         if cls.model is None and load_wrapper:
-            cls.model = cls.load(load_wrapper)
+            start = time.perf_counter()
+            version = cls.get_version()
+            model = cls.load(load_wrapper)
+            model = CompiledModel.compile(model) if MODEL_COMPILED else model
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+            with cls._swap_lock:
+                cls.model, cls.version = model, version
+            cls.loaded_at = time.time()
+            logger.info(f"Model version {version} is now active.")
         return cls.model
 
+    @classmethod
+    def get_active(cls, load_wrapper):
+        """The model and the version it was loaded as, loading it on first use.
+
+        Both are read together, so a concurrent reload never pairs one
+        model's predictions with the other's version.
+        """
+        cls.get_model(load_wrapper)
+        with cls._swap_lock:
+            return cls.model, cls.version
+
+    @classmethod
+    def reload(cls, load_wrapper):
+        """Load, warm up and swap in the model currently on disk.
+
+        Requests already holding the previous model finish on it; the swap
+        is a single reference assignment.
+        """
+        with cls._reload_lock:
+            model, version = cls.prepare(load_wrapper)
+            cls.activate(model, version)
+            return version
+
+    @classmethod
+    def prepare(cls, load_wrapper):
+        """Load and warm up the model currently on disk without serving it.
+
+        Returns:
+            the model and its version, for ``activate``.
+        """
+        version = cls.get_version()
+        start = time.perf_counter()
+        model = cls.load(load_wrapper)
+        if MODEL_COMPILED:
+            model = CompiledModel.compile(model)
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+        cls.warm_up(model)
+        return model, version
+
+    @classmethod
+    def activate(cls, model, version):
+        with cls._swap_lock:
+            cls.model, cls.version = model, version
+        cls.loaded_at = time.time()
+        logger.info(f"Model version {version} is now active.")
+
     @staticmethod
-    def load(load_wrapper):
-        model = None
+    def warm_up(model):
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None:
+            import pandas as pd
+
+            model.predict(pd.DataFrame(np.zeros((1, len(names))), columns=names))
+
+    @classmethod
+    def get_path(cls):
+        model_name = cls.model_name or MODEL_NAME
         if MODEL_PATH.endswith("/"):
-            path = f"{MODEL_PATH}{MODEL_NAME}"
-        else:
-            path = f"{MODEL_PATH}/{MODEL_NAME}"
+            return f"{MODEL_PATH}{model_name}"
+        return f"{MODEL_PATH}/{model_name}"
+
+    @classmethod
+    def get_version(cls):
+        """Short content hash of the model file, or of every file of an
+        exported forest, None if it does not exist.
+        """
+        path = cls.get_path()
+        if not os.path.exists(path):
+            return None
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))] \
+            if os.path.isdir(path) else [path]
+        digest = hashlib.sha256()
+        for file_name in files:
+            with open(file_name, "rb") as file:
+                for chunk in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()[:12]
+
+    @classmethod
+    def load(cls, load_wrapper):
+        model = None
+        path = cls.get_path()
         if not os.path.exists(path):
             message = f"Machine learning model at {path} not exists!"
             logger.error(message)
             raise FileNotFoundError(message)
-        model = load_wrapper(path)
+        if path.rstrip("/").endswith(FOREST_SUFFIX):
+            # memory-mapped arrays, neither unpickling nor sklearn needed
+            model = CompactForest.load(path)
+        else:
+            model = load_wrapper(path)
         if not model:
             message = f"Model {model} could not load!"
             logger.error(message)
             raise ModelLoadException(message)
         return model
+
+
+_artifacts_lock = threading.Lock()
+
+
+def reload_artifacts(handlers, load_wrapper, encoder_wrapper=FeatureEncoder.load):
+    """Load the feature encoder and the models of ``handlers``, then swap them all in.
+
+    Nothing is swapped unless everything loaded, so the encoder is never
+    paired with a model it was not saved with.
+    """
+    with _artifacts_lock:
+        encoder = FeatureEncoderHandler.load(encoder_wrapper)
+        loaded = [(handler, handler.prepare(load_wrapper)) for handler in handlers]
+        FeatureEncoderHandler.encoder = encoder
+        for handler, (model, version) in loaded:
+            handler.activate(model, version)
+
+
+def _mtimes(paths):
+    return [os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in paths]
+
+
+async def watch_model(interval, load_wrapper, on_reload=None) -> None:
+    """Reload the model and the feature encoder whenever either file changes on disk.
+
+    The files are polled every ``interval`` seconds and both are reloaded
+    together. A failed reload keeps the active ones and is retried on the
+    next poll.
+    """
+    paths = [MachineLearningModelHandlerScore.get_path(), FeatureEncoderHandler.get_path()]
+    last_seen = _mtimes(paths)
+    while True:
+        await asyncio.sleep(interval)
+        mtimes = _mtimes(paths)
+        if None in mtimes or mtimes == last_seen:
+            continue
+        try:
+            await run_in_threadpool(
+                reload_artifacts, [MachineLearningModelHandlerScore], load_wrapper)
+        except (Exception, PredictException, ModelLoadException) as err:
+            logger.error(f"Model reload failed: {err}")
+            continue
+        last_seen = mtimes
+        if on_reload is not None:
+            on_reload()
+
+
+class MicroBatchDispatcher(object):
+    """Merge concurrent prediction requests into a single model call.
+
+    Requests are queued on the running event loop; a batch is closed when it
+    holds ``max_batch_size`` rows or ``max_wait_ms`` passed since its first
+    request, then the predictions are scattered back to each caller. An
+    optional ``runner`` coroutine function runs the model call off the loop,
+    and ``predict`` may itself be a coroutine function.
+    With ``versioned``, ``predict`` returns ``(prediction, version)`` and
+    each caller gets its part together with the version. With ``timed``,
+    each caller also gets its row share of the model call's seconds, the
+    time it waited for the batch to close left out.
+    """
+
+    def __init__(self, predict, max_batch_size=256, max_wait_ms=2.0, runner=None, versioned=False,
+                 timed=False) -> None:
+        self.predict = predict
+        self.runner = runner
+        self.versioned = versioned
+        self.timed = timed
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = {
+            "batches": 0,
+            "requests": 0,
+            "rows": 0,
+            "last_batch_size": 0,
+            "largest_batch_size": 0,
+            "queue_delay_seconds_total": 0.0,
+            "queue_delay_seconds_max": 0.0,
+        }
+        self._loop = None
+        self._queue = None
+        self._worker = None
+
+    async def submit(self, data_point):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((data_point, future, time.perf_counter()))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(item)
+                rows += len(item[0])
+            await self._dispatch(batch, rows)
+
+    async def _dispatch(self, batch, rows) -> None:
+        now = time.perf_counter()
+        delays = [now - enqueued for _, _, enqueued in batch]
+        self.metrics["batches"] += 1
+        self.metrics["requests"] += len(batch)
+        self.metrics["rows"] += rows
+        self.metrics["last_batch_size"] = rows
+        self.metrics["largest_batch_size"] = max(
+            self.metrics["largest_batch_size"], rows)
+        self.metrics["queue_delay_seconds_total"] += sum(delays)
+        self.metrics["queue_delay_seconds_max"] = max(
+            self.metrics["queue_delay_seconds_max"], max(delays))
+        try:
+            parts = [data for data, _, _ in batch]
+            if isinstance(parts[0], np.ndarray):
+                data = np.concatenate(parts)
+            else:
+                import pandas as pd
+
+                data = pd.concat(parts, ignore_index=True)
+            start = time.perf_counter()
+            if self.runner is None:
+                prediction = self.predict(data)
+                if inspect.isawaitable(prediction):
+                    prediction = await prediction
+            else:
+                prediction = await self.runner(self.predict, data)
+            seconds = time.perf_counter() - start
+            if self.versioned:
+                prediction, version = prediction
+            prediction = np.asarray(prediction)
+            offsets = np.cumsum([len(data) for data, _, _ in batch])[:-1]
+            for (_, future, _), part in zip(batch, np.split(prediction, offsets)):
+                result = (part, version) if self.versioned else (part,)
+                if self.timed:
+                    result += (seconds * len(part) / rows,)
+                if not future.done():
+                    future.set_result(result if len(result) > 1 else part)
+        except (Exception, PredictException, ModelLoadException) as err:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(err)
+        finally:
+            # never leave a caller waiting, even if the worker itself is going away
+            for _, future, _ in batch:
+                if not future.done():
+                    future.cancel()
+
+
+class PredictionCache(object):
+    """Bounded LRU cache of predictions with a time to live.
+
+    Keys are the rows of the feature matrix, which already hold normalized
+    values in a fixed column order. Rows are deduplicated within a batch,
+    only the unique misses go to the model, and the whole cache is dropped
+    when the model version changes.
+    """
+
+    def __init__(self, max_size=1024, ttl=300.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = None
+        self.entries = OrderedDict()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.metrics["size"] = 0
+
+    def predict(self, matrix, predict, version=None):
+        unique, inverse = np.unique(matrix, axis=0, return_inverse=True)
+        keys = [row.tobytes() for row in unique]
+        values = [None] * len(keys)
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            if version != self.version:
+                self.entries.clear()
+                self.metrics["size"] = 0
+                self.version = version
+            for i, key in enumerate(keys):
+                entry = self.entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self.entries.move_to_end(key)
+                    values[i] = entry[0]
+                else:
+                    missing.append(i)
+            self.metrics["hits"] += len(keys) - len(missing)
+            self.metrics["misses"] += len(missing)
+        if missing:
+            prediction = predict(unique[missing])
+            expires_at = time.monotonic() + self.ttl
+            with self._lock:
+                for i, value in zip(missing, prediction):
+                    values[i] = value
+                    # a newer model took over while predicting, keep its entries clean
+                    if version == self.version:
+                        self.entries[keys[i]] = (value, expires_at)
+                        self.entries.move_to_end(keys[i])
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                    self.metrics["evictions"] += 1
+                self.metrics["size"] = len(self.entries)
+        return np.asarray(values)[inverse.reshape(-1)]
@@ -0,0 +1,50 @@
+from typing import Dict, Iterable, List
+
+from core.errors import UnknownModelException
+
+DEFAULT_MODEL = "default"
+
+
+def parse_models(entries: Iterable[str]) -> Dict[str, str]:
+    """``name=file`` entries of the MODELS setting as a dict.
+
+    Raises:
+        ValueError: if an entry is not ``name=file`` or reuses a name.
+    """
+    models = {}
+    for entry in entries:
+        name, separator, file = (part.strip() for part in entry.partition("="))
+        if not separator or not name or not file:
+            raise ValueError(f"MODELS entries must look like name=file, got '{entry}'")
+        if name in models or name == DEFAULT_MODEL:
+            raise ValueError(f"Model name '{name}' is used twice")
+        models[name] = file
+    return models
+
+
+class ModelRegistry(object):
+    """Named models served side by side by this process.
+
+    ``default`` is the MODEL_NAME model, every other name gets its own
+    handler class, so each model loads, reloads and reports its version
+    independently.
+    """
+
+    def __init__(self, default, models: Dict[str, str]) -> None:
+        self.handlers = {DEFAULT_MODEL: default}
+        self.handlers.update({name: default.named(file) for name, file in models.items()})
+
+    def get(self, name: str = DEFAULT_MODEL):
+        """Handler of ``name``.
+
+        Raises:
+            UnknownModelException: if no model is registered as ``name``.
+        """
+        handler = self.handlers.get(name)
+        if handler is None:
+            raise UnknownModelException(name, self.names)
+        return handler
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.handlers)
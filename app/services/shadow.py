@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import numpy as np
+from loguru import logger
+
+from core.errors import ModelLoadException, PredictException
+
+
+class ShadowEvaluator(object):
+    """Replays live requests on a candidate model off the request path.
+
+    ``submit`` only hands the request's feature matrix and prediction to a
+    background thread, which predicts it again with the candidate and
+    records how often the two disagree and how long each took. ``predict``
+    runs on that thread, so only the shadow call itself is timed. When
+    ``max_pending`` comparisons are already waiting, new ones are dropped
+    rather than queued, so a slow candidate never builds up a backlog.
+    """
+
+    def __init__(self, predict: Callable[[np.ndarray], Any], sample_rate: float = 1.0,
+                 max_pending: int = 64, workers: int = 1) -> None:
+        self.predict = predict
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.workers = workers
+        self.pending = 0
+        self.metrics = {
+            "requests": 0,
+            "rows": 0,
+            "disagreements": 0,
+            "errors": 0,
+            "dropped": 0,
+            "primary_seconds_total": 0.0,
+            "shadow_seconds_total": 0.0,
+        }
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, matrix: np.ndarray, prediction: Any, seconds: float) -> bool:
+        """Queue a comparison with the primary ``prediction`` that took ``seconds``.
+        """
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.metrics["dropped"] += 1
+                return False
+            self.pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="shadow")
+        self._executor.submit(self._compare, matrix, np.asarray(prediction), seconds)
+        return True
+
+    def _compare(self, matrix: np.ndarray, prediction: np.ndarray, seconds: float) -> None:
+        start = time.perf_counter()
+        try:
+            shadow = np.asarray(self.predict(matrix))
+            elapsed = time.perf_counter() - start
+            disagreements = int((shadow != prediction).sum())
+        except (Exception, PredictException, ModelLoadException) as err:
+            logger.error(f"Shadow prediction failed: {err}")
+            with self._lock:
+                self.metrics["errors"] += 1
+        else:
+            with self._lock:
+                self.metrics["requests"] += 1
+                self.metrics["rows"] += len(prediction)
+                self.metrics["disagreements"] += disagreements
+                self.metrics["primary_seconds_total"] += seconds
+                self.metrics["shadow_seconds_total"] += elapsed
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            metrics = dict(self.metrics)
+        requests = metrics["requests"]
+        return {
+            **metrics,
+            "disagreement_rate": metrics["disagreements"] / metrics["rows"] if metrics["rows"] else 0.0,
+            "primary_seconds_mean": metrics["primary_seconds_total"] / requests if requests else 0.0,
+            "shadow_seconds_mean": metrics["shadow_seconds_total"] / requests if requests else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,87 @@
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+import numpy as np
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from core.errors import ModelLoadException, PredictException
+
+
+async def iter_records(chunks: AsyncIterator[bytes], max_line_bytes: int = 65536) -> AsyncIterator[Dict]:
+    """Decode NDJSON records as the body chunks arrive.
+
+    Only the current partial line is buffered, and a line longer than
+    ``max_line_bytes`` raises ValueError instead of growing the buffer.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines + [buffer]:
+            if len(line) > max_line_bytes:
+                raise ValueError(f"NDJSON line longer than {max_line_bytes} bytes")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+async def predict_ndjson(
+    chunks: AsyncIterator[bytes],
+    to_matrix: Callable[[List[Dict]], np.ndarray],
+    predict: Callable[[np.ndarray], Awaitable[np.ndarray]],
+    chunk_size: int = 1024,
+    max_line_bytes: int = 65536,
+) -> AsyncIterator[bytes]:
+    """Score an NDJSON stream in chunks of ``chunk_size`` records.
+
+    Records are only read while the response is consumed, so a slow client
+    holds back the upload instead of growing memory. An invalid or too long
+    record ends the stream with an error line giving the index of the first
+    record of the failing chunk; predictions of earlier chunks are already
+    sent. A client disconnect ends the stream without writing to it.
+    """
+    records = []
+    first = 0
+    try:
+        async for record in iter_records(chunks, max_line_bytes):
+            records.append(record)
+            if len(records) >= chunk_size:
+                yield await _score(records, to_matrix, predict)
+                first += len(records)
+                records = []
+        if records:
+            yield await _score(records, to_matrix, predict)
+    except ClientDisconnect:
+        raise
+    except (Exception, PredictException, ModelLoadException) as err:
+        error = {"error": f"{err}", "chunk_start": first}
+        yield (json.dumps(error) + "\n").encode()
+
+
+async def _score(records, to_matrix, predict) -> bytes:
+    prediction = await predict(to_matrix(records))
+    return "".join(
+        f'{{"prediction":{int(value)}}}\n' for value in np.asarray(prediction)
+    ).encode()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """Streaming response that can be produced while the request body is read.
+
+    StreamingResponse also listens for the client disconnect on ``receive``,
+    which would take the body messages the generator is reading. Here a
+    disconnect surfaces as ClientDisconnect from the request stream instead.
+    The background task runs however the stream ends, so it can release
+    what the route held for it.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        finally:
+            if self.background is not None:
+                await self.background()
@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.errors import ColumnValidationException
+
+# Accepted (lowest, highest) value of the integer input columns, None is unbounded
+INTEGER_RANGES = {
+    "Pclass": (1, 3),
+    "SibSp": (0, None),
+    "Parch": (0, None),
+}
+# Offending row indices listed per error, the count is always exact
+MAX_REPORTED_ROWS = 100
+
+
+def _error(kind: str, column: str, msg: str, rows: Sequence[int] = ()) -> Dict[str, Any]:
+    rows = np.asarray(rows, dtype=np.int64)
+    return {"type": kind, "loc": ("body", column), "msg": msg,
+            "rows": rows[:MAX_REPORTED_ROWS].tolist(), "count": int(len(rows))}
+
+
+def _as_array(values: Any, text: bool = False) -> np.ndarray:
+    if text and not isinstance(values, np.ndarray):
+        # Keeps the decoded str objects, much cheaper than copying them to unicode
+        return np.asarray(values, dtype=object)
+    try:
+        return np.asarray(values)
+    except ValueError:
+        # Ragged nested lists
+        return np.asarray(values, dtype=object)
+
+
+def _integers(name: str, raw: Any, values: np.ndarray, low: Optional[int], high: Optional[int]) -> Tuple[Optional[np.ndarray], List[dict]]:
+    if values.dtype.kind in "iu":
+        integers = values.astype(np.int64, copy=False)
+    elif values.dtype.kind == "f":
+        bad = np.flatnonzero(~np.isfinite(values) | (values != np.round(values)))
+        if len(bad):
+            return None, [_error("int_from_float", name, "Input should be a valid integer", bad)]
+        integers = values.astype(np.int64)
+    else:
+        # Mixed, missing or text values, only then is each element visited
+        bad = np.flatnonzero([not isinstance(value, (int, np.integer)) or isinstance(value, bool)
+                              for value in raw])
+        return None, [_error("int_type", name, "Input should be a valid integer", bad)]
+
+    errors = []
+    if low is not None and len(bad := np.flatnonzero(integers < low)):
+        errors.append(_error("greater_than_equal", name,
+                      f"Input should be greater than or equal to {low}", bad))
+    if high is not None and len(bad := np.flatnonzero(integers > high)):
+        errors.append(_error("less_than_equal", name,
+                      f"Input should be less than or equal to {high}", bad))
+    return integers, errors
+
+
+def _categories(name: str, values: np.ndarray, categories: List[str]) -> List[dict]:
+    bad = np.flatnonzero(~np.isin(values, categories))
+    if len(bad):
+        return [_error("enum", name, f"Input should be one of {categories}", bad)]
+    return []
+
+
+def validate_columns(columns: Mapping[str, Any], categorical: Mapping[str, List[str]]) -> Dict[str, np.ndarray]:
+    """Check whole input columns with vectorized NumPy operations.
+
+    Every column is checked for its type, the integer columns against
+    INTEGER_RANGES and the categorical ones against the categories the
+    encoder was fitted on, and all of them for equal length.
+
+    Args:
+        columns (Mapping[str, Any]): column name to list or NumPy array.
+        categorical (Mapping[str, List[str]]): accepted categories per column.
+
+    Raises:
+        ColumnValidationException: with one structured error per failed
+            check, naming the offending row indices.
+
+    Returns:
+        Dict[str, np.ndarray]: int64 and string columns ready to encode.
+    """
+    if not isinstance(columns, Mapping):
+        raise ColumnValidationException(
+            [_error("dict_type", "__root__", "Input should be a valid dictionary")])
+
+    names = list(INTEGER_RANGES) + list(categorical)
+    errors = [_error("missing", name, "Field required")
+              for name in names if name not in columns]
+    arrays = {name: _as_array(columns[name], text=name in categorical)
+              for name in names if name in columns}
+    for name, values in list(arrays.items()):
+        if values.ndim != 1:
+            errors.append(_error("list_type", name, "Input should be a valid list"))
+            del arrays[name]
+
+    lengths = {name: len(values) for name, values in arrays.items()}
+    longest = max(lengths.values(), default=0)
+    for name, length in lengths.items():
+        if length < longest:
+            errors.append(_error("length", name,
+                          f"Column has {length} rows, expected {longest}", np.arange(length, longest)))
+
+    valid = {}
+    for name, values in arrays.items():
+        if name in INTEGER_RANGES:
+            valid[name], column_errors = _integers(
+                name, columns[name], values, *INTEGER_RANGES[name])
+        else:
+            valid[name], column_errors = values, _categories(name, values, categorical[name])
+        errors.extend(column_errors)
+
+    if errors:
+        raise ColumnValidationException(errors)
+    return valid
@@ -0,0 +1,66 @@
+"""Benchmark of the feature encoding step alone.
+
+Compares ``pd.get_dummies`` on a DataFrame reindexed to the training layout
+with ``FeatureEncoder.transform`` on the same columnar input.
+
+    python benchmarks/bench_encoder.py
+"""
+import sys
+import timeit
+
+import click
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+
+from ml.model.encoder import FeatureEncoder  # noqa: E402
+
+ENCODER = FeatureEncoder.load("ml/model/encoder.json")
+
+
+def make_columns(size: int, seed: int = 2024) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "Pclass": rng.integers(1, 4, size).tolist(),
+        "SibSp": rng.integers(0, 9, size).tolist(),
+        "Parch": rng.integers(0, 10, size).tolist(),
+        "Sex": rng.choice(["female", "male"], size).tolist(),
+    }
+
+
+def dummies_path(columns: dict) -> np.ndarray:
+    frame = pd.get_dummies(pd.DataFrame(columns))
+    return frame.reindex(columns=ENCODER.columns, fill_value=0).to_numpy(np.float32)
+
+
+def encoder_path(columns: dict) -> np.ndarray:
+    return ENCODER.transform(columns)
+
+
+def best_of(func, columns: dict, repeat: int) -> float:
+    number = max(1, 1000 // len(columns["Sex"]))
+    times = timeit.repeat(lambda: func(columns), repeat=repeat, number=number)
+    return min(times) / number
+
+
+@click.command()
+@click.option("--sizes", default="1,100,100000", help="Comma separated batch sizes.")
+@click.option("--repeat", default=5, help="Timing repetitions per measure.")
+def main(sizes, repeat):
+    """Runs the feature encoding benchmark.
+    """
+    print(f"{'batch':>8} {'get_dummies ms':>15} {'encoder ms':>11} {'speedup':>8}")
+    for size in [int(s) for s in sizes.split(",")]:
+        columns = make_columns(size)
+        np.testing.assert_array_equal(
+            dummies_path(columns), encoder_path(columns))
+        dummies = best_of(dummies_path, columns, repeat)
+        encoder = best_of(encoder_path, columns, repeat)
+        print(f"{size:>8} {dummies * 1e3:>15.3f} {encoder * 1e3:>11.3f} {dummies / encoder:>7.2f}x")
+
+
+if __name__ == "__main__":
+
+    # pylint: disable = no-value-for-paramete
+    main()
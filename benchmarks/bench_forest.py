@@ -0,0 +1,83 @@
+"""Benchmark of the compact forest against the pickled sklearn model.
+
+Reports artifact size, load time in a fresh interpreter (imports included,
+as on a cold start) and prediction latency per batch size.
+
+    python benchmarks/bench_forest.py
+"""
+import os
+import subprocess
+import sys
+import timeit
+
+import click
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+
+from ml.model.forest import CompactForest, forest_name  # noqa: E402
+
+LOAD_PICKLE = "import joblib; joblib.load({path!r})"
+LOAD_FOREST = "from ml.model.forest import CompactForest; CompactForest.load({path!r})"
+
+
+def size_of(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def cold_load(statement: str, repeat: int) -> float:
+    """Best wall time of ``statement`` in a new interpreter, startup excluded."""
+    code = ("import time, warnings; warnings.simplefilter('ignore'); start = time.perf_counter(); "
+            f"{statement}; print(time.perf_counter() - start)")
+    return min(float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                    check=True, env={**os.environ, "PYTHONPATH": "."}).stdout)
+               for _ in range(repeat))
+
+
+def make_matrix(size: int, seed: int = 2024) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    sex = rng.integers(0, 2, size)
+    return np.column_stack([rng.integers(1, 4, size), rng.integers(0, 9, size),
+                            rng.integers(0, 10, size), sex, 1 - sex]).astype(np.float32)
+
+
+def best_of(func, matrix: np.ndarray, repeat: int) -> float:
+    number = max(1, 1000 // len(matrix))
+    times = timeit.repeat(lambda: func(matrix), repeat=repeat, number=number)
+    return min(times) / number
+
+
+@click.command()
+@click.option("--model", "model_file", default="ml/model/model.pkl", help="Pickled forest, exported next to it.")
+@click.option("--sizes", default="1,100,10000", help="Comma separated batch sizes.")
+@click.option("--repeat", default=5, help="Timing repetitions per measure.")
+def main(model_file, sizes, repeat):
+    """Runs the compact forest benchmark.
+    """
+    forest_file = os.path.join(os.path.dirname(model_file), forest_name(os.path.basename(model_file)))
+    model, forest = joblib.load(model_file), CompactForest.load(forest_file)
+    features = list(model.feature_names_in_)
+
+    print(f"{'artifact':>8} {'size KiB':>9} {'cold load ms':>13}")
+    for name, path, statement in [("pickle", model_file, LOAD_PICKLE), ("forest", forest_file, LOAD_FOREST)]:
+        print(f"{name:>8} {size_of(path) / 1024:>9.1f} "
+              f"{cold_load(statement.format(path=path), repeat) * 1e3:>13.1f}")
+
+    print(f"{'batch':>8} {'sklearn ms':>11} {'forest ms':>10} {'speedup':>8}")
+    for size in [int(s) for s in sizes.split(",")]:
+        matrix = make_matrix(size)
+        frame = pd.DataFrame(matrix, columns=features)
+        np.testing.assert_array_equal(model.predict(frame), forest.predict(matrix))
+        sklearn = best_of(lambda _: model.predict(frame), matrix, repeat)
+        compact = best_of(forest.predict, matrix, repeat)
+        print(f"{size:>8} {sklearn * 1e3:>11.3f} {compact * 1e3:>10.3f} {sklearn / compact:>7.2f}x")
+
+
+if __name__ == "__main__":
+
+    # pylint: disable = no-value-for-paramete
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark of the request body to prediction paths.
+
+Compares the DataFrame path (``get_dataframe`` + ``predict``) with the
+columnar fast path (``get_array`` + ``predict_matrix``).
+
+    python benchmarks/bench_input_paths.py
+"""
+import sys
+import timeit
+
+import click
+import joblib
+import numpy as np
+
+sys.path.append(".")
+sys.path.append("./app")
+
+from ml.model.encoder import FeatureEncoder  # noqa: E402
+from models.prediction import MachineLearningDataInput  # noqa: E402
+from services.predict import MachineLearningModelHandlerScore  # noqa: E402
+
+
+ENCODER = FeatureEncoder.load("ml/model/encoder.json")
+
+
+def make_input(size: int, seed: int = 2024) -> MachineLearningDataInput:
+    rng = np.random.default_rng(seed)
+    return MachineLearningDataInput(
+        Pclass=rng.integers(1, 4, size).tolist(),
+        SibSp=rng.integers(0, 9, size).tolist(),
+        Parch=rng.integers(0, 10, size).tolist(),
+        Sex=rng.choice(["female", "male"], size).tolist(),
+    )
+
+
+def dataframe_path(data_input: MachineLearningDataInput):
+    return MachineLearningModelHandlerScore.predict(
+        data_input.get_dataframe(), load_wrapper=joblib.load)
+
+
+def array_path(data_input: MachineLearningDataInput):
+    return MachineLearningModelHandlerScore.predict_matrix(
+        data_input.get_array(ENCODER), ENCODER.columns, load_wrapper=joblib.load)
+
+
+def best_of(func, data_input, repeat: int) -> float:
+    number = max(1, 1000 // len(data_input.Sex))
+    times = timeit.repeat(lambda: func(data_input), repeat=repeat, number=number)
+    return min(times) / number
+
+
+@click.command()
+@click.option("--sizes", default="1,100,100000", help="Comma separated batch sizes.")
+@click.option("--repeat", default=5, help="Timing repetitions per measure.")
+def main(sizes, repeat):
+    """Runs the input path benchmark.
+    """
+    print(f"{'batch':>8} {'dataframe ms':>14} {'array ms':>10} {'speedup':>8}")
+    for size in [int(s) for s in sizes.split(",")]:
+        data_input = make_input(size)
+        np.testing.assert_array_equal(
+            dataframe_path(data_input), array_path(data_input))
+        frame = best_of(dataframe_path, data_input, repeat)
+        array = best_of(array_path, data_input, repeat)
+        print(f"{size:>8} {frame * 1e3:>14.3f} {array * 1e3:>10.3f} {frame / array:>7.2f}x")
+
+
+if __name__ == "__main__":
+
+    # pylint: disable = no-value-for-paramete
+    main()
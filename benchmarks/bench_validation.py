@@ -0,0 +1,56 @@
+"""Benchmark of request body validation up to the feature matrix.
+
+Compares pydantic validation of ``MachineLearningDataInput`` followed by
+``get_array`` with the columnar ``validate_columns`` followed by the encoder,
+on the same JSON-decoded columns.
+
+    python benchmarks/bench_validation.py
+"""
+import sys
+import timeit
+
+import click
+import numpy as np
+
+sys.path.append(".")
+sys.path.append("./app")
+
+from bench_encoder import ENCODER, make_columns  # noqa: E402
+from models.prediction import MachineLearningDataInput  # noqa: E402
+from services.validation import validate_columns  # noqa: E402
+
+
+def pydantic_path(columns: dict):
+    return MachineLearningDataInput(**columns).get_array(ENCODER)
+
+
+def columnar_path(columns: dict):
+    return ENCODER.transform(validate_columns(columns, ENCODER.categorical))
+
+
+def best_of(func, columns: dict, repeat: int) -> float:
+    number = max(1, 1000 // len(columns["Sex"]))
+    times = timeit.repeat(lambda: func(columns), repeat=repeat, number=number)
+    return min(times) / number
+
+
+@click.command()
+@click.option("--sizes", default="1,100,100000", help="Comma separated batch sizes.")
+@click.option("--repeat", default=5, help="Timing repetitions per measure.")
+def main(sizes, repeat):
+    """Runs the validation benchmark.
+    """
+    print(f"{'batch':>8} {'pydantic ms':>12} {'columnar ms':>12} {'speedup':>8}")
+    for size in [int(s) for s in sizes.split(",")]:
+        columns = make_columns(size)
+        np.testing.assert_array_equal(
+            pydantic_path(columns), columnar_path(columns))
+        pydantic = best_of(pydantic_path, columns, repeat)
+        columnar = best_of(columnar_path, columns, repeat)
+        print(f"{size:>8} {pydantic * 1e3:>12.3f} {columnar * 1e3:>12.3f} {pydantic / columnar:>7.2f}x")
+
+
+if __name__ == "__main__":
+
+    # pylint: disable = no-value-for-paramete
+    main()
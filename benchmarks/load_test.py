@@ -0,0 +1,186 @@
+"""HTTP load test of the prediction API.
+
+Replays prediction payloads at a fixed concurrency, either in-process
+through httpx's ASGI transport or against a running server, and reports
+throughput and latency percentiles.
+
+    python benchmarks/load_test.py --batch-sizes 1,100 --concurrency 8
+    python benchmarks/load_test.py --server --output results.json
+    python benchmarks/load_test.py --baseline baseline.json --threshold 0.2
+"""
+import asyncio
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import click
+import httpx
+import numpy as np
+
+sys.path.append("./app")
+
+FIELDS = ["Pclass", "SibSp", "Parch", "Sex"]
+
+
+def read_rows(payload_file: str) -> List[Dict]:
+    """Passenger rows from a JSON request body or a JSON lines file of bodies."""
+    with open(payload_file, "r") as file:
+        if payload_file.endswith(".jsonl"):
+            bodies = [json.loads(line) for line in file if line.strip()]
+        else:
+            bodies = [json.load(file)]
+    rows = []
+    for body in bodies:
+        if all(field in body for field in FIELDS):
+            rows.extend(dict(zip(FIELDS, values)) for values in zip(*[body[f] for f in FIELDS]))
+    if not rows:
+        raise click.UsageError(f"No prediction payloads with {FIELDS} in {payload_file}.")
+    return rows
+
+
+def make_bodies(rows: List[Dict], batch_size: int, count: int = 8) -> List[Dict]:
+    """``count`` request bodies of ``batch_size`` rows cycling over ``rows``."""
+    cycle = itertools.cycle(rows)
+    bodies = []
+    for _ in range(count):
+        batch = [next(cycle) for _ in range(batch_size)]
+        bodies.append({field: [row[field] for row in batch] for field in FIELDS})
+    return bodies
+
+
+async def run_load(client: httpx.AsyncClient, path: str, bodies: List[Dict], concurrency: int, requests: int) -> Dict:
+    latencies, errors = [], 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while (index := next(counter)) < requests:
+            start = time.perf_counter()
+            response = await client.post(path, json=bodies[index % len(bodies)])
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def find_regressions(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Scenarios slower than ``baseline`` by more than ``threshold`` (0.2 = 20%)."""
+    if results["target"] != baseline["target"]:
+        raise click.UsageError(
+            f"Baseline was measured against {baseline['target']}, not {results['target']}.")
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {result['throughput_rps']:.1f} < {base['throughput_rps']:.1f} rps")
+        if result["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p99 {result['p99_ms']:.2f} > {base['p99_ms']:.2f} ms")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: {result['errors']} errors")
+    return regressions
+
+
+def start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", "app",
+         "--port", str(port), "--log-level", "warning"])
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/v1/live").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def benchmark(url: Optional[str], path: str, rows: List[Dict], batch_sizes: List[int], concurrency: int, requests: int, warmup: int) -> Dict:
+    if url is None:
+        from main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    else:
+        limits = httpx.Limits(max_connections=concurrency)
+        client = httpx.AsyncClient(base_url=url, limits=limits, timeout=60)
+    scenarios = {}
+    async with client:
+        for batch_size in batch_sizes:
+            bodies = make_bodies(rows, batch_size)
+            await run_load(client, path, bodies, 1, warmup)
+            name = f"{path} batch={batch_size} concurrency={concurrency}"
+            scenarios[name] = await run_load(client, path, bodies, concurrency, requests)
+            click.echo(f"{name}: " + ", ".join(
+                f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in scenarios[name].items()))
+    return {
+        "target": url or "in-process",
+        "python": platform.python_version(),
+        "created_at": time.time(),
+        "scenarios": scenarios,
+    }
+
+
+@click.command()
+@click.option("--url", default=None, help="Server to load, in-process ASGI app when omitted.")
+@click.option("--server", is_flag=True, help="Start a local uvicorn server to load.")
+@click.option("--port", default=8765, help="Port of the local uvicorn server.")
+@click.option("--path", default="/api/v1/predict", help="Prediction route.")
+@click.option("--payload", default="ml/model/examples/example.json", help="JSON body or JSON lines file of bodies.")
+@click.option("--batch-sizes", default="1,100", help="Comma separated rows per request.")
+@click.option("--concurrency", default=8, help="Concurrent clients.")
+@click.option("--requests", default=500, help="Requests per scenario.")
+@click.option("--warmup", default=20, help="Unmeasured requests per scenario.")
+@click.option("--output", default=None, help="Write the results to this JSON file.")
+@click.option("--baseline", default=None, help="Fail when slower than these stored results.")
+@click.option("--threshold", default=0.2, help="Allowed relative regression against the baseline.")
+def main(url, server, port, path, payload, batch_sizes, concurrency, requests, warmup, output, baseline, threshold):
+    """Runs the HTTP load test.
+    """
+    process = start_server(port) if server else None
+    if process is not None:
+        url = f"http://127.0.0.1:{port}"
+    try:
+        results = asyncio.run(benchmark(
+            url, path, read_rows(payload), [int(b) for b in batch_sizes.split(",")],
+            concurrency, requests, warmup))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+    if baseline:
+        with open(baseline, "r") as file:
+            regressions = find_regressions(results, json.load(file), threshold)
+        for regression in regressions:
+            click.echo(f"REGRESSION {regression}", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+
+    # pylint: disable = no-value-for-paramete
+    main()
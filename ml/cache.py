@@ -0,0 +1,115 @@
+import hashlib
+import inspect
+import json
+import os
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import joblib
+from loguru import logger
+
+
+def file_hash(path: str) -> str:
+    """sha256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hash(module: ModuleType) -> str:
+    """sha256 of a module's source, so editing a stage invalidates its cache."""
+    return file_hash(inspect.getsourcefile(module))
+
+
+class StageCache:
+    """Skips a stage when an artifact for the same inputs and parameters exists.
+
+    A stage's fingerprint hashes its name, the fingerprints of its inputs (file
+    hashes, source hashes or upstream stage fingerprints) and its parameters,
+    so a change anywhere upstream invalidates everything downstream of it.
+    Files a stage writes are stored with its result and written back when
+    the stage is skipped.
+    """
+
+    def __init__(self, path: str = "data/cache", force: bool = False) -> None:
+        self.path = path
+        self.force = force
+        self.results = {}
+
+    @staticmethod
+    def fingerprint(name: str, inputs: Iterable[str], params: Dict[str, Any]) -> str:
+        payload = json.dumps({"name": name, "inputs": list(inputs), "params": params},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def prefix(name: str) -> str:
+        return name.replace("[", "-").replace("]", "") + "-"
+
+    def artifact(self, name: str, fingerprint: str) -> str:
+        return os.path.join(self.path, f"{self.prefix(name)}{fingerprint}.joblib")
+
+    def save(self, name: str, fingerprint: str, value: Any, outputs: Sequence[str] = ()) -> None:
+        """Store ``value`` with the content of the ``outputs`` files and drop the stage's older artifacts."""
+        os.makedirs(self.path, exist_ok=True)
+        artifact = self.artifact(name, fingerprint)
+        for file in os.listdir(self.path):
+            if file.startswith(self.prefix(name)) and os.path.join(self.path, file) != artifact:
+                os.remove(os.path.join(self.path, file))
+        contents = []
+        for path in outputs:
+            with open(path, "rb") as file:
+                contents.append(file.read())
+        joblib.dump({"value": value, "outputs": contents}, artifact)
+
+    @staticmethod
+    def restore(outputs: Sequence[str], contents: List[bytes]) -> None:
+        """Write back the stored outputs that are missing or changed on disk."""
+        for path, content in zip(outputs, contents):
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    if file.read() == content:
+                        continue
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(content)
+
+    def run(self, name: str, inputs: Iterable[str], params: Dict[str, Any], func: Callable[[], Any],
+            valid: Optional[Callable[[Any], bool]] = None, outputs: Sequence[str] = ()) -> Tuple[Any, str]:
+        """Returns the stage's output and its fingerprint, running ``func`` on a cache miss.
+
+        Args:
+            name (str): stage name, unique within the pipeline.
+            inputs (Iterable[str]): fingerprints of everything the stage reads.
+            params (Dict[str, Any]): JSON serializable stage parameters.
+            func (Callable[[], Any]): runs the stage, its result is cached.
+            valid (Optional[Callable[[Any], bool]]): rejects a cached result
+                whose side effects are gone, e.g. deleted output files.
+            outputs (Sequence[str]): files the stage writes, restored on a
+                cache hit.
+        """
+        fingerprint = self.fingerprint(name, inputs, params)
+        artifact = self.artifact(name, fingerprint)
+        if not self.force and os.path.exists(artifact):
+            stored = joblib.load(artifact)
+            # artifacts of older versions hold the bare value and no outputs
+            if isinstance(stored, dict) and set(stored) == {"value", "outputs"} \
+                    and len(stored["outputs"]) == len(outputs) and (valid is None or valid(stored["value"])):
+                self.restore(outputs, stored["outputs"])
+                logger.info(f"Stage {name} is cached ({fingerprint}).")
+                self.results[name] = True
+                return stored["value"], fingerprint
+
+        value = func()
+        self.save(name, fingerprint, value, outputs)
+        self.results[name] = False
+        return value, fingerprint
+
+    def summary(self) -> str:
+        width = max((len(name) for name in self.results), default=0)
+        lines = [f"{name:<{width}}  {'cached' if cached else 'ran'}"
+                 for name, cached in self.results.items()]
+        skipped = sum(self.results.values())
+        return "\n".join([f"{skipped}/{len(self.results)} stages cached:"] + lines)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pandas as pd
+from loguru import logger
+
+FORMATS = ("csv", "parquet", "feather")
+
+
+def with_format(file_name: str, output_format: str) -> str:
+    """``file_name`` with the extension of ``output_format``."""
+    return f"{os.path.splitext(file_name)[0]}.{output_format}"
+
+
+def read_data(filepath: str, file_name: str) -> pd.DataFrame:
+    """Read a csv, parquet or feather file, chosen by its extension."""
+    path = os.path.join(filepath, file_name)
+    if file_name.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if file_name.endswith(".feather"):
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+
+def write_data(data: pd.DataFrame, filepath: str, file_name: str, output_format: str = "csv") -> str:
+    """Write ``data`` as ``output_format``, returns the written file name."""
+    if output_format not in FORMATS:
+        raise ValueError(f"output_format must be one of {FORMATS}, got '{output_format}'")
+    file_name = with_format(file_name, output_format)
+    path = os.path.join(filepath, file_name)
+    logger.info(f"Writing {path}.")
+    if output_format == "parquet":
+        data.to_parquet(path, index=False)
+    elif output_format == "feather":
+        data.reset_index(drop=True).to_feather(path)
+    else:
+        data.to_csv(path, index=False)
+    return file_name
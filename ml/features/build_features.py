@@ -1,24 +1,33 @@
 # -*- coding: utf-8 -*-
 import os
 from pathlib import Path
+from typing import Optional
 
 import click
 import pandas as pd
 from dotenv import find_dotenv, load_dotenv
 from loguru import logger
 
+from ml.data.storage import read_data, write_data
+from ml.model.encoder import FeatureEncoder
+
 
 class Pipeline:
-    def __init__(self, file_name: str, input_filepath: str, output_filepath: str, is_train: bool = True) -> None:
+    def __init__(self, file_name: str, input_filepath: str, output_filepath: Optional[str], is_train: bool = True, data: Optional[pd.DataFrame] = None, output_format: str = "csv", encoder: Optional[FeatureEncoder] = None) -> None:
         self.file_name = file_name
         self.input_filepath = input_filepath
         self.output_filepath = output_filepath
         self.is_train = is_train
+        self.data = data
+        self.output_format = output_format
+        self.encoder = encoder
 
     def read_data(self) -> None:
+        if self.data is not None:
+            logger.info(f"Use data in memory.")
+            return
         logger.info(f"Start reading data.")
-        self.data = pd.read_csv(os.path.join(
-            self.input_filepath, self.file_name))
+        self.data = read_data(self.input_filepath, self.file_name)
 
     def get_features(self) -> None:
         logger.info(f"Get features.")
@@ -31,38 +40,48 @@ class Pipeline:
 
     def get_dummies(self) -> None:
         logger.info(f"Get features.")
-        self.x = pd.get_dummies(self.x)
+        if self.encoder is None:
+            self.encoder = FeatureEncoder.fit(self.x)
+        self.x = self.encoder.transform_frame(self.x)
 
     def concat_data(self) -> None:
         logger.info(f"Concat data.")
         self.feat_data = pd.concat([self.x, self.y], axis=1)
 
     def write(self) -> None:
+        if self.output_filepath is None:
+            return
         logger.info(f"Start writing data.")
-        self.feat_data.to_csv(os.path.join(
-            self.output_filepath, self.file_name), index=False)
+        write_data(self.feat_data, self.output_filepath,
+                   self.file_name, self.output_format)
 
-    def run(self) -> None:
+    def run(self) -> pd.DataFrame:
         logger.info("Start building features.")
         self.read_data()
         self.get_features()
         self.get_dummies()
         self.concat_data()
         self.write()
+        return self.feat_data
 
 
 @click.command()
 @click.argument("file_name", default="data.csv", type=click.Path())
 @click.argument("input_filepath", default="data/interim", type=click.Path(exists=True))
 @click.argument("output_filepath", default="data/processed", type=click.Path(exists=True))
-def main(file_name, input_filepath, output_filepath):
+@click.option("--encoder", "encoder_file", default="data/processed/encoder.json", type=click.Path(), help="Encoder to apply, fitted and saved here when missing.")
+def main(file_name, input_filepath, output_filepath, encoder_file):
     """Runs data processing scripts to turn cleaned data from (../interim) into
     training data ready to be trained (saved in ../processed).
     """
     logger.info(f"Read from {input_filepath}, write to {output_filepath}.")
+    encoder = FeatureEncoder.load(
+        encoder_file) if os.path.exists(encoder_file) else None
     pipeline = Pipeline(
-        file_name=file_name, input_filepath=input_filepath, output_filepath=output_filepath)
+        file_name=file_name, input_filepath=input_filepath, output_filepath=output_filepath, encoder=encoder)
     pipeline.run()
+    if encoder is None:
+        pipeline.encoder.save(encoder_file)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import json
+from typing import TYPE_CHECKING, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ENCODER_NAME = "encoder.json"
+
+
+class FeatureEncoder:
+    """Turns passenger columns into the model's feature matrix.
+
+    Numeric columns pass through and every categorical column is one-hot
+    encoded over the categories seen in training, laid out like
+    ``pd.get_dummies``: numeric columns first, then ``<column>_<category>``
+    in sorted category order. Unknown categories encode as all zeros.
+    """
+
+    def __init__(self, numeric: List[str], categorical: Dict[str, List[str]]) -> None:
+        self.numeric = list(numeric)
+        self.categorical = {name: list(categories)
+                            for name, categories in categorical.items()}
+        self.columns = self.numeric + [
+            f"{name}_{category}"
+            for name, categories in self.categorical.items() for category in categories
+        ]
+
+    @classmethod
+    def fit(cls, data: "pd.DataFrame") -> "FeatureEncoder":
+        from pandas.api.types import is_numeric_dtype
+
+        categorical = {
+            name: sorted(data[name].dropna().unique().tolist())
+            for name in data.columns if not is_numeric_dtype(data[name])
+        }
+        return cls([name for name in data.columns if name not in categorical], categorical)
+
+    @property
+    def inputs(self) -> List[str]:
+        return self.numeric + list(self.categorical)
+
+    def transform(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """Contiguous float32 matrix laid out as ``columns`` from columnar input.
+
+        Args:
+            columns (Mapping[str, Sequence]): one sequence per input column,
+                e.g. a dict of lists or a DataFrame.
+
+        Raises:
+            ValueError: if the input columns differ in length.
+        """
+        lengths = {len(columns[name]) for name in self.inputs}
+        if len(lengths) > 1:
+            raise ValueError("All feature columns must have the same length")
+        matrix = np.empty((lengths.pop() if lengths else 0,
+                          len(self.columns)), dtype=np.float32)
+        for index, name in enumerate(self.numeric):
+            matrix[:, index] = columns[name]
+        start = len(self.numeric)
+        for name, categories in self.categorical.items():
+            values = np.asarray(columns[name])
+            matrix[:, start:start + len(categories)] = \
+                values[:, None] == np.asarray(categories)[None, :]
+            start += len(categories)
+        return matrix
+
+    def transform_frame(self, data: "pd.DataFrame") -> "pd.DataFrame":
+        import pandas as pd
+
+        return pd.DataFrame(self.transform(data), columns=self.columns, index=data.index)
+
+    def to_dict(self) -> dict:
+        return {"numeric": self.numeric, "categorical": self.categorical}
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureEncoder":
+        with open(path) as file:
+            return cls(**json.load(file))
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FeatureEncoder) and self.to_dict() == other.to_dict()
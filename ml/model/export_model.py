@@ -0,0 +1,58 @@
+import os
+from typing import Any, Optional
+
+import click
+import joblib
+from dotenv import find_dotenv, load_dotenv
+from loguru import logger
+
+from ml.model.forest import FEATURE_DOMAIN, CompactForest, export_forest, forest_name
+
+
+class Pipeline:
+    def __init__(self, model_name: str = "model.pkl", model_path: str = "ml/model", model: Optional[Any] = None) -> None:
+        self.model_name = model_name
+        self.model_path = model_path
+        self.model = model
+        self.forest = None
+
+    def read_model(self) -> None:
+        if self.model is not None:
+            return
+        logger.info(f"Start reading model.")
+        self.model = joblib.load(os.path.join(self.model_path, self.model_name))
+
+    def export(self) -> Optional[CompactForest]:
+        features = getattr(self.model, "feature_names_in_", None)
+        if not hasattr(self.model, "estimators_") or features is None or not set(features) <= set(FEATURE_DOMAIN):
+            logger.warning(f"{type(self.model).__name__} can not be exported as a compact forest.")
+            return None
+        path = os.path.join(self.model_path, forest_name(self.model_name))
+        self.forest = export_forest(self.model, path)
+        if self.forest.outside_domain():
+            logger.warning(
+                f"Splits on {self.forest.outside_domain()} fall outside the declared domain, "
+                "clipped inputs may not match the model.")
+        logger.info(f"Exported {self.forest.node_count} nodes to {path}.")
+        return self.forest
+
+    def run(self) -> None:
+        self.read_model()
+        self.export()
+
+
+@click.command()
+@click.argument("model_name", default="model.pkl", type=click.Path())
+@click.argument("model_path", default="ml/model", type=click.Path(exists=True))
+def main(model_name, model_path):
+    """Exports a trained forest as the compact serving artifact.
+    """
+    Pipeline(model_name=model_name, model_path=model_path).run()
+
+
+if __name__ == "__main__":
+
+    load_dotenv(find_dotenv())
+
+    # pylint: disable = no-value-for-paramete
+    main()
@@ -0,0 +1,219 @@
+import json
+import os
+import shutil
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FOREST_SUFFIX = ".forest"
+ARRAYS = ("feature", "threshold", "children", "value", "roots")
+# Rows evaluated at once, bounds the (rows, trees) node index arrays
+CHUNK_ROWS = 1024
+
+# Declared input domain of the serving features, as (lowest, highest) integer value.
+FEATURE_DOMAIN = {
+    "Pclass": (1, 3),
+    "SibSp": (0, 8),
+    "Parch": (0, 9),
+    "Sex_female": (0, 1),
+    "Sex_male": (0, 1),
+}
+# One-hot encoded columns, exactly one of each group is 1.
+ONE_HOT_GROUPS = [("Sex_female", "Sex_male")]
+
+
+def forest_name(model_name: str) -> str:
+    """``model.pkl`` is exported as ``model.forest``."""
+    return os.path.splitext(model_name)[0] + FOREST_SUFFIX
+
+
+def _float32_at_most(threshold: float) -> np.float32:
+    # sklearn compares float32 inputs to float64 thresholds, rounding down keeps x <= t exact
+    value = np.float32(threshold)
+    return np.nextafter(value, np.float32(-np.inf)) if value > threshold else value
+
+
+class CompactForest:
+    """Random forest flattened into a handful of NumPy arrays for serving.
+
+    Every tree's nodes are concatenated into ``feature`` (uint8 column
+    index), ``threshold`` (float32) and ``children`` (left and right node),
+    and ``roots`` holds each tree's first node. Leaves come after every split
+    node and are their own children with an infinite threshold, so all rows
+    step through ``depth`` levels without branching and end on their leaf.
+    ``value`` keeps each leaf's class distribution as float32; predictions
+    average them like sklearn's soft vote, so they match the exported model.
+
+    Branches that no integer input within ``domain`` can take are pruned on
+    export, taking into account that exactly one column of each one-hot
+    group is set. Inputs are clipped into the domain before evaluation,
+    which is exact as long as every split threshold lies inside the domain.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray, value: np.ndarray,
+                 roots: np.ndarray, features: List[str], classes: List[Any],
+                 domain: Dict[str, Tuple[int, int]], depth: int) -> None:
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.leaves = len(feature) - len(value)
+        self.features = list(features)
+        self.classes_ = np.asarray(classes)
+        self.domain = {name: tuple(bounds) for name, bounds in domain.items()}
+        self.depth = depth
+        self.feature_names_in_ = np.asarray(self.features, dtype=object)
+        self.lows = np.asarray([self.domain[name][0] for name in self.features], dtype=np.float32)
+        self.highs = np.asarray([self.domain[name][1] for name in self.features], dtype=np.float32)
+
+    @staticmethod
+    def _propagate(bounds: Dict[int, Tuple[int, int]], groups: Sequence[Sequence[int]]) -> Dict[int, Tuple[int, int]]:
+        for group in groups:
+            ones = [column for column in group if bounds[column][0] >= 1]
+            unknown = [column for column in group if bounds[column][1] > 0 and column not in ones]
+            if ones:
+                bounds.update({column: (bounds[column][0], 0) for column in group if column not in ones})
+            elif len(unknown) == 1:
+                bounds[unknown[0]] = (1, bounds[unknown[0]][1])
+        return bounds
+
+    @classmethod
+    def from_sklearn(cls, model: Any, domain: Mapping[str, Tuple[int, int]] = FEATURE_DOMAIN,
+                     groups: Sequence[Sequence[str]] = ONE_HOT_GROUPS) -> "CompactForest":
+        features = [str(name) for name in model.feature_names_in_]
+        groups = [[features.index(name) for name in group]
+                  for group in groups if set(group) <= set(features)]
+        nodes = {name: [] for name in ("feature", "threshold", "left", "right")}
+        values, roots = [], []
+        depth = 0
+
+        def add(tree, node, bounds, level):
+            nonlocal depth
+            while tree.children_left[node] >= 0:
+                column, split = tree.feature[node], tree.threshold[node]
+                low, high = bounds[column]
+                if high <= split:
+                    node = tree.children_left[node]
+                elif low > split:
+                    node = tree.children_right[node]
+                else:
+                    break
+            else:
+                distribution = tree.value[node][0]
+                values.append(distribution / distribution.sum())
+                depth = max(depth, level)
+                return -len(values)
+
+            index = len(nodes["feature"])
+            for name in nodes:
+                nodes[name].append(0)
+            nodes["feature"][index] = column
+            nodes["threshold"][index] = _float32_at_most(split)
+            nodes["left"][index] = add(tree, tree.children_left[node], cls._propagate(
+                {**bounds, column: (low, int(np.floor(split)))}, groups), level + 1)
+            nodes["right"][index] = add(tree, tree.children_right[node], cls._propagate(
+                {**bounds, column: (int(np.floor(split)) + 1, high)}, groups), level + 1)
+            return index
+
+        for estimator in model.estimators_:
+            bounds = {column: tuple(domain[name]) for column, name in enumerate(features)}
+            roots.append(add(estimator.tree_, 0, cls._propagate(bounds, groups), 0))
+
+        splits, leaves = len(nodes["feature"]), np.arange(len(values))
+        children = np.stack([nodes["left"], nodes["right"]], axis=1)
+        children = np.concatenate([children, np.stack([splits + leaves] * 2, axis=1)])
+        roots = np.asarray(roots)
+        return cls(
+            feature=np.concatenate([nodes["feature"], np.zeros(len(values))]).astype(np.uint8),
+            threshold=np.concatenate([nodes["threshold"], np.full(len(values), np.inf)]).astype(np.float32),
+            children=np.where(children < 0, splits - children - 1, children).astype(np.int32),
+            value=np.asarray(values, dtype=np.float32),
+            roots=np.where(roots < 0, splits - roots - 1, roots).astype(np.int32),
+            features=features, classes=model.classes_.tolist(),
+            domain={name: domain[name] for name in features}, depth=depth)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.feature)
+
+    def outside_domain(self) -> List[str]:
+        """Features with a split threshold outside the domain, where clipping is not exact."""
+        return sorted({
+            self.features[column]
+            for column, split in zip(self.feature[:self.leaves], self.threshold[:self.leaves])
+            if not self.lows[column] <= split < self.highs[column]})
+
+    def _to_matrix(self, input: Any) -> np.ndarray:
+        if hasattr(input, "columns"):
+            input = input[self.features].to_numpy()
+        return np.clip(np.asarray(input, dtype=np.float32), self.lows, self.highs)
+
+    def predict_proba(self, input: Any) -> np.ndarray:
+        matrix = self._to_matrix(input)
+        proba = np.empty((len(matrix), self.value.shape[1]), dtype=np.float64)
+        for start in range(0, len(matrix), CHUNK_ROWS):
+            proba[start:start + CHUNK_ROWS] = self._evaluate(matrix[start:start + CHUNK_ROWS])
+        return proba
+
+    def _evaluate(self, matrix: np.ndarray) -> np.ndarray:
+        node = np.tile(self.roots, (len(matrix), 1))
+        rows = (np.arange(len(matrix)) * matrix.shape[1])[:, None]
+        values = matrix.ravel()
+        children = self.children.ravel()
+        for _ in range(self.depth):
+            go_right = values.take(rows + self.feature.take(node)) > self.threshold.take(node)
+            node = children.take(node * 2 + go_right)
+        return self.value.take(node - self.leaves, axis=0).mean(axis=1, dtype=np.float64)
+
+    def predict(self, input: Any) -> np.ndarray:
+        return self.classes_[self.predict_proba(input).argmax(axis=1)]
+
+    def save(self, path: str) -> None:
+        """Write the arrays as ``.npy`` files into a new ``path.<version>``
+        directory, then point the ``path`` symlink at it.
+
+        The link is swapped with one rename, so a reader always finds a
+        complete forest. The previous version is kept for loads that resolved
+        the link just before the swap, older ones are removed.
+        """
+        parent, name = os.path.split(os.path.abspath(path))
+        version = f"{name}.{time.time_ns()}"
+        target = os.path.join(parent, version)
+        os.makedirs(target)
+        for array in ARRAYS:
+            np.save(os.path.join(target, f"{array}.npy"), getattr(self, array))
+        with open(os.path.join(target, "forest.json"), "w") as file:
+            json.dump({"features": self.features, "classes": self.classes_.tolist(),
+                       "domain": self.domain, "depth": self.depth}, file, indent=2)
+        if os.path.isdir(path) and not os.path.islink(path):
+            # a forest saved before versioning, the only swap that is not atomic
+            os.replace(path, os.path.join(parent, f"{name}.0"))
+        previous = os.readlink(path) if os.path.islink(path) else None
+        link = f"{target}.link"
+        os.symlink(version, link)
+        os.replace(link, path)
+        for entry in os.listdir(parent):
+            stem, _, suffix = entry.rpartition(".")
+            if stem == name and suffix.isdigit() and entry not in (version, previous):
+                shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CompactForest":
+        """Read an exported forest, memory-mapping its arrays unless ``mmap`` is False."""
+        with open(os.path.join(path, "forest.json")) as file:
+            meta = json.load(file)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                  for name in ARRAYS}
+        return cls(**arrays, **meta)
+
+
+def export_forest(model: Any, path: str, domain: Mapping[str, Tuple[int, int]] = FEATURE_DOMAIN,
+                  groups: Sequence[Sequence[str]] = ONE_HOT_GROUPS) -> CompactForest:
+    forest = CompactForest.from_sklearn(model, domain, groups)
+    forest.save(path)
+    return forest
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import click
+import joblib
+import pandas as pd
+from dotenv import find_dotenv, load_dotenv
+from loguru import logger
+
+from ml.model.encoder import ENCODER_NAME, FeatureEncoder
+
+_model = None
+_encoder = None
+
+
+def load_worker_model(model_file: str) -> None:
+    """Process pool initializer, the model and its encoder are loaded once per worker."""
+    global _model, _encoder
+    _model = joblib.load(model_file)
+    _encoder = FeatureEncoder.load(os.path.join(
+        os.path.dirname(model_file), ENCODER_NAME))
+
+
+def get_features(data: pd.DataFrame) -> pd.DataFrame:
+    """Model input from raw passenger rows or already encoded features."""
+    if set(_encoder.categorical) <= set(data.columns):
+        return _encoder.transform_frame(data)
+    return data[_encoder.columns]
+
+
+def score_chunk(data: pd.DataFrame, id_column: Optional[str]) -> pd.DataFrame:
+    prediction = pd.DataFrame({"Survived": _model.predict(get_features(data))})
+    if id_column in data.columns:
+        prediction.insert(0, id_column, data[id_column].to_numpy())
+    return prediction
+
+
+class Pipeline:
+    def __init__(self, input_file: str, output_file: str, model_file: str, chunk_size: int = 100_000, workers: Optional[int] = None, id_column: str = "PassengerId") -> None:
+        self.input_file = input_file
+        self.output_file = output_file
+        self.model_file = model_file
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count()
+        self.id_column = id_column
+        self.progress_file = f"{output_file}.progress"
+
+    def read_chunks(self, skip: int) -> Iterator[pd.DataFrame]:
+        logger.info(f"Start reading {self.input_file} from chunk {skip}.")
+        if self.input_file.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            batches = pq.ParquetFile(self.input_file).iter_batches(
+                batch_size=self.chunk_size)
+            chunks = (batch.to_pandas() for batch in batches)
+        else:
+            chunks = pd.read_csv(self.input_file, chunksize=self.chunk_size)
+        for index, chunk in enumerate(chunks):
+            if index >= skip:
+                yield chunk
+
+    def read_progress(self) -> dict:
+        if not os.path.exists(self.progress_file) or not os.path.exists(self.output_file):
+            return {"chunks": 0, "rows": 0, "bytes": 0}
+        with open(self.progress_file, "r") as file:
+            return json.load(file)
+
+    def write_progress(self, progress: dict) -> None:
+        tmp_file = f"{self.progress_file}.tmp"
+        with open(tmp_file, "w") as file:
+            json.dump(progress, file)
+        os.replace(tmp_file, self.progress_file)
+
+    def run(self) -> dict:
+        logger.info("Start batch scoring.")
+        progress = self.read_progress()
+        if progress["chunks"]:
+            logger.info(f"Resuming after {progress['rows']} scored rows.")
+        start, scored = time.perf_counter(), 0
+        with open(self.output_file, "ab") as output, ProcessPoolExecutor(
+                max_workers=self.workers, initializer=load_worker_model,
+                initargs=(self.model_file,)) as pool:
+            output.truncate(progress["bytes"])
+            output.seek(progress["bytes"])
+            pending = []
+            for chunk in self.read_chunks(skip=progress["chunks"]):
+                pending.append(pool.submit(score_chunk, chunk, self.id_column))
+                if len(pending) >= 2 * self.workers:
+                    scored += self.write_chunk(output, pending.pop(0).result(), progress)
+            for future in pending:
+                scored += self.write_chunk(output, future.result(), progress)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Scored {scored} rows in {elapsed:.1f}s ({scored / max(elapsed, 1e-9):.0f} rows/s).")
+        os.remove(self.progress_file)
+        return progress
+
+    def write_chunk(self, output, prediction: pd.DataFrame, progress: dict) -> int:
+        output.write(prediction.to_csv(
+            index=False, header=progress["bytes"] == 0).encode())
+        output.flush()
+        os.fsync(output.fileno())
+        progress["chunks"] += 1
+        progress["rows"] += len(prediction)
+        progress["bytes"] = output.tell()
+        self.write_progress(progress)
+        logger.info(f"Wrote chunk {progress['chunks']}, {progress['rows']} rows so far.")
+        return len(prediction)
+
+
+@click.command()
+@click.argument("input_file", type=click.Path(exists=True))
+@click.argument("output_file", default="data/results/predictions.csv", type=click.Path())
+@click.argument("model_file", default="ml/model/model.pkl", type=click.Path(exists=True))
+@click.option("--chunk-size", default=100_000, help="Rows scored per task.")
+@click.option("--workers", default=None, type=int, help="Scoring processes, defaults to the cpu count.")
+@click.option("--id-column", default="PassengerId", help="Input column copied next to the predictions.")
+def main(input_file, output_file, model_file, chunk_size, workers, id_column):
+    """Scores a CSV or Parquet file of any size with a saved model.
+    """
+    logger.info(f"Read from {input_file}, write to {output_file}.")
+    pipeline = Pipeline(input_file=input_file, output_file=output_file, model_file=model_file,
+                        chunk_size=chunk_size, workers=workers, id_column=id_column)
+    pipeline.run()
+
+
+if __name__ == "__main__":
+
+    load_dotenv(find_dotenv())
+
+    # pylint: disable = no-value-for-paramete
+    main()
@@ -1,5 +1,6 @@
+import json
 import os
-from typing import Any
+from typing import Any, Dict, Optional
 
 import click
 import joblib
@@ -7,12 +8,28 @@ import pandas as pd
 from dotenv import find_dotenv, load_dotenv
 from loguru import logger
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
 from sklearn.metrics import classification_report
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import (HalvingGridSearchCV,
+                                     HalvingRandomSearchCV, StratifiedKFold,
+                                     train_test_split)
+
+from ml.data.storage import read_data, with_format
+from ml.model import export_model
+from ml.model.encoder import ENCODER_NAME, FeatureEncoder
+
+SEARCHES = {"grid": HalvingGridSearchCV, "random": HalvingRandomSearchCV}
+PARAM_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [3, 5, 8, None],
+    "min_samples_leaf": [1, 2, 4],
+}
 
 
 class Pipeline:
-    def __init__(self, train_data_name: str, test_data_name: str, input_data_path: str, output_data_path: str, model_name: str, model_path: str, model: Any) -> None:
+    def __init__(self, train_data_name: str, test_data_name: str, input_data_path: str, output_data_path: str, model_name: str, model_path: str, model: Any, train_data: Optional[pd.DataFrame] = None, test_data: Optional[pd.DataFrame] = None,
+                 search: Optional[str] = None, param_grid: Optional[Dict[str, list]] = None, cv: int = 5, n_jobs: int = -1,
+                 encoder: Optional[FeatureEncoder] = None) -> None:
         self.train_data_name = train_data_name
         self.test_data_name = test_data_name
         self.input_data_path = input_data_path
@@ -20,13 +37,22 @@ class Pipeline:
         self.model_name = model_name
         self.model_path = model_path
         self.model = model
+        self.train_data = train_data
+        self.test_data = test_data
+        self.search = search
+        self.param_grid = param_grid or PARAM_GRID
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.trials = None
+        self.encoder = encoder
 
     def read_data(self) -> None:
+        if self.train_data is not None and self.test_data is not None:
+            logger.info(f"Use data in memory.")
+            return
         logger.info(f"Start reading data.")
-        self.train_data = pd.read_csv(os.path.join(
-            self.input_data_path, self.train_data_name))
-        self.test_data = pd.read_csv(os.path.join(
-            self.input_data_path, self.test_data_name))
+        self.train_data = read_data(self.input_data_path, self.train_data_name)
+        self.test_data = read_data(self.input_data_path, self.test_data_name)
 
     def get_features(self) -> None:
         logger.info(f"Get features.")
@@ -39,9 +65,34 @@ class Pipeline:
             self.x_train, self.y_train, test_size=0.1, random_state=2024)
 
     def train(self) -> None:
+        if self.search is not None:
+            self.search_model()
+            return
         logger.info(f"Start training model.")
         self.model.fit(self.x_split_train, self.y_split_train)
 
+    def search_model(self) -> None:
+        """Successive halving over ``param_grid`` with k-fold scoring on all cores.
+
+        Every candidate starts on a small share of the training rows, only the
+        best third goes on to the next round with three times the rows, and
+        the winner is refit on the whole training split.
+        """
+        logger.info(f"Start {self.search} search, {self.cv} folds.")
+        space = "param_grid" if self.search == "grid" else "param_distributions"
+        search = SEARCHES[self.search](
+            self.model, **{space: self.param_grid}, factor=3, n_jobs=self.n_jobs, refit=True, random_state=2024,
+            cv=StratifiedKFold(n_splits=self.cv, shuffle=True, random_state=2024))
+        search.fit(self.x_split_train, self.y_split_train)
+
+        self.trials = pd.DataFrame(search.cv_results_)
+        self.trials["params"] = self.trials["params"].map(json.dumps)
+        self.trials.to_csv(os.path.join(
+            self.output_data_path, "search_trials.csv"), index=False)
+        logger.info(
+            f"Best of {len(self.trials)} trials: {search.best_params_}, score {search.best_score_:.4f}.")
+        self.model = search.best_estimator_
+
     def get_test_prediction(self, data_to_predict: pd.DataFrame) -> None:
         logger.info(f"Predict data.")
         return self.model.predict(data_to_predict)
@@ -54,6 +105,10 @@ class Pipeline:
     def save_model(self) -> None:
         logger.info(f"Start saving model.")
         joblib.dump(self.model, os.path.join(self.model_path, self.model_name))
+        if self.encoder is not None:
+            self.encoder.save(os.path.join(self.model_path, ENCODER_NAME))
+        export_model.Pipeline(model_name=self.model_name,
+                              model_path=self.model_path, model=self.model).export()
 
     def run(self) -> None:
         logger.info(f"Start train pipeline.")
@@ -63,7 +118,7 @@ class Pipeline:
         self.train()
         x_test_pred = self.get_test_prediction(data_to_predict=self.x_test)
         self.write_test_prediction(
-            data_to_write=x_test_pred, file_name=self.test_data_name)
+            data_to_write=x_test_pred, file_name=with_format(self.test_data_name, "csv"))
         y_split_test_pred = self.get_test_prediction(
             data_to_predict=self.x_split_test)
         self.write_test_prediction(
@@ -82,15 +137,25 @@ class Pipeline:
 @ click.argument("output_data_path", default="data/results", type=click.Path(exists=True))
 @ click.argument("model_name", default="model.pkl", type=click.Path())
 @ click.argument("model_path", default="ml/model", type=click.Path(exists=True))
-def main(train_data_name, test_data_name, input_data_path, output_data_path, model_name, model_path):
+@ click.option("--search", type=click.Choice(list(SEARCHES)), default=None, help="Search hyperparameters instead of training the default model.")
+@ click.option("--param-grid", type=click.Path(exists=True), default=None, help="JSON file mapping parameter names to candidate values.")
+@ click.option("--cv", default=5, show_default=True, help="Folds used to score every trial.")
+@ click.option("--n-jobs", default=-1, show_default=True, help="Parallel trials, -1 uses every core.")
+@ click.option("--encoder", "encoder_file", default="data/processed/encoder.json", type=click.Path(), help="Encoder the features were built with, saved next to the model.")
+def main(train_data_name, test_data_name, input_data_path, output_data_path, model_name, model_path, search, param_grid, cv, n_jobs, encoder_file):
     """Runs train model.
     """
     logger.info(f"Read from {input_data_path}, write to {model_path}.")
 
+    if param_grid is not None:
+        with open(param_grid) as file:
+            param_grid = json.load(file)
     model = RandomForestClassifier(
         n_estimators=100, max_depth=5, random_state=1)
     pipeline = Pipeline(train_data_name=train_data_name, test_data_name=test_data_name, input_data_path=input_data_path,
-                        output_data_path=output_data_path, model_name=model_name, model_path=model_path, model=model)
+                        output_data_path=output_data_path, model_name=model_name, model_path=model_path, model=model,
+                        search=search, param_grid=param_grid, cv=cv, n_jobs=n_jobs,
+                        encoder=FeatureEncoder.load(encoder_file) if os.path.exists(encoder_file) else None)
     pipeline.run()
 
 
@@ -1,43 +1,221 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import click
+import joblib
+import pandas as pd
 from dotenv import find_dotenv, load_dotenv
 from loguru import logger
 from sklearn.ensemble import RandomForestClassifier
 
+from ml.cache import StageCache, file_hash, source_hash
+from ml.data.storage import FORMATS, with_format, write_data
 from ml.features import build_features
-from ml.model import train_model
+from ml.model import encoder as encoder_module
+from ml.model import export_model, train_model
+from ml.model.encoder import ENCODER_NAME, FeatureEncoder
 from ml.preprocessing import clean_dataset
 
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
 load_dotenv(find_dotenv())
 
-from ml.data import make_dataset
+FILES = ["train.csv", "test.csv"]
+# written by train_model into results_path, search_trials.csv only with a search
+RESULTS = ["test.csv", "split_test_pred.csv", "split_test_orig.csv"]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far, None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+@contextmanager
+def track_stage(name: str, stats: Dict[str, dict], trace_memory: bool = False) -> Iterator[None]:
+    """Log wall time and peak memory of the enclosed stage.
+
+    The peak is the process's peak resident memory at the end of the stage,
+    and ``rss_growth_mb`` is how far the stage raised it. Reading it costs
+    nothing. ``trace_memory`` also records ``peak_mb``, the peak memory
+    allocated by the stage itself, with tracemalloc. Tracing slows the stage
+    down noticeably, so its time is only comparable between runs with the
+    same setting.
+    """
+    rss_before = peak_rss_mb()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stats[name] = {"seconds": seconds}
+        message = f"Stage {name} took {seconds:.3f}s"
+        rss_after = peak_rss_mb()
+        if rss_after is not None:
+            stats[name].update(peak_rss_mb=rss_after, rss_growth_mb=rss_after - rss_before)
+            message += f", peak RSS {rss_after:.1f} MiB (+{rss_after - rss_before:.1f})"
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stats[name]["peak_mb"] = peak / 2**20
+            message += f", peak traced memory {peak / 2**20:.1f} MiB"
+        logger.info(f"{message}.")
+
 
 class Pipeline:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, in_memory: bool = True, persist_format: Optional[str] = None, download: bool = True,
+                 raw_path: str = "data/raw", interim_path: str = "data/interim", processed_path: str = "data/processed",
+                 results_path: str = "data/results", model_path: str = "ml/model/", cache_path: str = "data/cache",
+                 force: bool = False, search: Optional[str] = None, param_grid: Optional[Dict[str, list]] = None,
+                 trace_memory: bool = False) -> None:
+        self.in_memory = in_memory
+        self.persist_format = persist_format
+        self.download = download
+        self.raw_path = raw_path
+        self.interim_path = interim_path
+        self.processed_path = processed_path
+        self.results_path = results_path
+        self.model_path = model_path
+        self.stats = {}
+        self.cache = StageCache(path=cache_path, force=force)
+        self.search = search
+        self.param_grid = param_grid
+        self.trace_memory = trace_memory
 
-    def run(self) -> None:
-        make_dataset_pipe = make_dataset.Pipeline(output_filepath="data/raw")
-        make_dataset_pipe.run()
+    def persist_path(self, path: str) -> Optional[str]:
+        """Where an in-memory stage writes its output, None keeps it in memory only."""
+        if self.in_memory and self.persist_format is None:
+            return None
+        return path
+
+    @property
+    def output_format(self) -> str:
+        return self.persist_format or "csv"
+
+    def restore(self, name: str, data: pd.DataFrame, output_filepath: Optional[str], file: str) -> None:
+        """Write a cached frame where its stage would have, so on-disk readers find it."""
+        if self.cache.results[name] and output_filepath is not None:
+            write_data(data, output_filepath, file, self.output_format)
+
+    def make_dataset(self) -> None:
+        def download() -> Dict[str, str]:
+            from ml.data import make_dataset
+
+            make_dataset.Pipeline(output_filepath=self.raw_path).run()
+            return {file: file_hash(os.path.join(self.raw_path, file)) for file in FILES}
 
-        for file in ["train.csv", "test.csv"]:
-            clean_dataset_pipe = clean_dataset.Pipeline(
-                file_name=file, input_filepath="data/raw", output_filepath="data/interim")
-            clean_dataset_pipe.run()
+        def downloaded(hashes: Dict[str, str]) -> bool:
+            # the cached download only stands while the raw files are the ones it produced
+            return all(os.path.exists(os.path.join(self.raw_path, file))
+                       and file_hash(os.path.join(self.raw_path, file)) == hashes.get(file) for file in FILES)
 
-            build_features_pipe = build_features.Pipeline(
-                file_name=file, input_filepath="data/interim", output_filepath="data/processed", is_train=file == "train.csv")
-            build_features_pipe.run()
+        with track_stage("make_dataset", self.stats, self.trace_memory):
+            self.cache.run("make_dataset", [], {"competition": "titanic", "output_filepath": self.raw_path}, download,
+                           valid=downloaded)
 
+    def prepare(self, file: str, encoder: Optional[FeatureEncoder] = None,
+                inputs: Optional[List[str]] = None) -> Tuple[pd.DataFrame, FeatureEncoder, str]:
+        """Clean and featurize one raw file, passing the frame between stages.
+
+        The feature encoder is fitted on the file unless one is given, together
+        with the fingerprints (``inputs``) of the stage that fitted it.
+        """
+        name = f"clean_dataset[{file}]"
+        with track_stage(name, self.stats, self.trace_memory):
+            clean_data, fingerprint = self.cache.run(
+                name, [file_hash(os.path.join(self.raw_path, file)), source_hash(clean_dataset)], {"file": file},
+                lambda: clean_dataset.Pipeline(
+                    file_name=file, input_filepath=self.raw_path, output_filepath=self.persist_path(self.interim_path),
+                    output_format=self.output_format).run())
+            self.restore(name, clean_data, self.persist_path(self.interim_path), file)
+
+        def featurize() -> Tuple[pd.DataFrame, FeatureEncoder]:
+            pipeline = build_features.Pipeline(
+                file_name=with_format(file, self.output_format), input_filepath=self.interim_path, output_filepath=self.persist_path(self.processed_path),
+                is_train=file == "train.csv", data=clean_data if self.in_memory else None,
+                output_format=self.output_format, encoder=encoder)
+            return pipeline.run(), pipeline.encoder
+
+        name = f"build_features[{file}]"
+        with track_stage(name, self.stats, self.trace_memory):
+            (feat_data, encoder), fingerprint = self.cache.run(
+                name, [fingerprint, source_hash(build_features), source_hash(encoder_module)] + (inputs or []),
+                {"file": file, "is_train": file == "train.csv"}, featurize)
+            self.restore(name, feat_data, self.persist_path(self.processed_path), file)
+        return feat_data, encoder, fingerprint
+
+    def train(self, data: Dict[str, pd.DataFrame], encoder: FeatureEncoder, fingerprints: List[str]) -> None:
         model = RandomForestClassifier(
             n_estimators=100, max_depth=5, random_state=1)
 
-        train_model_pipe = train_model.Pipeline(train_data_name="train.csv", test_data_name="test.csv", input_data_path="data/processed",
-                                                output_data_path="data/results", model_name="model.pkl", model_path="ml/model/", model=model)
-        train_model_pipe.run()
+        def fit() -> Any:
+            pipeline = train_model.Pipeline(train_data_name=with_format("train.csv", self.output_format),
+                                            test_data_name=with_format("test.csv", self.output_format), input_data_path=self.processed_path,
+                                            output_data_path=self.results_path, model_name="model.pkl", model_path=self.model_path,
+                                            model=model, train_data=data.get("train.csv"), test_data=data.get("test.csv"),
+                                            search=self.search, param_grid=self.param_grid, encoder=encoder)
+            pipeline.run()
+            return pipeline.model
+
+        with track_stage("train_model", self.stats, self.trace_memory):
+            params = {"model": model.get_params(), "search": self.search,
+                      "param_grid": self.param_grid}
+            results = RESULTS + (["search_trials.csv"] if self.search else [])
+            model, _ = self.cache.run("train_model", fingerprints + [source_hash(train_model)], params, fit,
+                                      outputs=[os.path.join(self.results_path, file) for file in results])
+            if self.cache.results["train_model"]:
+                joblib.dump(model, os.path.join(self.model_path, "model.pkl"))
+                encoder.save(os.path.join(self.model_path, ENCODER_NAME))
+                export_model.Pipeline(model_path=self.model_path, model=model).export()
+
+    def run(self) -> None:
+        if self.download:
+            self.make_dataset()
+
+        train_data, encoder, train_fingerprint = self.prepare("train.csv")
+        test_data, _, test_fingerprint = self.prepare(
+            "test.csv", encoder, [train_fingerprint])
+        data = {"train.csv": train_data, "test.csv": test_data}
+        self.train(data if self.in_memory else {}, encoder,
+                   [train_fingerprint, test_fingerprint])
 
+        logger.info(self.cache.summary())
         logger.info("Pipeline finished.")
 
 
+@click.command()
+@click.option("--on-disk", is_flag=True, help="Read every stage's input back from CSV instead of passing frames in memory.")
+@click.option("--persist", "persist_format", type=click.Choice(FORMATS), default=None, help="Also write intermediate frames in this format.")
+@click.option("--skip-download", is_flag=True, help="Use the raw files already in data/raw.")
+@click.option("--force", is_flag=True, help="Run every stage even when its cached artifact is up to date.")
+@click.option("--search", type=click.Choice(list(train_model.SEARCHES)), default=None, help="Search hyperparameters with successive halving.")
+@click.option("--param-grid", type=click.Path(exists=True), default=None, help="JSON file mapping parameter names to candidate values.")
+@click.option("--trace-memory", is_flag=True, help="Also trace the memory each stage allocates, slowing the stages down.")
+def main(on_disk, persist_format, skip_download, force, search, param_grid, trace_memory):
+    """Runs the whole training pipeline.
+    """
+    if param_grid is not None:
+        with open(param_grid) as file:
+            param_grid = json.load(file)
+    pipeline = Pipeline(in_memory=not on_disk, persist_format=persist_format, download=not skip_download,
+                        force=force, search=search, param_grid=param_grid, trace_memory=trace_memory)
+    pipeline.run()
+
+
 if __name__ == "__main__":
 
-    pipeline = Pipeline()
-    pipeline.run()
+    # pylint: disable = no-value-for-paramete
+    main()
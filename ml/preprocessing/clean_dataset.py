@@ -1,23 +1,30 @@
 # -*- coding: utf-8 -*-
 import os
 from pathlib import Path
+from typing import Optional
 
 import click
 import pandas as pd
 from dotenv import find_dotenv, load_dotenv
 from loguru import logger
 
+from ml.data.storage import read_data, write_data
+
 
 class Pipeline:
-    def __init__(self, file_name: str, input_filepath: str, output_filepath: str) -> None:
+    def __init__(self, file_name: str, input_filepath: str, output_filepath: Optional[str], data: Optional[pd.DataFrame] = None, output_format: str = "csv") -> None:
         self.file_name = file_name
         self.input_filepath = input_filepath
         self.output_filepath = output_filepath
+        self.data = data
+        self.output_format = output_format
 
     def read_data(self) -> None:
+        if self.data is not None:
+            logger.info(f"Use data in memory.")
+            return
         logger.info(f"Start reading data.")
-        self.data = pd.read_csv(os.path.join(
-            self.input_filepath, self.file_name))
+        self.data = read_data(self.input_filepath, self.file_name)
 
     def select_train_columns(self, features: list = ["Pclass", "Sex", "SibSp", "Parch"]) -> None:
         logger.info(f"Start selecting train columns.")
@@ -36,9 +43,11 @@ class Pipeline:
         logger.info(self.prep_data)
 
     def write(self) -> None:
+        if self.output_filepath is None:
+            return
         logger.info(f"Start writing data.")
-        self.prep_data.to_csv(os.path.join(
-            self.output_filepath, self.file_name), index=False)
+        write_data(self.prep_data, self.output_filepath,
+                   self.file_name, self.output_format)
 
     def run(self) -> pd.DataFrame:
         logger.info("Start making interim dataset.")
@@ -47,6 +56,7 @@ class Pipeline:
         self.select_target_column()
         self.concat_data()
         self.write()
+        return self.prep_data
 
 
 @click.command()
@@ -0,0 +1,62 @@
+import time
+from unittest.mock import patch
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.main import app
+from services.jobs import JobStore
+from services.passengers import PassengerStore
+
+
+def wait_for(client, job_id):
+    for _ in range(500):
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise TimeoutError(job_id)
+
+
+@patch("services.predict.MODEL_NAME", "dummy_model.pkl")
+class TestJobs:
+
+    @staticmethod
+    @patch("api.routes.jobs.get_passenger_store")
+    def test_id_list_job_pages_through_results(mock_model, mock_get_passenger_store, tmp_path):
+        mock_get_passenger_store.return_value = PassengerStore(pd.read_csv("app/data/test.csv"))
+        ids = pd.read_csv("app/data/test.csv")["PassengerId"].head(5).to_list()
+        with patch.object(JobStore, "store", JobStore(str(tmp_path / "jobs.sqlite"))), \
+                patch("api.routes.jobs.runner.chunk_size", 2), TestClient(app) as client:
+            response = client.post("/api/v1/jobs/predict_id_list", json={"PassengerId": ids})
+            assert response.status_code == 202
+            job = wait_for(client, response.json()["job_id"])
+
+            first = client.get(f"/api/v1/jobs/{job['job_id']}/results", params={"limit": 3}).json()
+            second = client.get(f"/api/v1/jobs/{job['job_id']}/results",
+                                params={"limit": 3, "cursor": first["next_cursor"]}).json()
+
+        assert (job["status"], job["total"], job["done"]) == ("succeeded", 5, 5)
+        assert [result["row"] for result in first["results"]] == [0, 1, 2]
+        assert [result["passenger_id"] for result in first["results"] + second["results"]] == ids
+        assert second["next_cursor"] is None
+
+    @staticmethod
+    def test_feature_job_matches_predict(mock_model, tmp_path):
+        body = {"Pclass": [3, 1], "SibSp": [0, 1], "Parch": [0, 0], "Sex": ["male", "female"]}
+        with patch.object(JobStore, "store", JobStore(str(tmp_path / "jobs.sqlite"))), TestClient(app) as client:
+            job = wait_for(client, client.post("/api/v1/jobs/predict", json=body).json()["job_id"])
+            results = client.get(f"/api/v1/jobs/{job['job_id']}/results").json()["results"]
+            expected = client.post("/api/v1/predict", json=body).json()["prediction"]
+
+        assert job["status"] == "succeeded"
+        assert [result["prediction"] for result in results] == expected
+
+    @staticmethod
+    def test_unknown_job_and_bad_cursor(mock_model, tmp_path):
+        with patch.object(JobStore, "store", JobStore(str(tmp_path / "jobs.sqlite"))), TestClient(app) as client:
+            assert client.get("/api/v1/jobs/missing").status_code == 404
+            job_id = client.post("/api/v1/jobs/predict_id_list", json={"PassengerId": [892]}).json()["job_id"]
+            response = client.get(f"/api/v1/jobs/{job_id}/results", params={"cursor": "nope"})
+
+        assert response.status_code == 400
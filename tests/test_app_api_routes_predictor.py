@@ -1,9 +1,17 @@
+import json
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pytest
 from fastapi.testclient import TestClient
+from starlette.datastructures import Secret
 
 from app.main import app
+from services import codecs
+from services.passengers import PassengerStore
+from services.predict import MachineLearningModelHandlerScore
 
 client = TestClient(app)
 
@@ -17,12 +25,106 @@ class TestApp:
         assert response.status_code == 200
         assert response.json() == {'status': True}
 
+    @staticmethod
+    def test_live(mock_model):
+        response = client.get("/api/v1/live")
+        assert response.status_code == 200
+        assert response.json() == {'status': True}
+
+    @staticmethod
+    def test_ready_after_self_test(mock_model):
+        client.get("/api/v1/health")
+        response = client.get("/api/v1/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+        assert response.json()["latency_seconds"] > 0
+
     @staticmethod
     def test_predict_good_input(mock_model):
         response = client.post(
             "/api/v1/predict", json={"Pclass": [3], "SibSp": [0], "Parch": [0], "Sex": ["male"]})
         assert response.status_code == 200
         assert response.json() == {"prediction": [0]}
+        assert "X-Model-Version" in response.headers
+
+    @staticmethod
+    def test_predict_stream(mock_model):
+        body = '{"Pclass": 3, "SibSp": 0, "Parch": 0, "Sex": "male"}\n' * 3
+        response = client.post("/api/v1/predict_stream", content=body)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text == '{"prediction":0}\n' * 3
+        assert response.headers["X-Model"] == "default"
+        assert "X-Model-Version" not in response.headers
+
+    @staticmethod
+    def test_predict_stream_holds_admission_until_it_ends(mock_model):
+        from api.routes.predictor import admission
+
+        body = '{"Pclass": 3, "SibSp": 0, "Parch": 0, "Sex": "male"}\n'
+        assert client.post("/api/v1/predict_stream", content=body).status_code == 200
+        assert admission["predict_stream"].requests == 0
+        with patch.object(admission["predict_stream"], "requests", 1), \
+                patch.object(admission["predict_stream"], "max_requests", 1), \
+                patch.object(admission["predict_stream"], "max_queue", 0):
+            response = client.post("/api/v1/predict_stream", content=body)
+        assert response.status_code == 503
+
+    @staticmethod
+    def test_predict_stream_selects_model(mock_model):
+        body = '{"Pclass": 3, "SibSp": 0, "Parch": 0, "Sex": "male"}\n'
+        with patch("api.routes.predictor.predict_versioned") as predict:
+            predict.return_value = ([1], "v1")
+            by_route = client.post("/api/v1/models/default/predict_stream", content=body)
+            by_header = client.post("/api/v1/predict_stream", content=body, headers={"X-Model": "missing"})
+
+        assert by_route.text == '{"prediction":1}\n'
+        assert predict.call_args.args[1] == "default"
+        assert by_header.status_code == 404
+
+    @staticmethod
+    def test_predict_arrow(mock_model):
+        table = pa.table({"Pclass": [3, 1], "SibSp": [0, 1], "Parch": [0, 0], "Sex": ["male", "female"]})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        response = client.post("/api/v1/predict", content=sink.getvalue().to_pybytes(),
+                               headers={"content-type": codecs.ARROW})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == codecs.ARROW
+        assert "X-Model-Version" in response.headers
+        prediction = pa.ipc.open_stream(response.content).read_all()
+        expected = client.post("/api/v1/predict", json=table.to_pydict()).json()
+        assert prediction.column("prediction").to_pylist() == expected["prediction"]
+
+    @staticmethod
+    def test_predict_unsupported_media_type(mock_model):
+        response = client.post(
+            "/api/v1/predict", content="Pclass=3", headers={"content-type": "text/plain"})
+        assert response.status_code == 415
+
+    @staticmethod
+    @patch("api.routes.predictor.COLUMNAR_VALIDATION", True)
+    def test_predict_columnar_validation(mock_model):
+        response = client.post(
+            "/api/v1/predict", json={"Pclass": [3, 5], "SibSp": [0, 0], "Parch": [0, 0], "Sex": ["male", "male"]})
+        assert response.status_code == 422
+        error, = response.json()["detail"]
+        assert error["loc"] == ["body", "Pclass"] and error["rows"] == [1]
+
+        response = client.post(
+            "/api/v1/predict", json={"Pclass": [3], "SibSp": [0], "Parch": [0], "Sex": ["male"]})
+        assert response.json() == {"prediction": [0]}
+
+    @staticmethod
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_predict_validates_the_domain_on_every_path(mock_model, columnar):
+        body = {"Pclass": [3, 7], "SibSp": [0, 0], "Parch": [0, 0], "Sex": ["male", "robot"]}
+        with patch("api.routes.predictor.COLUMNAR_VALIDATION", columnar):
+            response = client.post("/api/v1/predict", json=body)
+        assert response.status_code == 422
+        assert {tuple(error["loc"]) for error in response.json()["detail"]} == {("body", "Pclass"), ("body", "Sex")}
 
     @staticmethod
     def test_predict_bad_input(mock_model):
@@ -31,10 +133,10 @@ class TestApp:
         assert response.status_code == 422
 
     @staticmethod
-    @patch("api.routes.predictor.get_test_data")
-    def test_predict_id_list_good_input(mock_model, mock_get_test_data):
-        mock_get_test_data.return_value = return_value = pd.read_csv(
-            "app/data/test.csv")
+    @patch("api.routes.predictor.get_passenger_store")
+    def test_predict_id_list_good_input(mock_model, mock_get_passenger_store):
+        mock_get_passenger_store.return_value = PassengerStore(pd.read_csv(
+            "app/data/test.csv"))
 
         response = client.post(
             "/api/v1/predict_id_list", json={"PassengerId": [900, 901]})
@@ -42,22 +144,186 @@ class TestApp:
         assert response.json() == {"prediction": [1, 0]}
 
     @staticmethod
-    @patch("api.routes.predictor.get_test_data")
-    def test_predict_id_list_bad_input(mock_model, mock_get_test_data):
-        mock_get_test_data.return_value = return_value = pd.read_csv(
-            "app/data/test.csv")
+    @patch("api.routes.predictor.get_passenger_store")
+    def test_predict_id_list_bad_input(mock_model, mock_get_passenger_store):
+        mock_get_passenger_store.return_value = PassengerStore(pd.read_csv(
+            "app/data/test.csv"))
 
         response = client.post(
             "/api/v1/predict_id_list", json={"PassengerId": ["asd"]})
         assert response.status_code == 422
 
     @staticmethod
-    @patch("api.routes.predictor.get_test_data")
-    def test_predict_id_list_bad_id(mock_get_test_data, mock_model):
-        mock_get_test_data.return_value = return_value = pd.read_csv(
-            "app/data/test.csv")
+    @patch("api.routes.predictor.get_passenger_store")
+    def test_predict_id_list_bad_id(mock_model, mock_get_passenger_store):
+        mock_get_passenger_store.return_value = PassengerStore(pd.read_csv(
+            "app/data/test.csv"))
 
         response = client.post(
-            "/api/v1/predict_id_list", json={"PassengerId": [1, 2]})
+            "/api/v1/predict_id_list", json={"PassengerId": [1, 900, 2]})
         assert response.status_code == 500
-        assert response.json() == {"detail": "Exception: Check IDs"}
+        assert response.json() == {"detail": "Exception: Check IDs: [1, 2]"}
+
+    @staticmethod
+    @patch("api.routes.admin.SECRET_KEY", Secret("token"))
+    def test_admin_reload_reports_active_version(mock_model):
+        response = client.post("/api/v1/admin/reload", headers={"Authorization": "Bearer token"})
+        assert response.status_code == 200
+        assert response.json()["version"] is not None
+        assert client.get("/api/v1/admin/model").json() == response.json()
+
+    @staticmethod
+    def test_admin_reload_requires_secret_key(mock_model):
+        with patch("api.routes.admin.SECRET_KEY", Secret("")):
+            assert client.post("/api/v1/admin/reload").status_code == 403
+        with patch("api.routes.admin.SECRET_KEY", Secret("token")):
+            assert client.post("/api/v1/admin/reload").status_code == 401
+            response = client.post("/api/v1/admin/reload", headers={"Authorization": "Bearer wrong"})
+            assert response.status_code == 401
+
+    @staticmethod
+    @patch("api.routes.predictor.PREDICTION_CACHE_SIZE", 0)
+    def test_model_version_header_is_the_predicting_models(mock_model):
+        client.get("/api/v1/health")
+        version = MachineLearningModelHandlerScore.version
+        call_matrix = MachineLearningModelHandlerScore.call_matrix
+
+        def reload_midway(clf, matrix, features, method="predict"):
+            MachineLearningModelHandlerScore.version = "reloaded"
+            return call_matrix(clf, matrix, features, method)
+
+        try:
+            with patch.object(MachineLearningModelHandlerScore, "call_matrix", side_effect=reload_midway):
+                response = client.post(
+                    "/api/v1/predict", json={"Pclass": [3], "SibSp": [0], "Parch": [0], "Sex": ["male"]})
+        finally:
+            MachineLearningModelHandlerScore.version = version
+        assert response.headers["X-Model-Version"] == version
+
+    @staticmethod
+    def test_metrics_report_request_stages(mock_model):
+        client.post(
+            "/api/v1/predict", json={"Pclass": [3], "SibSp": [0], "Parch": [0], "Sex": ["male"]})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        for stage in ["validation", "admission", "features", "inference", "serialization"]:
+            assert f'route="predict:get-data",stage="{stage}"' in response.text
+        assert 'titanic_admission_queue_depth{route="predict"} 0' in response.text
+        assert 'titanic_admission_rejected_total{route="predict",reason="queue_full"}' in response.text
+
+    @staticmethod
+    def test_predict_sheds_load_with_retry_after(mock_model):
+        from api.routes.predictor import admission
+
+        with patch.object(admission["predict"], "requests", 1), \
+                patch.object(admission["predict"], "max_requests", 1), \
+                patch.object(admission["predict"], "max_queue", 0), \
+                patch("api.routes.predictor.read_columns") as read_columns:
+            response = client.post(
+                "/api/v1/predict", json={"Pclass": [3], "SibSp": [0], "Parch": [0], "Sex": ["male"]})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        read_columns.assert_not_called()
+
+    @staticmethod
+    def test_predict_admits_on_estimate_and_charges_exact_rows(mock_model):
+        from api.routes.predictor import admission
+
+        controller = admission["predict"]
+        body = json.dumps({"Pclass": [3, 1], "SibSp": [0, 1], "Parch": [0, 0], "Sex": ["male", "female"]})
+        with patch.object(controller, "resize", wraps=controller.resize) as resize:
+            response = client.post(
+                "/api/v1/predict", content=body, headers={"content-type": "application/json"})
+        assert response.status_code == 200
+        resize.assert_called_once_with(len(body) // 20, 2)
+        assert (controller.requests, controller.rows) == (0, 0)
+
+    @staticmethod
+    def test_predict_selects_model_by_header_and_route(mock_model):
+        from api.routes.predictor import model, registry
+
+        body = {"Pclass": [3, 1], "SibSp": [0, 1], "Parch": [0, 0], "Sex": ["male", "female"]}
+        with patch.dict(registry.handlers, {"candidate": model.named("model.pkl")}):
+            by_header = client.post("/api/v1/predict", json=body, headers={"X-Model": "candidate"})
+            by_route = client.post("/api/v1/models/candidate/predict", json=body)
+            default = client.post("/api/v1/predict", json=body)
+            candidate = registry.get("candidate")
+
+        assert by_header.status_code == by_route.status_code == 200
+        assert by_header.headers["X-Model"] == by_route.headers["X-Model"] == "candidate"
+        assert by_header.headers["X-Model-Version"] == candidate.version
+        assert default.headers["X-Model"] == "default"
+        assert default.headers["X-Model-Version"] != candidate.version
+
+    @staticmethod
+    def test_predict_unknown_model(mock_model):
+        response = client.post(
+            "/api/v1/models/nope/predict", json={"Pclass": [3], "SibSp": [0], "Parch": [0], "Sex": ["male"]})
+        assert response.status_code == 404
+        assert "Unknown model 'nope'" in response.json()["detail"]
+
+    @staticmethod
+    def test_shadow_model_sees_a_copy_of_traffic(mock_model):
+        from api.routes import predictor
+        from services.shadow import ShadowEvaluator
+
+        shadow = ShadowEvaluator(MagicMock(return_value=[1]))
+        with patch.object(predictor, "shadow", shadow), \
+                patch("api.routes.admin.shadow", shadow), patch("api.routes.admin.SHADOW_MODEL", "candidate"):
+            response = client.post(
+                "/api/v1/predict", json={"Pclass": [3], "SibSp": [0], "Parch": [0], "Sex": ["male"]})
+            shadow.shutdown(wait=True)
+            summary = client.get("/api/v1/admin/shadow").json()
+
+        assert response.json() == {"prediction": [0]}
+        assert summary["model"] == "candidate"
+        assert (summary["requests"], summary["disagreements"], summary["disagreement_rate"]) == (1, 1, 1.0)
+
+    @staticmethod
+    def test_shadow_prediction_does_not_take_an_inference_worker(mock_model):
+        from api.routes import predictor
+
+        with patch.object(predictor, "SHADOW_MODEL", "default"), \
+                patch("core.executor.get_executor") as get_executor:
+            prediction = predictor.get_shadow_prediction(np.zeros((1, 5)))
+
+        assert len(prediction) == 1
+        get_executor.assert_not_called()
+
+    @staticmethod
+    def test_admin_lists_models(mock_model):
+        with patch.object(MachineLearningModelHandlerScore, "version", "served"), \
+                patch.object(MachineLearningModelHandlerScore, "get_version") as get_version:
+            response = client.get("/api/v1/admin/models")
+        assert response.status_code == 200
+        assert response.json()["models"][0]["name"] == "default"
+        assert response.json()["models"][0]["file"] == "dummy_model.pkl"
+        assert response.json()["models"][0]["version"] == "served"
+        get_version.assert_not_called()
+
+    @staticmethod
+    @patch("core.executor.INFERENCE_EXECUTOR", "process")
+    @patch("core.executor.INFERENCE_WORKERS", 1)
+    def test_process_executor_serves_version_and_cache_from_the_parent(mock_model):
+        from api.routes import predictor
+        from core import executor
+        from services.predict import PredictionCache
+
+        body = {"Pclass": [3, 3], "SibSp": [0, 0], "Parch": [0, 0], "Sex": ["male", "male"]}
+        with patch.object(MachineLearningModelHandlerScore, "model", None), \
+                patch.object(MachineLearningModelHandlerScore, "version", None), \
+                patch.object(predictor, "prediction_cache", PredictionCache()):
+            try:
+                responses = [client.post("/api/v1/predict", json=body) for _ in range(2)]
+                pool = executor.get_executor()
+            finally:
+                executor.shutdown_executor()
+            version = client.get("/api/v1/admin/model").json()["version"]
+            cache = client.get("/api/v1/cache").json()
+
+        assert type(pool).__name__ == "ProcessPoolExecutor"
+        assert [response.json() for response in responses] == [{"prediction": [0, 0]}] * 2
+        assert version is not None
+        assert responses[1].headers["X-Model-Version"] == version
+        assert (cache["hits"], cache["misses"]) == (1, 1)
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from core.admission import AdmissionController
+from core.errors import OverloadedException
+
+
+def controller(**limits):
+    return AdmissionController("predict", **{"max_requests": 2, "max_rows": 100,
+                                             "max_queue": 1, "timeout": 1.0, **limits})
+
+
+def test_admits_within_limits_and_releases():
+    async def scenario():
+        admission = controller()
+        await admission.acquire(40)
+        await admission.acquire(60)
+        assert (admission.requests, admission.rows) == (2, 100)
+        admission.release(40)
+        admission.release(60)
+        return admission
+
+    admission = asyncio.run(scenario())
+
+    assert (admission.requests, admission.rows) == (0, 0)
+    assert admission.metrics["admitted"] == 2
+
+
+def test_queued_request_is_admitted_in_order_on_release():
+    async def scenario():
+        admission = controller(max_queue=2)
+        await admission.acquire(80)
+        waiting = asyncio.ensure_future(admission.acquire(50))
+        await asyncio.sleep(0)
+        assert len(admission.waiters) == 1 and not waiting.done()
+        admission.release(80)
+        await waiting
+        return admission
+
+    admission = asyncio.run(scenario())
+
+    assert (admission.requests, admission.rows) == (1, 50)
+    assert admission.metrics["queued"] == 1
+
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        admission = controller(max_requests=1, max_queue=1)
+        await admission.acquire(1)
+        waiting = asyncio.ensure_future(admission.acquire(1))
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedException) as exc:
+            await admission.acquire(1)
+        admission.release(1)
+        await waiting
+        return admission, exc.value
+
+    admission, err = asyncio.run(scenario())
+
+    assert err.retry_after == 1
+    assert admission.metrics["queue_full"] == 1
+    assert admission.requests == 1
+
+
+def test_rejects_when_wait_times_out():
+    async def scenario():
+        admission = controller(max_requests=1, timeout=0.01)
+        await admission.acquire(1)
+        with pytest.raises(OverloadedException):
+            await admission.acquire(1)
+        return admission
+
+    admission = asyncio.run(scenario())
+
+    assert admission.metrics["timeout"] == 1
+    assert not admission.waiters
+
+
+def test_oversized_request_runs_alone():
+    async def scenario():
+        admission = controller(max_rows=10, timeout=0.01)
+        await admission.acquire(500)
+        with pytest.raises(OverloadedException):
+            await admission.acquire(1)
+        admission.release(500)
+        await admission.acquire(1)
+        return admission
+
+    assert asyncio.run(scenario()).rows == 1
+
+
+def test_resize_charges_exact_rows_and_wakes_the_queue():
+    async def scenario():
+        admission = controller(max_requests=0, max_rows=100)
+        await admission.acquire(90)
+        waiting = asyncio.ensure_future(admission.acquire(50))
+        await asyncio.sleep(0)
+        admission.resize(90, 40)
+        await waiting
+        return admission
+
+    assert asyncio.run(scenario()).rows == 90
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from core import executor
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+@patch("core.executor.INFERENCE_EXECUTOR", "inline")
+def test_inline_runs_on_the_calling_thread():
+    result = asyncio.run(executor.run_inference(current_thread_name))
+
+    assert result == threading.current_thread().name
+
+
+@patch("core.executor.INFERENCE_EXECUTOR", "thread")
+def test_thread_runs_on_the_inference_pool():
+    try:
+        result = asyncio.run(executor.run_inference(current_thread_name))
+    finally:
+        executor.shutdown_executor()
+
+    assert result.startswith("inference")
+
+
+@patch("core.executor.INFERENCE_EXECUTOR", "thread")
+def test_sync_caller_waits_on_the_inference_pool():
+    try:
+        result = executor.run_inference_sync(current_thread_name)
+    finally:
+        executor.shutdown_executor()
+
+    assert result.startswith("inference")
+
+
+@patch("core.executor.INFERENCE_EXECUTOR", "gpu")
+def test_unknown_executor_raises():
+    with pytest.raises(ValueError, match="INFERENCE_EXECUTOR must be one of"):
+        executor.get_executor()
@@ -0,0 +1,40 @@
+from core.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram(
+        "latency_seconds", "Latency.", labels=("stage",), buckets=(0.1, 1.0)))
+
+    histogram.observe(0.05, "inference")
+    histogram.observe(0.5, "inference")
+    histogram.observe(5.0, "inference")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency_seconds Latency.", "# TYPE latency_seconds histogram"]
+    assert 'latency_seconds_bucket{stage="inference",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="inference",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{stage="inference",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{stage="inference"} 5.55' in lines
+    assert 'latency_seconds_count{stage="inference"} 3' in lines
+
+
+def test_counter_reads_callback():
+    registry = Registry()
+    source = {"hits": 0}
+    registry.register(Counter("hits_total", "Hits.", callback=lambda: source["hits"]))
+
+    source["hits"] = 7
+
+    assert "hits_total 7" in registry.render().splitlines()
+
+
+def test_labeled_gauge_renders_one_sample_per_label_values():
+    registry = Registry()
+    registry.register(Gauge("depth", "Depth.", labels=("route",),
+                            callback=lambda: {("predict",): 2, ("predict_id_list",): 0}))
+
+    lines = registry.render().splitlines()
+
+    assert 'depth{route="predict"} 2' in lines
+    assert 'depth{route="predict_id_list"} 0' in lines
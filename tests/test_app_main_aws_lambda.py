@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from core.config import COLD_START_BUDGET
+
+EVENT = {
+    "version": "2.0",
+    "routeKey": "POST /api/v1/predict",
+    "rawPath": "/api/v1/predict",
+    "rawQueryString": "",
+    "headers": {"content-type": "application/json"},
+    "requestContext": {"http": {"method": "POST", "path": "/api/v1/predict", "sourceIp": "127.0.0.1"}},
+    "body": json.dumps({"Pclass": [3, 1], "SibSp": [0, 0], "Parch": [0, 0], "Sex": ["male", "female"]}),
+    "isBase64Encoded": False,
+}
+
+# Imports the handler in a fresh interpreter, as a new execution environment would
+SCRIPT = f"""
+import json, time
+start = time.perf_counter()
+import main_aws_lambda
+init = time.perf_counter() - start
+response = main_aws_lambda.handler({EVENT!r}, None)
+print(json.dumps({{"init": init, "timings": main_aws_lambda.startup.timings, "response": response}}))
+"""
+
+
+def test_cold_start_is_within_budget():
+    pytest.importorskip("mangum")
+    result = subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": "app:."}, check=True)
+    output = json.loads(result.stdout.splitlines()[-1])
+
+    assert output["init"] < COLD_START_BUDGET
+    assert {"import main", "load model", "warm up"} <= set(output["timings"])
+    assert output["response"]["statusCode"] == 200
+    assert json.loads(output["response"]["body"]) == {"prediction": [0, 1]}
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from ml.model.encoder import FeatureEncoder
+from models.prediction import FEATURE_COLUMNS, MachineLearningDataInput
+
+ENCODER = FeatureEncoder.load("ml/model/encoder.json")
+
+
+def test_get_array_matches_get_dataframe():
+    data_input = MachineLearningDataInput(
+        Pclass=[3, 1, 2], SibSp=[0, 1, 4], Parch=[2, 0, 0],
+        Sex=["male", "female", "other"])
+
+    matrix = data_input.get_array(ENCODER)
+    frame = data_input.get_dataframe()
+
+    assert matrix.dtype == np.float32 and matrix.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(matrix, frame[FEATURE_COLUMNS].to_numpy(np.float32))
+
+
+def test_get_array_rejects_uneven_columns():
+    data_input = MachineLearningDataInput(
+        Pclass=[3, 1], SibSp=[0], Parch=[2, 0], Sex=["male", "female"])
+
+    with pytest.raises(ValueError):
+        data_input.get_array(ENCODER)
@@ -0,0 +1,60 @@
+import gc
+import os
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from models.prediction import FEATURE_COLUMNS
+from services.predict import MachineLearningModelHandlerScore
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux") or not os.path.exists("/proc/self/smaps_rollup"),
+    reason="private memory is measured from /proc/<pid>/smaps_rollup")
+
+serve = pytest.importorskip("serve")
+
+
+def worker_private_memory(job) -> int:
+    """Fork a worker that runs ``job``, return its private memory in bytes."""
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            job()
+            os.write(write_end, str(serve.private_memory()).encode())
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as pipe:
+        measured = int(pipe.read() or 0)
+    os.waitpid(pid, 0)
+    return measured
+
+
+def serve_request():
+    matrix = np.array([[3, 0, 0, 0, 1]], dtype=np.float32)
+    MachineLearningModelHandlerScore.predict_matrix(
+        matrix, FEATURE_COLUMNS, load_wrapper=joblib.load)
+
+
+@pytest.fixture
+def model_slot():
+    model, version = MachineLearningModelHandlerScore.model, MachineLearningModelHandlerScore.version
+    MachineLearningModelHandlerScore.model = None
+    yield
+    gc.unfreeze()
+    MachineLearningModelHandlerScore.model, MachineLearningModelHandlerScore.version = model, version
+
+
+def test_preloaded_workers_share_the_model(model_slot):
+    idle = worker_private_memory(lambda: None)
+    lazy = worker_private_memory(serve_request) - idle
+
+    MachineLearningModelHandlerScore.get_model(load_wrapper=joblib.load)
+    gc.collect()
+    gc.freeze()
+    idle = worker_private_memory(lambda: None)
+    preloaded = worker_private_memory(serve_request) - idle
+
+    assert preloaded < lazy
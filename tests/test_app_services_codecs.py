@@ -0,0 +1,56 @@
+import msgpack
+import numpy as np
+import pyarrow as pa
+import pytest
+from core.errors import UnsupportedMediaTypeException
+from services import codecs
+
+
+@pytest.mark.parametrize("accept,content_type,expected", [
+    (None, codecs.JSON, codecs.JSON),
+    (None, codecs.ARROW, codecs.ARROW),
+    ("*/*", codecs.MSGPACK, codecs.MSGPACK),
+    ("application/json", codecs.ARROW, codecs.JSON),
+    ("application/json, application/x-msgpack;q=0.9", codecs.JSON, codecs.JSON),
+    ("application/json;q=0.5, application/x-msgpack", codecs.JSON, codecs.MSGPACK),
+    ("application/x-msgpack;q=0", codecs.JSON, codecs.JSON),
+    ("application/msgpack, application/vnd.apache.arrow.stream", codecs.JSON, codecs.MSGPACK),
+    ("application/json;q=0.8, */*;q=0.9", codecs.ARROW, codecs.ARROW),
+    ("text/html", codecs.MSGPACK, codecs.JSON),
+])
+def test_negotiate(accept, content_type, expected):
+    assert codecs.negotiate(accept, content_type) == expected
+
+
+def test_arrow_round_trip_is_zero_copy():
+    pclass = np.array([3, 1, 2], dtype=np.int64)
+    table = pa.table({"Pclass": pclass, "Sex": ["male", "female", "male"]})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    body = sink.getvalue().to_pybytes()
+
+    columns = codecs.decode_columns(body, codecs.ARROW)
+
+    np.testing.assert_array_equal(columns["Pclass"], pclass)
+    assert not columns["Pclass"].flags["OWNDATA"]
+    assert columns["Sex"].tolist() == ["male", "female", "male"]
+
+    prediction = pa.ipc.open_stream(codecs.encode_prediction(pclass, codecs.ARROW)).read_all()
+    assert prediction.column("prediction").type == pa.int64()
+    assert prediction.column("prediction").to_pylist() == [3, 1, 2]
+
+
+def test_msgpack_round_trip():
+    body = msgpack.packb({"Pclass": [3, 1], "Sex": ["male", "female"]})
+
+    columns = codecs.decode_columns(body, codecs.MSGPACK)
+    assert columns["Pclass"].tolist() == [3, 1]
+
+    prediction = msgpack.unpackb(codecs.encode_prediction([0, 1], codecs.MSGPACK))
+    assert np.frombuffer(prediction["prediction"], prediction["dtype"]).tolist() == [0, 1]
+
+
+def test_unsupported_media_type():
+    with pytest.raises(UnsupportedMediaTypeException):
+        codecs.decode_columns(b"", "text/csv")
@@ -0,0 +1,44 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from services.compiled import CompiledModel
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load("ml/model/model.pkl")
+
+
+def test_compiled_matches_model_in_domain(model):
+    compiled = CompiledModel.compile(model)
+    grid = pd.DataFrame({
+        "Pclass": [1, 2, 3, 3, 1],
+        "SibSp": [0, 1, 8, 2, 0],
+        "Parch": [0, 9, 0, 1, 2],
+        "Sex_female": [True, False, True, False, False],
+        "Sex_male": [False, True, False, True, False],
+    })
+
+    np.testing.assert_array_equal(compiled.predict(grid), model.predict(grid))
+
+
+def test_compiled_falls_back_out_of_domain(model):
+    compiled = CompiledModel.compile(model)
+    data = pd.DataFrame({
+        "Pclass": [3, 7, 1],
+        "SibSp": [0, 0, 20],
+        "Parch": [0, 0, 0],
+        "Sex_female": [False, True, True],
+        "Sex_male": [True, False, False],
+    })
+
+    np.testing.assert_array_equal(compiled.predict(data), model.predict(data))
+
+
+def test_compile_skips_unknown_features():
+    class Model:
+        feature_names_in_ = np.array(["Age"])
+
+    model = Model()
+    assert CompiledModel.compile(model) is model
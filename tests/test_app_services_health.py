@@ -0,0 +1,48 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+from core.errors import PredictException
+from services.health import ModelSelfTest
+
+
+class TestModelSelfTest:
+
+    @staticmethod
+    def test_not_ready_before_first_self_test():
+        self_test = ModelSelfTest(AsyncMock())
+
+        assert not self_test.ready
+        assert self_test.result is None
+
+    @staticmethod
+    def test_get_caches_the_result():
+        check = AsyncMock()
+        self_test = ModelSelfTest(check, version=lambda: "abc123")
+
+        first = asyncio.run(self_test.get())
+        second = asyncio.run(self_test.get())
+
+        check.assert_awaited_once()
+        assert first is second
+        assert first["status"] and first["model_version"] == "abc123"
+        assert self_test.ready
+
+    @staticmethod
+    def test_failed_self_test_is_not_ready():
+        self_test = ModelSelfTest(AsyncMock(side_effect=ValueError("boom")))
+
+        result = asyncio.run(self_test.refresh())
+
+        assert not self_test.ready
+        assert result["error"] == "boom"
+
+    @staticmethod
+    def test_predict_exception_marks_not_ready():
+        self_test = ModelSelfTest(AsyncMock(side_effect=[None, PredictException("boom")]))
+
+        asyncio.run(self_test.refresh())
+        assert self_test.ready
+        result = asyncio.run(self_test.refresh())
+
+        assert not self_test.ready
+        assert result["error"] == "boom"
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+from core.errors import PredictException
+from services.jobs import BatchJobRunner, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"), min_size=1, max_size=2)
+    yield store
+    store.close()
+
+
+async def double(kind, chunk):
+    values = chunk["Pclass"] if kind == "predict" else chunk
+    return [value * 2 for value in values]
+
+
+async def run_job(runner, kind, inputs):
+    job = await runner.submit(kind, inputs)
+    await asyncio.wait_for(_until_finished(runner, job["job_id"]), 5)
+    runner.stop()
+    return await runner.get_store().get(job["job_id"])
+
+
+async def _until_finished(runner, job_id):
+    while (await runner.get_store().get(job_id))["status"] in ("queued", "running"):
+        await asyncio.sleep(0.01)
+
+
+def test_job_is_scored_in_chunks_and_paged_by_key(store):
+    runner = BatchJobRunner(lambda: store, double, chunk_size=3)
+
+    async def scenario():
+        job = await run_job(runner, "predict_id_list", list(range(10)))
+        first = await store.page(job["job_id"], -1, 4)
+        second = await store.page(job["job_id"], first[-1][0], 100)
+        return job, first, second
+
+    job, first, second = asyncio.run(scenario())
+
+    assert (job["status"], job["total"], job["done"]) == ("succeeded", 10, 10)
+    assert first == [(0, 0, 0), (1, 1, 2), (2, 2, 4), (3, 3, 6)]
+    assert [row for row, _, _ in second] == list(range(4, 10))
+    assert second[-1] == (9, 9, 18)
+
+
+def test_feature_job_has_no_passenger_ids(store):
+    runner = BatchJobRunner(lambda: store, double, chunk_size=2)
+
+    async def scenario():
+        job = await run_job(runner, "predict", {"Pclass": [1, 2, 3], "Sex": ["male"] * 3})
+        return await store.page(job["job_id"], -1, 10)
+
+    assert asyncio.run(scenario()) == [(0, None, 2), (1, None, 4), (2, None, 6)]
+
+
+def test_failing_chunk_marks_job_failed(store):
+    async def fail(kind, chunk):
+        raise ValueError("Check IDs: [7]")
+
+    runner = BatchJobRunner(lambda: store, fail)
+
+    job = asyncio.run(run_job(runner, "predict_id_list", [7]))
+
+    assert job["status"] == "failed"
+    assert job["error"] == "Check IDs: [7]"
+    assert job["finished_at"] is not None
+
+
+def test_predict_exception_marks_job_failed(store):
+    async def fail(kind, chunk):
+        raise PredictException("Model is not loaded")
+
+    runner = BatchJobRunner(lambda: store, fail)
+
+    job = asyncio.run(run_job(runner, "predict_id_list", [7]))
+
+    assert (job["status"], job["error"]) == ("failed", "Model is not loaded")
+
+
+def test_stop_fails_running_and_queued_jobs(store):
+    async def hang(kind, chunk):
+        await asyncio.Event().wait()
+
+    runner = BatchJobRunner(lambda: store, hang)
+
+    async def scenario():
+        jobs = [await runner.submit("predict_id_list", [892]) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        runner.stop()
+        return [await store.get(job["job_id"]) for job in jobs]
+
+    jobs = asyncio.run(scenario())
+
+    assert [(job["status"], job["error"]) for job in jobs] == [("failed", "Worker stopped")] * 2
+
+
+def test_keeper_fails_orphaned_jobs_and_deletes_expired_ones(store):
+    runner = BatchJobRunner(lambda: store, double, heartbeat=60, retention=3600)
+
+    async def scenario():
+        orphaned = await store.create("predict", 1, "stopped-worker")
+        await store.update(orphaned["job_id"], heartbeat=time.time() - 600)
+        alive = await store.create("predict", 1, "other-worker")
+        expired = await store.create("predict_id_list", 1, "stopped-worker")
+        await store.write(expired["job_id"], 0, [892], [0])
+        await store.update(expired["job_id"], status="succeeded", finished_at=time.time() - 7200)
+        runner.start()
+        await asyncio.sleep(0.05)
+        runner.stop()
+        return ([await store.get(job["job_id"]) for job in (orphaned, alive, expired)],
+                await store.page(expired["job_id"], -1, 10))
+
+    (orphaned, alive, expired), results = asyncio.run(scenario())
+
+    assert (orphaned["status"], orphaned["error"]) == ("failed", "Worker stopped")
+    assert alive["status"] == "queued"
+    assert expired is None and results == []
+
+
+def test_unknown_kind_raises(store):
+    runner = BatchJobRunner(lambda: store, double)
+
+    with pytest.raises(ValueError, match="Job kind must be one of"):
+        asyncio.run(runner.submit("train", [1]))
@@ -0,0 +1,174 @@
+import asyncio
+import os
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+from core.errors import PassengerNotFoundException
+from services.passengers import PassengerStore, SqlitePassengerStore, get_roster
+
+
+@pytest.fixture
+def roster():
+    return pd.DataFrame({
+        "PassengerId": [903, 901, 902],
+        "Pclass": [1, 3, 2],
+        "Name": ["a", "b", "c"],
+        "Sex": ["female", "male", "female"],
+        "SibSp": [0, 1, 2],
+        "Parch": [3, 4, 5],
+    })
+
+
+class TestPassengerStore:
+
+    @staticmethod
+    def test_lookup_returns_rows_in_request_order(roster):
+        store = PassengerStore(roster)
+
+        result = store.lookup([902, 903, 902])
+
+        assert list(result.columns) == ["Pclass", "Sex", "SibSp", "Parch"]
+        assert result["Pclass"].to_list() == [2, 1, 2]
+        assert result["Parch"].to_list() == [5, 3, 5]
+
+    @staticmethod
+    def test_lookup_reports_every_missing_id(roster):
+        store = PassengerStore(roster)
+
+        with pytest.raises(PassengerNotFoundException, match=r"\[1, 2\]") as exc:
+            store.lookup([1, 901, 2])
+        assert exc.value.missing_ids == [1, 2]
+
+    @staticmethod
+    @patch("services.passengers.os.path.exists")
+    def test_get_store_loads_once(mock_exists, roster):
+        # Setup
+        PassengerStore.store = None
+        mock_exists.return_value = True
+        load_wrapper = MagicMock(return_value=roster)
+
+        # Test
+        first = PassengerStore.get_store(load_wrapper=load_wrapper)
+        second = PassengerStore.get_store(load_wrapper=load_wrapper)
+
+        # Assert
+        assert first is second
+        assert len(first) == 3
+        load_wrapper.assert_called_once()
+        PassengerStore.store = None
+
+    @staticmethod
+    @patch("services.passengers.os.path.exists")
+    @patch("services.passengers.logger")
+    def test_load_raises_exception_if_path_does_not_exist(mock_logger, mock_exists):
+        mock_exists.return_value = False
+
+        with pytest.raises(FileNotFoundError, match="not exists!"):
+            PassengerStore.load(load_wrapper=MagicMock())
+        mock_logger.error.assert_called_once()
+
+
+@pytest.fixture
+def database(roster, tmp_path):
+    path = str(tmp_path / "passengers.sqlite")
+    SqlitePassengerStore.build(pd.concat([roster, roster.head(1)]), path)
+    store = SqlitePassengerStore(path, min_size=1, max_size=2)
+    yield store
+    store.close()
+
+
+class TestSqlitePassengerStore:
+
+    @staticmethod
+    def test_fetch_returns_rows_in_request_order(database):
+        result = asyncio.run(database.fetch([902, 903, 902]))
+
+        assert len(database) == 3
+        assert list(result.columns) == ["Pclass", "Sex", "SibSp", "Parch"]
+        assert result["Sex"].to_list() == ["female", "female", "female"]
+        assert result["Parch"].to_list() == [5, 3, 5]
+
+    @staticmethod
+    def test_fetch_reports_every_missing_id(database):
+        with pytest.raises(PassengerNotFoundException) as exc:
+            asyncio.run(database.fetch([1, 901, 2]))
+        assert exc.value.missing_ids == [1, 2]
+
+    @staticmethod
+    @patch("services.passengers.QUERY_BATCH_SIZE", 2)
+    def test_fetch_matches_memory_store_across_batches(database, roster):
+        ids = [901, 903, 902, 903, 901]
+
+        result = asyncio.run(database.fetch(ids))
+
+        pd.testing.assert_frame_equal(
+            result, PassengerStore(roster).lookup(ids), check_dtype=False)
+
+    @staticmethod
+    def test_pool_bounds_concurrent_connections(database):
+        async def fetch_all():
+            return await asyncio.gather(*(database.fetch([901]) for _ in range(8)))
+
+        with patch.object(database.pool, "connect", wraps=database.pool.connect) as connect:
+            results = asyncio.run(fetch_all())
+
+        assert len(results) == 8
+        assert connect.call_count <= database.pool.max_size
+        assert database.pool.min_size <= database.pool.size <= database.pool.max_size
+
+    @staticmethod
+    @patch("services.passengers.os.path.exists")
+    def test_get_roster_builds_database_once(mock_exists, roster, tmp_path):
+        SqlitePassengerStore.store = None
+        path = str(tmp_path / "roster.sqlite")
+        load_wrapper = MagicMock(return_value=roster)
+        mock_exists.side_effect = lambda file: file != path
+
+        with patch("services.passengers.ROSTER_BACKEND", "sqlite"), \
+                patch("services.passengers.ROSTER_DATABASE", path):
+            first = get_roster(load_wrapper=load_wrapper)
+            second = get_roster(load_wrapper=load_wrapper)
+
+        assert first is second
+        assert len(first) == 3
+        load_wrapper.assert_called_once()
+        first.close()
+        SqlitePassengerStore.store = None
+
+    @staticmethod
+    def test_close_also_closes_checked_out_connections(database):
+        started = asyncio.Event()
+
+        async def close_while_busy():
+            async def fetch():
+                started.set()
+                return await database.fetch([901])
+
+            task = asyncio.create_task(fetch())
+            await started.wait()
+            await asyncio.sleep(0)
+            database.close()
+            return await task
+
+        result = asyncio.run(close_while_busy())
+
+        assert result["Pclass"].to_list() == [3]
+        assert database.pool.size == 0
+
+    @staticmethod
+    def test_get_roster_rebuilds_database_older_than_the_roster(roster, tmp_path):
+        SqlitePassengerStore.store = None
+        path, source = str(tmp_path / "roster.sqlite"), tmp_path / "test.csv"
+        SqlitePassengerStore.build(roster.head(1), path)
+        roster.to_csv(source, index=False)
+        os.utime(path, (0, 0))
+
+        with patch("services.passengers.ROSTER_BACKEND", "sqlite"), \
+                patch("services.passengers.ROSTER_DATABASE", path), \
+                patch("services.passengers.TEST_DATA", str(source)):
+            store = get_roster(load_wrapper=pd.read_csv)
+
+        assert len(store) == 3
+        store.close()
+        SqlitePassengerStore.store = None
@@ -1,10 +1,18 @@
-
+import asyncio
+import os
+import time
 from unittest.mock import MagicMock, patch
 
+import numpy as np
+import pandas as pd
 import pytest
 from core.config import MODEL_NAME, MODEL_PATH
 from core.errors import ModelLoadException, PredictException
-from services.predict import MachineLearningModelHandlerScore
+from services.encoder import FeatureEncoderHandler
+from services.predict import (MachineLearningModelHandlerScore,
+                              MicroBatchDispatcher, PredictionCache,
+                              ignore_feature_names_warning, reload_artifacts,
+                              watch_model)
 
 
 @pytest.fixture
@@ -91,3 +99,265 @@ class TestMachineLearningModelHandlerScore:
         with pytest.raises(ModelLoadException, match=f"Model None could not load!"):
             MachineLearningModelHandlerScore.load(
                 load_wrapper=mock_load_wrapper)
+
+    @staticmethod
+    @patch("services.predict.MODEL_PATH", "ml/model/")
+    @patch("services.predict.MODEL_NAME", "model.forest")
+    def test_load_memory_maps_compact_forest(mock_load_wrapper):
+        # Test
+        model = MachineLearningModelHandlerScore.load(load_wrapper=mock_load_wrapper)
+        version = MachineLearningModelHandlerScore.get_version()
+
+        # Assert
+        mock_load_wrapper.assert_not_called()
+        assert isinstance(model.value, np.memmap)
+        assert model.predict(np.array([[3, 0, 0, 0, 1]])).tolist() == [0]
+        assert len(version) == 12
+
+    @staticmethod
+    def test_feature_names_warning_is_only_silenced_for_sklearn():
+        import warnings
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            ignore_feature_names_warning()
+            for module in ("sklearn.base", "services.other"):
+                warnings.warn_explicit("X does not have valid feature names", UserWarning,
+                                       f"{module}.py", 1, module=module)
+
+        assert [warning.filename for warning in caught] == ["services.other.py"]
+
+
+class TestMicroBatchDispatcher:
+
+    @staticmethod
+    def test_concurrent_requests_share_one_predict_call():
+        # Setup
+        predict = MagicMock(side_effect=lambda data: data["x"].to_numpy() * 10)
+        dispatcher = MicroBatchDispatcher(predict, max_batch_size=100, max_wait_ms=50)
+
+        async def run():
+            return await asyncio.gather(
+                dispatcher.submit(pd.DataFrame({"x": [1, 2]})),
+                dispatcher.submit(pd.DataFrame({"x": [3]})),
+                dispatcher.submit(pd.DataFrame({"x": [4, 5, 6]})),
+            )
+
+        # Test
+        results = asyncio.run(run())
+
+        # Assert
+        predict.assert_called_once()
+        assert [r.tolist() for r in results] == [[10, 20], [30], [40, 50, 60]]
+        assert dispatcher.metrics["batches"] == 1
+        assert dispatcher.metrics["requests"] == 3
+        assert dispatcher.metrics["largest_batch_size"] == 6
+
+    @staticmethod
+    def test_batch_is_closed_at_max_batch_size():
+        predict = MagicMock(side_effect=lambda data: np.zeros(len(data)))
+        dispatcher = MicroBatchDispatcher(predict, max_batch_size=2, max_wait_ms=50)
+
+        async def run():
+            return await asyncio.gather(
+                *[dispatcher.submit(pd.DataFrame({"x": [i]})) for i in range(4)])
+
+        asyncio.run(run())
+
+        assert predict.call_count == 2
+        assert dispatcher.metrics["last_batch_size"] == 2
+
+    @staticmethod
+    def test_exception_is_propagated_to_every_caller():
+        predict = MagicMock(side_effect=ValueError("boom"))
+        dispatcher = MicroBatchDispatcher(predict, max_wait_ms=10)
+
+        async def run():
+            return await asyncio.gather(
+                dispatcher.submit(pd.DataFrame({"x": [1]})),
+                dispatcher.submit(pd.DataFrame({"x": [2]})),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, ValueError) for r in results)
+
+    @staticmethod
+    def test_predict_exception_resolves_every_caller():
+        predict = MagicMock(side_effect=[PredictException("boom"), np.array([7])])
+        dispatcher = MicroBatchDispatcher(predict, max_wait_ms=10)
+
+        async def run():
+            failed = await asyncio.wait_for(asyncio.gather(
+                dispatcher.submit(pd.DataFrame({"x": [1]})),
+                dispatcher.submit(pd.DataFrame({"x": [2]})),
+                return_exceptions=True,
+            ), timeout=1)
+            served = await asyncio.wait_for(
+                dispatcher.submit(pd.DataFrame({"x": [3]})), timeout=1)
+            return failed, served
+
+        failed, served = asyncio.run(run())
+
+        assert all(isinstance(r, PredictException) for r in failed)
+        assert served.tolist() == [7]
+        assert predict.call_count == 2
+
+
+    @staticmethod
+    def test_timed_callers_get_their_row_share_of_the_call():
+        def predict(data):
+            time.sleep(0.05)
+            return data["x"].to_numpy(), "v1"
+
+        dispatcher = MicroBatchDispatcher(predict, max_batch_size=4, max_wait_ms=50, versioned=True, timed=True)
+
+        async def run():
+            return await asyncio.gather(
+                dispatcher.submit(pd.DataFrame({"x": [1]})),
+                dispatcher.submit(pd.DataFrame({"x": [2, 3, 4]})),
+            )
+
+        (first, first_version, first_seconds), (_, _, second_seconds) = asyncio.run(run())
+
+        assert (first.tolist(), first_version) == ([1], "v1")
+        assert second_seconds == pytest.approx(3 * first_seconds)
+        assert 0.05 <= first_seconds + second_seconds < 0.1
+
+
+class TestModelReload:
+
+    @staticmethod
+    @patch.object(MachineLearningModelHandlerScore, "get_version")
+    @patch.object(MachineLearningModelHandlerScore, "load")
+    def test_reload_warms_up_and_swaps_model(mock_load, mock_get_version, mock_model):
+        # Setup
+        old_model = MagicMock()
+        MachineLearningModelHandlerScore.model = old_model
+        mock_model.feature_names_in_ = ["a", "b"]
+        mock_load.return_value = mock_model
+        mock_get_version.return_value = "abc123"
+
+        # Test
+        version = MachineLearningModelHandlerScore.reload(load_wrapper="wrapper")
+
+        # Assert
+        assert version == "abc123"
+        assert MachineLearningModelHandlerScore.model is mock_model
+        assert MachineLearningModelHandlerScore.version == "abc123"
+        mock_model.predict.assert_called_once()
+        old_model.predict.assert_not_called()
+
+    @staticmethod
+    @patch.object(MachineLearningModelHandlerScore, "load")
+    def test_failed_reload_keeps_active_model(mock_load, mock_model):
+        MachineLearningModelHandlerScore.model = mock_model
+        mock_load.side_effect = ModelLoadException("broken")
+
+        with pytest.raises(ModelLoadException):
+            MachineLearningModelHandlerScore.reload(load_wrapper="wrapper")
+        assert MachineLearningModelHandlerScore.model is mock_model
+
+    @staticmethod
+    @pytest.mark.parametrize("changed", ["model.pkl", "encoder.json"])
+    def test_watch_model_reloads_on_file_change(tmp_path, changed):
+        (tmp_path / "model.pkl").write_bytes(b"v1")
+        (tmp_path / "encoder.json").write_bytes(b"{}")
+        on_reload = MagicMock()
+
+        async def run():
+            task = asyncio.create_task(
+                watch_model(0.01, "wrapper", on_reload=on_reload))
+            await asyncio.sleep(0.05)
+            os.utime(tmp_path / changed, ns=(1, 1))
+            await asyncio.sleep(0.1)
+            task.cancel()
+
+        with patch("services.predict.MODEL_PATH", str(tmp_path)), \
+                patch("services.encoder.MODEL_PATH", str(tmp_path)), \
+                patch("services.predict.reload_artifacts") as mock_reload:
+            asyncio.run(run())
+
+        mock_reload.assert_called_once_with([MachineLearningModelHandlerScore], "wrapper")
+        on_reload.assert_called_once()
+
+    @staticmethod
+    @patch.object(FeatureEncoderHandler, "load")
+    @patch.object(MachineLearningModelHandlerScore, "load")
+    def test_failed_model_load_keeps_the_active_encoder(mock_load, mock_encoder_load, mock_model):
+        active_encoder = MagicMock()
+        FeatureEncoderHandler.encoder = active_encoder
+        MachineLearningModelHandlerScore.model = mock_model
+        mock_load.side_effect = ModelLoadException("broken")
+
+        try:
+            with pytest.raises(ModelLoadException):
+                reload_artifacts([MachineLearningModelHandlerScore], "wrapper", "encoder_wrapper")
+            assert FeatureEncoderHandler.encoder is active_encoder
+            assert MachineLearningModelHandlerScore.model is mock_model
+        finally:
+            FeatureEncoderHandler.encoder = None
+
+
+class TestPredictionCache:
+
+    @staticmethod
+    def test_duplicate_rows_are_predicted_once():
+        # Setup
+        predict = MagicMock(side_effect=lambda matrix: matrix[:, 0] * 10)
+        cache = PredictionCache(max_size=10)
+        matrix = np.array([[1, 0], [2, 0], [1, 0], [1, 0]], dtype=np.float32)
+
+        # Test
+        first = cache.predict(matrix, predict, version="v1")
+        second = cache.predict(matrix[:2], predict, version="v1")
+
+        # Assert
+        assert first.tolist() == [10, 20, 10, 10]
+        assert second.tolist() == [10, 20]
+        predict.assert_called_once()
+        assert len(predict.call_args[0][0]) == 2
+        assert cache.metrics["misses"] == 2
+        assert cache.metrics["hits"] == 2
+
+    @staticmethod
+    def test_least_recently_used_rows_are_evicted():
+        predict = MagicMock(side_effect=lambda matrix: matrix[:, 0])
+        cache = PredictionCache(max_size=2)
+
+        for value in [1, 2, 1, 3]:
+            cache.predict(np.array([[value]]), predict)
+
+        assert cache.metrics["evictions"] == 1
+        assert cache.metrics["size"] == 2
+        cache.predict(np.array([[1]]), predict)
+        assert cache.metrics["hits"] == 2
+
+    @staticmethod
+    def test_expired_and_other_version_entries_are_missed():
+        predict = MagicMock(side_effect=lambda matrix: matrix[:, 0])
+        cache = PredictionCache(max_size=2, ttl=0)
+
+        cache.predict(np.array([[1]]), predict, version="v1")
+        cache.predict(np.array([[1]]), predict, version="v1")
+        cache.ttl = 300
+        cache.predict(np.array([[1]]), predict, version="v2")
+
+        assert cache.metrics["hits"] == 0
+        assert predict.call_count == 3
+
+    @staticmethod
+    def test_misses_of_a_replaced_version_are_not_stored():
+        cache = PredictionCache(max_size=10)
+
+        def predict_then_reload(matrix):
+            cache.predict(np.array([[9]]), lambda m: m[:, 0], version="v2")
+            return matrix[:, 0] * 0
+
+        old = cache.predict(np.array([[1]]), predict_then_reload, version="v1")
+        new = cache.predict(np.array([[1]]), lambda m: m[:, 0], version="v2")
+
+        assert old.tolist() == [0]
+        assert new.tolist() == [1]
+        assert cache.metrics["size"] == 2
@@ -0,0 +1,36 @@
+import pytest
+from core.errors import UnknownModelException
+from services.predict import MachineLearningModelHandlerScore
+from services.registry import DEFAULT_MODEL, ModelRegistry, parse_models
+
+
+def test_parse_models():
+    assert parse_models(["dummy=dummy_model.pkl", " compact = model.forest "]) == {
+        "dummy": "dummy_model.pkl", "compact": "model.forest"}
+    assert parse_models([]) == {}
+
+
+@pytest.mark.parametrize("entries", [["dummy"], ["=model.pkl"], ["a=x.pkl", "a=y.pkl"], ["default=x.pkl"]])
+def test_parse_models_rejects_bad_entries(entries):
+    with pytest.raises(ValueError):
+        parse_models(entries)
+
+
+def test_named_handlers_keep_their_own_model():
+    registry = ModelRegistry(MachineLearningModelHandlerScore, {"dummy": "dummy_model.pkl"})
+    dummy = registry.get("dummy")
+
+    dummy.model = "loaded"
+
+    assert registry.get(DEFAULT_MODEL) is MachineLearningModelHandlerScore
+    assert MachineLearningModelHandlerScore.model != "loaded"
+    assert dummy.get_path().endswith("/dummy_model.pkl")
+    assert dummy._reload_lock is not MachineLearningModelHandlerScore._reload_lock
+    assert registry.names == [DEFAULT_MODEL, "dummy"]
+
+
+def test_unknown_model_raises():
+    registry = ModelRegistry(MachineLearningModelHandlerScore, {})
+
+    with pytest.raises(UnknownModelException, match="Unknown model 'candidate'"):
+        registry.get("candidate")
@@ -0,0 +1,63 @@
+import threading
+from unittest.mock import MagicMock
+
+import numpy as np
+from core.errors import ModelLoadException
+from services.shadow import ShadowEvaluator
+
+
+def test_records_disagreements_and_latency():
+    shadow = ShadowEvaluator(lambda matrix: np.array([0, 1, 1, 0]))
+
+    shadow.submit(np.zeros((4, 5)), [0, 1, 0, 0], seconds=0.5)
+    shadow.shutdown(wait=True)
+    summary = shadow.summary()
+
+    assert (summary["requests"], summary["rows"], summary["disagreements"]) == (1, 4, 1)
+    assert summary["disagreement_rate"] == 0.25
+    assert summary["primary_seconds_mean"] == 0.5
+    assert summary["shadow_seconds_mean"] > 0
+    assert shadow.pending == 0
+
+
+def test_drops_requests_when_the_shadow_model_is_behind():
+    release = threading.Event()
+    shadow = ShadowEvaluator(lambda matrix: release.wait() and [0], max_pending=1)
+
+    accepted = [shadow.submit(np.zeros((1, 5)), [0], 0.1) for _ in range(3)]
+    release.set()
+    shadow.shutdown(wait=True)
+
+    assert accepted == [True, False, False]
+    assert shadow.metrics["dropped"] == 2
+    assert shadow.metrics["requests"] == 1
+
+
+def test_failures_are_counted_not_raised():
+    shadow = ShadowEvaluator(MagicMock(side_effect=ValueError("boom")))
+
+    shadow.submit(np.zeros((1, 5)), [0], 0.1)
+    shadow.shutdown(wait=True)
+
+    assert shadow.metrics["errors"] == 1
+    assert shadow.pending == 0
+
+
+def test_model_load_exception_frees_the_pending_slot():
+    shadow = ShadowEvaluator(MagicMock(side_effect=[ModelLoadException("boom"), [1]]), max_pending=1)
+
+    shadow.submit(np.zeros((1, 5)), [0], 0.1)
+    shadow.shutdown(wait=True)
+    accepted = shadow.submit(np.zeros((1, 5)), [0], 0.1)
+    shadow.shutdown(wait=True)
+
+    assert accepted
+    assert (shadow.metrics["errors"], shadow.metrics["requests"], shadow.pending) == (1, 1, 0)
+
+
+def test_sample_rate_skips_requests():
+    predict = MagicMock()
+    shadow = ShadowEvaluator(predict, sample_rate=0)
+
+    assert not shadow.submit(np.zeros((1, 5)), [0], 0.1)
+    predict.assert_not_called()
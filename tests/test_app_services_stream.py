@@ -0,0 +1,78 @@
+import asyncio
+
+import numpy as np
+import pytest
+from starlette.requests import ClientDisconnect
+from services.stream import iter_records, predict_ndjson
+
+
+async def as_stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(stream):
+    return [item async for item in stream]
+
+
+def test_iter_records_joins_lines_split_across_chunks():
+    stream = as_stream(b'{"a": 1}\n{"a"', b': 2}\n\n{"a": 3}')
+
+    records = asyncio.run(collect(iter_records(stream)))
+
+    assert records == [{"a": 1}, {"a": 2}, {"a": 3}]
+
+
+def test_predict_ndjson_scores_in_chunks():
+    calls = []
+
+    async def predict(matrix):
+        calls.append(len(matrix))
+        return matrix[:, 0] * 2
+
+    def to_matrix(records):
+        return np.array([[r["x"]] for r in records])
+
+    stream = as_stream(b"".join(b'{"x": %d}\n' % i for i in range(5)))
+    output = asyncio.run(collect(predict_ndjson(stream, to_matrix, predict, chunk_size=2)))
+
+    assert calls == [2, 2, 1]
+    assert b"".join(output).decode().split() == [
+        '{"prediction":%d}' % (2 * i) for i in range(5)]
+
+
+def test_predict_ndjson_ends_with_error_line():
+    async def predict(matrix):
+        return matrix[:, 0]
+
+    def to_matrix(records):
+        return np.array([[r["x"]] for r in records])
+
+    stream = as_stream(b'{"x": 1}\n{"x": 2}\nnot json\n')
+    output = asyncio.run(collect(predict_ndjson(stream, to_matrix, predict, chunk_size=2)))
+
+    assert output[0] == b'{"prediction":1}\n{"prediction":2}\n'
+    assert b'"chunk_start": 2' in output[-1]
+
+
+def test_predict_ndjson_caps_the_line_length():
+    async def predict(matrix):
+        return matrix[:, 0]
+
+    def to_matrix(records):
+        return np.array([[r["x"]] for r in records])
+
+    stream = as_stream(b'{"x": 1}\n', b"x" * 40, b"x" * 40)
+    output = asyncio.run(collect(predict_ndjson(stream, to_matrix, predict, chunk_size=1, max_line_bytes=64)))
+
+    assert output[0] == b'{"prediction":1}\n'
+    assert b"longer than 64 bytes" in output[-1]
+
+
+def test_predict_ndjson_reraises_client_disconnect():
+    async def disconnected():
+        yield b'{"x": 1}\n'
+        raise ClientDisconnect()
+
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(collect(predict_ndjson(disconnected(), None, None, chunk_size=8)))
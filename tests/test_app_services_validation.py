@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from core.errors import ColumnValidationException
+from services.validation import validate_columns
+
+CATEGORICAL = {"Sex": ["female", "male"]}
+
+
+def errors_of(columns):
+    with pytest.raises(ColumnValidationException) as info:
+        validate_columns(columns, CATEGORICAL)
+    return {(error["type"], error["loc"][-1]): error["rows"] for error in info.value.errors}
+
+
+def test_valid_columns_are_typed_arrays():
+    columns = validate_columns(
+        {"Pclass": [3, 1], "SibSp": np.array([0.0, 1.0]), "Parch": [0, 2], "Sex": ["male", "female"]},
+        CATEGORICAL)
+
+    assert columns["SibSp"].dtype == np.int64
+    assert columns["Sex"].tolist() == ["male", "female"]
+
+
+def test_errors_name_offending_rows():
+    errors = errors_of({"Pclass": [1, 4, 0, 2], "SibSp": [0, -1, 1, 0],
+                        "Parch": [0, 1, "2", 0], "Sex": ["male", "other", "female", "male"]})
+
+    assert errors == {
+        ("greater_than_equal", "Pclass"): [2],
+        ("less_than_equal", "Pclass"): [1],
+        ("greater_than_equal", "SibSp"): [1],
+        ("int_type", "Parch"): [2],
+        ("enum", "Sex"): [1],
+    }
+
+
+def test_uneven_and_missing_columns():
+    errors = errors_of({"Pclass": [1, 2, 3], "SibSp": [0], "Sex": ["male"] * 3})
+
+    assert errors == {("missing", "Parch"): [], ("length", "SibSp"): [1, 2]}
+
+
+def test_reported_rows_are_capped():
+    with pytest.raises(ColumnValidationException) as info:
+        validate_columns({"Pclass": [9] * 1000, "SibSp": [0] * 1000,
+                          "Parch": [0] * 1000, "Sex": ["male"] * 1000}, CATEGORICAL)
+
+    error, = info.value.errors
+    assert len(error["rows"]) == 100 and error["count"] == 1000
@@ -0,0 +1,37 @@
+import asyncio
+from unittest.mock import patch
+
+from benchmarks.load_test import (benchmark, find_regressions, make_bodies,
+                                  read_rows)
+from services.predict import MachineLearningModelHandlerScore
+
+
+def test_make_bodies_cycles_rows_into_batches():
+    rows = read_rows("ml/model/examples/example.json")
+
+    bodies = make_bodies(rows, batch_size=3, count=2)
+
+    assert len(bodies) == 2
+    assert bodies[0] == {"Pclass": [3] * 3, "SibSp": [0] * 3, "Parch": [0] * 3, "Sex": ["male"] * 3}
+
+
+@patch.object(MachineLearningModelHandlerScore, "model", None)
+def test_in_process_benchmark_reports_percentiles():
+    rows = read_rows("ml/model/examples/example.json")
+
+    results = asyncio.run(benchmark(
+        None, "/api/v1/predict", rows, [1], concurrency=2, requests=10, warmup=1))
+
+    scenario = results["scenarios"]["/api/v1/predict batch=1 concurrency=2"]
+    assert scenario["requests"] == 10 and scenario["errors"] == 0
+    assert scenario["p50_ms"] <= scenario["p95_ms"] <= scenario["p99_ms"]
+
+
+def test_find_regressions_uses_threshold():
+    baseline = {"target": "in-process", "scenarios": {
+        "a": {"throughput_rps": 100.0, "p99_ms": 10.0, "errors": 0}}}
+    results = {"target": "in-process", "scenarios": {
+        "a": {"throughput_rps": 85.0, "p99_ms": 13.0, "errors": 0}}}
+
+    assert find_regressions(results, baseline, threshold=0.2) == [
+        "a: p99 13.00 > 10.00 ms"]
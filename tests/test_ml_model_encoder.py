@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ml.features.build_features import Pipeline
+from ml.model.encoder import FeatureEncoder
+from models.prediction import MachineLearningDataInput
+
+
+@pytest.fixture
+def interim():
+    data = pd.read_csv("app/data/test.csv")[["Pclass", "Sex", "SibSp", "Parch"]]
+    return data.assign(Survived=np.arange(len(data)) % 2)
+
+
+def test_matches_get_dummies(interim):
+    x = interim.drop(columns="Survived")
+    encoder = FeatureEncoder.fit(x)
+
+    expected = pd.get_dummies(x).astype(np.float32)
+    pd.testing.assert_frame_equal(encoder.transform_frame(x), expected)
+    assert encoder == FeatureEncoder.load("ml/model/encoder.json")
+
+
+def test_serving_matches_training_output(interim, tmp_path):
+    pipeline = Pipeline(file_name="train.csv", input_filepath=str(tmp_path),
+                        output_filepath=None, data=interim)
+    features = pipeline.run()
+    pipeline.encoder.save(str(tmp_path / "encoder.json"))
+    encoder = FeatureEncoder.load(str(tmp_path / "encoder.json"))
+
+    data_input = MachineLearningDataInput(
+        **interim.drop(columns="Survived").to_dict(orient="list"))
+    matrix = data_input.get_array(encoder)
+
+    assert matrix.dtype == np.float32 and matrix.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(
+        matrix, features[encoder.columns].to_numpy(np.float32))
+    assert encoder.columns == list(features.columns[:-1])
+
+
+def test_unknown_category_encodes_as_zeros():
+    encoder = FeatureEncoder(["Pclass"], {"Sex": ["female", "male"]})
+
+    matrix = encoder.transform({"Pclass": [1, 2], "Sex": ["male", "other"]})
+
+    np.testing.assert_array_equal(matrix, [[1, 0, 1], [2, 0, 0]])
+
@@ -0,0 +1,90 @@
+import itertools
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from ml.model import export_model
+from ml.model.forest import FEATURE_DOMAIN, CompactForest, forest_name
+from sklearn.ensemble import RandomForestClassifier
+
+warnings.filterwarnings("ignore", message="Trying to unpickle estimator")
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load("ml/model/dummy_model.pkl")
+
+
+def domain_grid(domain=FEATURE_DOMAIN):
+    grid = np.array(list(itertools.product(
+        *[range(low, high + 1) for low, high in domain.values()])), dtype=np.float32)
+    return pd.DataFrame(grid[grid[:, 3] + grid[:, 4] == 1], columns=list(domain))
+
+
+def test_matches_sklearn_over_the_whole_domain(model, tmp_path):
+    forest = CompactForest.from_sklearn(model)
+    forest.save(str(tmp_path / "model.forest"))
+    loaded = CompactForest.load(str(tmp_path / "model.forest"))
+    grid = domain_grid()
+
+    assert isinstance(loaded.threshold, np.memmap)
+    assert loaded.threshold.dtype == np.float32 and loaded.feature.dtype == np.uint8
+    np.testing.assert_array_equal(loaded.predict(grid.to_numpy()), model.predict(grid))
+    np.testing.assert_allclose(loaded.predict_proba(grid), model.predict_proba(grid), atol=1e-6)
+
+
+def test_out_of_domain_rows_are_clipped_like_sklearn(model):
+    forest = CompactForest.from_sklearn(model)
+    rows = pd.DataFrame([[0, 12, 15, 0, 1], [5, -1, 0, 1, 0]], columns=list(FEATURE_DOMAIN))
+
+    assert forest.outside_domain() == []
+    np.testing.assert_array_equal(forest.predict(rows), model.predict(rows))
+
+
+def test_prunes_branches_outside_a_narrower_domain(model):
+    domain = {**FEATURE_DOMAIN, "Pclass": (3, 3), "SibSp": (0, 1)}
+    forest = CompactForest.from_sklearn(model, domain)
+    grid = domain_grid(domain)
+
+    assert forest.node_count < CompactForest.from_sklearn(model).node_count
+    np.testing.assert_array_equal(forest.predict(grid), model.predict(grid))
+
+
+def test_one_hot_groups_prune_impossible_splits():
+    # trained on rows that break the one-hot rule, every tree needs three splits
+    x = pd.DataFrame({"Sex_female": [0, 1, 0, 1], "Sex_male": [0, 0, 1, 1]})
+    model = RandomForestClassifier(n_estimators=1, bootstrap=False, random_state=0).fit(x, [1, 0, 0, 1])
+    domain = {"Sex_female": (0, 1), "Sex_male": (0, 1)}
+
+    grouped = CompactForest.from_sklearn(model, domain, [("Sex_female", "Sex_male")])
+    ungrouped = CompactForest.from_sklearn(model, domain, [])
+
+    assert (grouped.node_count, ungrouped.node_count) == (3, 7)
+    valid = x.iloc[[1, 2]]
+    np.testing.assert_array_equal(grouped.predict(valid), model.predict(valid))
+
+
+def test_save_swaps_a_link_and_keeps_the_previous_version(model, tmp_path):
+    path = tmp_path / "model.forest"
+    path.mkdir()
+    forest = CompactForest.from_sklearn(model)
+    for _ in range(3):
+        forest.save(str(path))
+        current = path.resolve()
+        assert path.is_symlink() and (current / "forest.json").exists()
+
+    versions = sorted(entry.name for entry in tmp_path.iterdir() if entry.name != "model.forest")
+    assert len(versions) == 2 and current.name in versions
+    np.testing.assert_array_equal(CompactForest.load(str(path)).value, forest.value)
+
+
+def test_export_writes_forest_next_to_model(model, tmp_path):
+    joblib.dump(model, tmp_path / "dummy_model.pkl")
+
+    export_model.Pipeline(model_name="dummy_model.pkl", model_path=str(tmp_path)).run()
+
+    forest = CompactForest.load(str(tmp_path / forest_name("dummy_model.pkl")))
+    grid = domain_grid()
+    np.testing.assert_array_equal(forest.predict(grid), model.predict(grid))
@@ -0,0 +1,50 @@
+import json
+
+import pandas as pd
+import pytest
+from ml.model.predict_model import Pipeline
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    return Pipeline(input_file="app/data/test.csv", output_file=str(tmp_path / "out.csv"),
+                    model_file="ml/model/model.pkl", chunk_size=100, workers=2)
+
+
+def test_scores_every_row_in_input_order(pipeline):
+    pipeline.run()
+
+    result = pd.read_csv(pipeline.output_file)
+    expected = pd.read_csv("app/data/test.csv")
+    assert result["PassengerId"].to_list() == expected["PassengerId"].to_list()
+    assert set(result["Survived"]) <= {0, 1}
+
+
+def test_resumes_after_interruption(pipeline, tmp_path):
+    pipeline.run()
+    complete = open(pipeline.output_file, "rb").read()
+
+    # Two chunks were written, then the run died half way through the third
+    lines = complete.splitlines(keepends=True)
+    done = b"".join(lines[:201])
+    with open(pipeline.output_file, "wb") as file:
+        file.write(done + b"".join(lines[201:230]))
+    with open(pipeline.progress_file, "w") as file:
+        json.dump({"chunks": 2, "rows": 200, "bytes": len(done)}, file)
+
+    progress = pipeline.run()
+
+    assert progress["rows"] == 418
+    assert open(pipeline.output_file, "rb").read() == complete
+
+
+def test_scores_parquet_input(tmp_path):
+    pytest.importorskip("pyarrow")
+    pd.read_csv("app/data/test.csv").to_parquet(tmp_path / "test.parquet")
+    pipeline = Pipeline(input_file=str(tmp_path / "test.parquet"), output_file=str(tmp_path / "out.csv"),
+                        model_file="ml/model/model.pkl", chunk_size=100, workers=1)
+
+    progress = pipeline.run()
+
+    assert progress["chunks"] == 5
+    assert len(pd.read_csv(pipeline.output_file)) == 418
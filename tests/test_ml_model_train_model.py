@@ -0,0 +1,39 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from ml.model.train_model import Pipeline
+from sklearn.ensemble import RandomForestClassifier
+
+PARAM_GRID = {"n_estimators": [10, 20], "max_depth": [2, 4]}
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame({"Pclass": rng.integers(1, 4, 600), "SibSp": rng.integers(0, 3, 600),
+                      "Parch": rng.integers(0, 3, 600), "Sex_female": rng.integers(0, 2, 600)})
+    x["Sex_male"] = 1 - x["Sex_female"]
+    return x.assign(Survived=(x["Sex_female"] + (x["Pclass"] == 1) > 0).astype(int)), x
+
+
+@pytest.mark.parametrize("search", ["grid", "random"])
+def test_search_stores_trials_and_saves_best_model(search, data, tmp_path):
+    train, test = data
+    pipeline = Pipeline(train_data_name="train.csv", test_data_name="test.csv", input_data_path=str(tmp_path),
+                        output_data_path=str(tmp_path), model_name="model.pkl", model_path=str(tmp_path),
+                        model=RandomForestClassifier(random_state=1), train_data=train, test_data=test,
+                        search=search, param_grid=PARAM_GRID, cv=3, n_jobs=2)
+    pipeline.run()
+
+    trials = pd.read_csv(tmp_path / "search_trials.csv")
+    # Every candidate is scored in the first round, the best go on with more rows
+    assert (trials["iter"] == 0).sum() == 4
+    assert trials["iter"].max() >= 1
+    assert trials["n_resources"].is_monotonic_increasing
+
+    model = joblib.load(tmp_path / "model.pkl")
+    best = pipeline.trials.loc[pipeline.trials["iter"] == pipeline.trials["iter"].max()]
+    best = best.loc[best["mean_test_score"].idxmax()]
+    assert model.get_params()["n_estimators"] == best["param_n_estimators"]
+    assert model.get_params()["max_depth"] == best["param_max_depth"]
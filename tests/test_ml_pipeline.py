@@ -0,0 +1,109 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from ml.pipeline import Pipeline
+
+
+@pytest.fixture
+def paths(tmp_path):
+    test = pd.read_csv("app/data/test.csv")
+    train = test.assign(Survived=np.random.default_rng(0).integers(0, 2, len(test)))
+    for name in ["raw", "interim", "processed", "results", "model", "cache"]:
+        (tmp_path / name).mkdir()
+    train.to_csv(tmp_path / "raw" / "train.csv", index=False)
+    test.to_csv(tmp_path / "raw" / "test.csv", index=False)
+    return {"raw_path": str(tmp_path / "raw"), "interim_path": str(tmp_path / "interim"),
+            "processed_path": str(tmp_path / "processed"), "results_path": str(tmp_path / "results"),
+            "model_path": str(tmp_path / "model"), "cache_path": str(tmp_path / "cache")}
+
+
+def test_in_memory_writes_no_intermediate_files(paths, tmp_path):
+    pipeline = Pipeline(download=False, **paths)
+    pipeline.run()
+
+    assert not any((tmp_path / "interim").iterdir())
+    assert not any((tmp_path / "processed").iterdir())
+    assert (tmp_path / "model" / "model.pkl").exists()
+    assert set(pipeline.stats) == {"clean_dataset[train.csv]", "build_features[train.csv]",
+                                   "clean_dataset[test.csv]", "build_features[test.csv]", "train_model"}
+    assert all(set(stat) == {"seconds", "peak_rss_mb", "rss_growth_mb"} for stat in pipeline.stats.values())
+    assert all(stat["peak_rss_mb"] > 0 and stat["rss_growth_mb"] >= 0 for stat in pipeline.stats.values())
+
+
+def test_trace_memory_records_peak_memory(paths):
+    pipeline = Pipeline(download=False, trace_memory=True, **paths)
+    pipeline.run()
+
+    assert all(stat["peak_mb"] > 0 for stat in pipeline.stats.values())
+
+
+def test_in_memory_matches_on_disk(paths, tmp_path):
+    Pipeline(download=False, in_memory=False, **paths).run()
+    on_disk = pd.read_csv(tmp_path / "results" / "test.csv")
+
+    Pipeline(download=False, persist_format="parquet", **paths).run()
+
+    assert (tmp_path / "processed" / "train.parquet").exists()
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "results" / "test.csv"), on_disk)
+
+
+def test_unchanged_stages_are_cached(paths, tmp_path):
+    Pipeline(download=False, **paths).run()
+    predictions = (tmp_path / "results" / "test.csv").read_bytes()
+    (tmp_path / "model" / "model.pkl").unlink()
+    for file in (tmp_path / "results").iterdir():
+        file.unlink()
+
+    pipeline = Pipeline(download=False, **paths)
+    pipeline.run()
+
+    assert all(pipeline.cache.results.values())
+    assert (tmp_path / "model" / "model.pkl").exists()
+    assert (tmp_path / "results" / "test.csv").read_bytes() == predictions
+    assert (tmp_path / "results" / "split_test_pred.csv").exists()
+
+
+def test_changed_raw_files_are_downloaded_again(paths, tmp_path):
+    raw = {file: (tmp_path / "raw" / file).read_bytes() for file in ["train.csv", "test.csv"]}
+    make_dataset = MagicMock()
+    make_dataset.Pipeline.return_value.run.side_effect = lambda: [
+        (tmp_path / "raw" / file).write_bytes(content) for file, content in raw.items()]
+
+    with patch.dict(sys.modules, {"ml.data.make_dataset": make_dataset}):
+        Pipeline(**paths).make_dataset()
+        Pipeline(**paths).make_dataset()
+        assert make_dataset.Pipeline.return_value.run.call_count == 1
+
+        (tmp_path / "raw" / "test.csv").write_text("PassengerId\n")
+        pipeline = Pipeline(**paths)
+        pipeline.make_dataset()
+
+    assert make_dataset.Pipeline.return_value.run.call_count == 2
+    assert pipeline.cache.results["make_dataset"] is False
+    assert (tmp_path / "raw" / "test.csv").read_bytes() == raw["test.csv"]
+
+
+def test_changed_input_reruns_downstream_stages(paths, tmp_path):
+    Pipeline(download=False, **paths).run()
+    test = pd.read_csv(tmp_path / "raw" / "test.csv")
+    test.head(100).to_csv(tmp_path / "raw" / "test.csv", index=False)
+
+    pipeline = Pipeline(download=False, **paths)
+    pipeline.run()
+
+    assert pipeline.cache.results == {"clean_dataset[train.csv]": True, "build_features[train.csv]": True,
+                                      "clean_dataset[test.csv]": False, "build_features[test.csv]": False,
+                                      "train_model": False}
+
+
+def test_force_reruns_every_stage(paths):
+    Pipeline(download=False, **paths).run()
+
+    pipeline = Pipeline(download=False, force=True, **paths)
+    pipeline.run()
+
+    assert not any(pipeline.cache.results.values())
+    assert pipeline.cache.summary().startswith("0/5 stages cached:")
@@ -1,5 +1,5 @@
 import pytest
-from app.core.paginator import pagenation
+from app.core.paginator import decode_cursor, encode_cursor, keyset_page, pagenation
 
 """
 In order to test behavior of pagenation function
@@ -43,3 +43,24 @@ def test_pagenation_400_set_start_1_equals_True_and_init_as_pagenumber_as_0():
     """
     with pytest.raises(Exception, match=r".* starts > 0. *"):
         d = pagenation(0, 20, 400, list(range(400)))
+
+
+def test_keyset_page_returns_cursor_after_last_listing():
+
+    d = keyset_page([(5,), (6,), (7,)], page_size=2)
+    assert d["listings"] == [(5,), (6,)]
+    assert decode_cursor(d["nextCursor"]) == 6
+
+
+def test_keyset_page_last_page_has_no_cursor():
+
+    d = keyset_page([(5,), (6,)], page_size=2)
+    assert d["nextCursor"] is None
+
+
+def test_decode_cursor_rejects_garbage():
+
+    assert decode_cursor(None, default=-1) == -1
+    assert decode_cursor(encode_cursor(41)) == 41
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor("nope")